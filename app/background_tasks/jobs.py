@@ -1,31 +1,64 @@
 # app/background_jobs/jobs.py
 
+from uuid import UUID
 from datetime import datetime, timedelta
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
-from app.models import Booking
+from app.models import Booking, BookingReminder, Job, RevokedToken, WaitlistEntry
+from app.utils import (
+    invalidation_bus,
+    audit_trail,
+    revocation_store,
+    job_queue,
+    assign_receipt_ids,
+    send_booking_notifications,
+    process_payment_events,
+    reconcile_payments,
+    new_reconciliation_run,
+    RECONCILE_JOB,
+    render_receipts,
+    purge_receipt_files,
+    RENDER_RECEIPT_JOB,
+    queue_waitlist_promotion,
+    promote_waitlist,
+    PROMOTE_WAITLIST_JOB
+)
 
 def delete_old_pending_bookings():
     """
-    Delete bookings that have been in a pending status for more than 24 hours.
+    Delete bookings that have been in a pending status for more than
+    PENDING_BOOKING_TTL_HOURS. While the payment provider is configured,
+    bookings with a tx_ref are left to the reconciliation job, which
+    releases them only if they were not paid.
     """
     db: Session = next(get_db())  # Get a database session
     try:
-        # Calculate the cutoff time (24 hours ago)
-        cutoff_time = datetime.now() - timedelta(hours=24)
+        # Calculate the cutoff time
+        cutoff_time = datetime.now() - timedelta(hours=settings.PENDING_BOOKING_TTL_HOURS)
 
-        # Query for pending bookings older than 24 hours
-        old_pending_bookings = db.query(Booking).filter(
+        # Query for old pending bookings
+        query = db.query(Booking).filter(
             Booking.status == "pending",
             Booking.created_at <= cutoff_time
-        ).all()
+        )
+        if settings.PAYMENT_PROVIDER_SECRET_KEY:
+            query = query.filter(Booking.tx_ref.is_(None))
+        old_pending_bookings = query.all()
 
         # Delete the old pending bookings
         for booking in old_pending_bookings:
+            queue_waitlist_promotion(db, booking.space_id, booking.start_time, booking.end_time)
             db.delete(booking)
 
         # Commit the changes
         db.commit()
+        job_queue.notify()
+        for space_id in {booking.space_id for booking in old_pending_bookings}:
+            invalidation_bus.publish(f"availability:{space_id}")
+        for booking in old_pending_bookings:
+            audit_trail.record(None, "booking.expire", "booking", booking.id, {"status": ["pending", None]})
         print(f"Deleted {len(old_pending_bookings)} old pending bookings.")
 
     except Exception as e:
@@ -35,4 +68,169 @@ def delete_old_pending_bookings():
 
     finally:
         # Close the database session
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def purge_expired_revocations():
+    """
+    Delete revocations whose tokens have expired anyway and rebuild this
+    worker's revocation filter without them.
+    """
+    db: Session = next(get_db())
+    try:
+        deleted = db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.now()).delete()
+        db.commit()
+        revocation_store.reload()
+        print(f"Purged {deleted} expired token revocations.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging expired token revocations: {e}")
+    finally:
+        db.close()
+
+
+def purge_old_reminders():
+    """
+    Delete the records of reminders for bookings that started more than a day ago.
+    """
+    db: Session = next(get_db())
+    try:
+        cutoff_time = datetime.now() - timedelta(days=1)
+        deleted = db.query(BookingReminder).filter(BookingReminder.start_time <= cutoff_time).delete()
+        db.commit()
+        print(f"Purged {deleted} old booking reminder records.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging old booking reminder records: {e}")
+    finally:
+        db.close()
+
+
+def purge_old_waitlist_entries():
+    """
+    Delete waitlist entries whose start time has passed; they can no longer be promoted.
+    """
+    db: Session = next(get_db())
+    try:
+        deleted = db.query(WaitlistEntry).filter(WaitlistEntry.start_time <= datetime.now()).delete()
+        db.commit()
+        print(f"Purged {deleted} old waitlist entries.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging old waitlist entries: {e}")
+    finally:
+        db.close()
+
+
+def purge_finished_jobs():
+    """
+    Delete completed jobs older than JOB_RETENTION_HOURS. Dead-lettered jobs are kept.
+    """
+    db: Session = next(get_db())
+    try:
+        cutoff_time = datetime.now() - timedelta(hours=settings.JOB_RETENTION_HOURS)
+        deleted = db.query(Job).filter(Job.status == "done", Job.finished_at <= cutoff_time).delete()
+        db.commit()
+        print(f"Purged {deleted} completed jobs.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging completed jobs: {e}")
+    finally:
+        db.close()
+
+
+def purge_receipts():
+    """
+    Delete receipt documents of deleted bookings and receipt files no document refers to.
+    """
+    db: Session = next(get_db())
+    try:
+        deleted = purge_receipt_files(db)
+        print(f"Purged {deleted} unreferenced receipt files.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging receipt files: {e}")
+    finally:
+        db.close()
+
+
+def start_payment_reconciliation():
+    """
+    Queue the first page of a payment reconciliation run, unless a run is
+    still going or another worker started one within the last half interval.
+    """
+    if not settings.PAYMENT_PROVIDER_SECRET_KEY:
+        return
+    db: Session = next(get_db())
+    try:
+        recent = datetime.now() - timedelta(minutes=settings.PAYMENT_RECONCILE_INTERVAL_MINUTES / 2)
+        if db.query(Job.id).filter(
+            Job.kind == RECONCILE_JOB,
+            or_(Job.status.in_(("queued", "running")), Job.created_at >= recent),
+        ).first():
+            return
+        job_queue.enqueue(db, RECONCILE_JOB, new_reconciliation_run())
+        db.commit()
+        job_queue.notify()
+    except Exception as e:
+        db.rollback()
+        print(f"Error starting payment reconciliation: {e}")
+    finally:
+        db.close()
+
+
+@job_queue.handler("assign_receipt", batch_size=50)
+def assign_receipts(db: Session, payloads: list[dict]):
+    """
+    Give newly confirmed bookings their receipt IDs, off the confirmation
+    request, and queue the rendering of their receipts.
+    """
+    booking_ids = [UUID(payload["booking_id"]) for payload in payloads]
+    bookings = db.query(Booking).filter(
+        Booking.id.in_(booking_ids),
+        Booking.status == "confirmed",
+        Booking.receipt_id.is_(None),  # Already assigned by an earlier attempt
+    ).order_by(Booking.created_at).all()
+    assign_receipt_ids(db, bookings)
+    for booking in bookings:
+        job_queue.enqueue(db, RENDER_RECEIPT_JOB, {"booking_id": str(booking.id)})
+
+
+@job_queue.handler(RENDER_RECEIPT_JOB, batch_size=50)
+def render_receipt_batch(db: Session, payloads: list[dict]):
+    """
+    Render the HTML and PDF receipts of bookings that got a receipt ID or changed.
+    """
+    render_receipts(db, list({UUID(payload["booking_id"]) for payload in payloads}))
+
+
+@job_queue.handler("booking_notification", batch_size=200)
+def send_booking_notification_batch(db: Session, payloads: list[dict]):
+    """
+    Email users about changes to their bookings, one message per user per batch.
+    """
+    send_booking_notifications(db, payloads)
+
+
+@job_queue.handler("payment_events", batch_size=200)
+def process_payment_event_batch(db: Session, payloads: list[dict]):
+    """
+    Confirm bookings paid according to stored payment webhooks.
+    """
+    return process_payment_events(db, payloads)
+
+
+@job_queue.handler(RECONCILE_JOB)
+def reconcile_payment_page(db: Session, payloads: list[dict]):
+    """
+    Reconcile one page of pending bookings with the payment provider.
+    """
+    return reconcile_payments(db, payloads[0])
+
+
+@job_queue.handler(PROMOTE_WAITLIST_JOB, batch_size=50)
+def promote_waitlist_batch(db: Session, payloads: list[dict]):
+    """
+    Offer freed booking intervals to the users waiting for them.
+    """
+    return promote_waitlist(db, payloads)
@@ -2,13 +2,28 @@
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from .jobs import delete_old_pending_bookings  # Import the new function
+from app.config import settings
+from .jobs import (
+    delete_old_pending_bookings,
+    purge_expired_revocations,
+    purge_old_reminders,
+    purge_finished_jobs,
+    start_payment_reconciliation,
+    purge_receipts,
+    purge_old_waitlist_entries
+)
 
 scheduler = BackgroundScheduler()
 
 def start_scheduler():
     # Add the job to delete old pending bookings
     scheduler.add_job(delete_old_pending_bookings, IntervalTrigger(hours=1))  # Run every hour
+    scheduler.add_job(purge_expired_revocations, IntervalTrigger(hours=1))
+    scheduler.add_job(purge_old_reminders, IntervalTrigger(hours=1))
+    scheduler.add_job(purge_finished_jobs, IntervalTrigger(hours=1))
+    scheduler.add_job(purge_receipts, IntervalTrigger(hours=1))
+    scheduler.add_job(purge_old_waitlist_entries, IntervalTrigger(hours=1))
+    scheduler.add_job(start_payment_reconciliation, IntervalTrigger(minutes=settings.PAYMENT_RECONCILE_INTERVAL_MINUTES))
     print("Starting the scheduler...")
     # Start the scheduler
     scheduler.start()
\ No newline at end of file
@@ -1,6 +1,7 @@
 # app/config.py
 
 from pydantic_settings import BaseSettings
+from typing import Literal
 import os
 
 class Settings(BaseSettings):
@@ -11,6 +12,8 @@ class Settings(BaseSettings):
     DEBUG: bool = ENVIRONMENT == "development"
 
     DATABASE_URL: str
+    SLOW_QUERY_THRESHOLD_MS: float = 200  # Statements slower than this are logged
+    EXPLAIN_SLOW_QUERIES: bool = False  # Also log their plan, at the cost of an extra EXPLAIN round-trip each
 
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
@@ -21,6 +24,145 @@ class Settings(BaseSettings):
     # JWT and authentication settings
     JWT_SECRET_KEY: str
 
+    # How concurrent bookings of the same space are serialized
+    BOOKING_LOCK_STRATEGY: Literal["row", "advisory", "exclusion", "none"] = "row"
+
+    # Read routes whose concurrent identical requests share one query
+    SINGLEFLIGHT_ROUTES: list = ["taken_bookings", "space_detail"]
+
+    # Cross-worker cache invalidation
+    BUS_BACKEND: Literal["auto", "postgres", "file", "memory"] = "auto"  # auto: postgres on Postgres, file otherwise
+    BUS_FILE_PATH: str = "cache_bus.log"
+    BUS_FILE_MAX_BYTES: int = 1_000_000
+    BUS_POLL_INTERVAL_SECONDS: float = 0.1
+    BUS_RESYNC_SECONDS: float = 30  # How often the Postgres backend re-reads cache_versions
+    BUS_CACHE_MAX_AGE_SECONDS: float = 300  # Upper bound on staleness if an invalidation is lost
+
+    # Space catalog and busy slots in one mmap'd snapshot shared by all workers
+    SHARED_CATALOG_ENABLED: bool = False
+    SHARED_CATALOG_PATH: str = "catalog.snapshot"
+    SHARED_CATALOG_REBUILD_SECONDS: float = 1  # Minimum delay between rebuilds after writes
+    SHARED_CATALOG_MAX_AGE_SECONDS: float = 60
+
+    # Payments: webhooks are accepted only with this secret hash (set the same in the provider dashboard)
+    PAYMENT_WEBHOOK_SECRET_HASH: str = ""
+    PAYMENT_CURRENCY: str = "NGN"
+    RECEIPT_DIR: str = "receipts"  # Rendered HTML/PDF receipts, named by content hash
+    PENDING_BOOKING_TTL_HOURS: float = 24  # Unpaid pending bookings are released after this
+
+    # Reconciliation of pending bookings with the provider's verify API (skipped while the key is unset)
+    PAYMENT_PROVIDER_URL: str = "https://api.flutterwave.com/v3"
+    PAYMENT_PROVIDER_SECRET_KEY: str = ""
+    PAYMENT_PROVIDER_TIMEOUT_SECONDS: float = 10
+    PAYMENT_RECONCILE_INTERVAL_MINUTES: int = 30
+    PAYMENT_RECONCILE_CONCURRENCY: int = 8  # Verify requests in flight (and pooled connections) per worker
+    PAYMENT_RECONCILE_PAGE_SIZE: int = 100  # Bookings verified and applied per transaction
+    PAYMENT_RECONCILE_MIN_AGE_MINUTES: float = 15  # Newer bookings are left to the webhook
+
+    # Durable background job queue (jobs table), worked by asyncio tasks in every worker
+    JOB_QUEUE_ENABLED: bool = True
+    JOB_WORKERS: int = 2  # Per app worker
+    JOB_POLL_INTERVAL_SECONDS: float = 0.5
+    JOB_LEASE_SECONDS: float = 60  # A running job is claimed again after this (crashed worker)
+    JOB_MAX_ATTEMPTS: int = 5  # Then the job is dead-lettered
+    JOB_RETRY_BASE_SECONDS: float = 5  # Doubles with every attempt
+    JOB_RETRY_MAX_SECONDS: float = 600
+    JOB_RETENTION_HOURS: int = 24  # Completed jobs are purged after this
+
+    # iCalendar feeds of spaces and users
+    CALENDAR_FEED_PAST_DAYS: int = 30  # Bookings that started longer ago are left out
+    CALENDAR_FEED_MAX_AGE_SECONDS: float = 300  # Feed versions are cached per worker at most this long
+
+    # Waitlists for taken slots, promoted to pending bookings when the slot frees up
+    WAITLIST_MAX_ENTRIES_PER_USER: int = 10  # Entries one user may be waiting on at once
+
+    # Audit trail of admin and booking actions, buffered per worker and written in batches
+    AUDIT_ENABLED: bool = True
+    AUDIT_BATCH_SIZE: int = 200  # A full batch is written right away
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 2  # Otherwise buffered entries are written after this
+    AUDIT_BUFFER_MAX: int = 50_000  # Oldest entries are dropped past this while the database is unreachable
+
+    # Live availability streams (Server-Sent Events), per worker
+    AVAILABILITY_STREAM_MAX_CLIENTS: int = 1000
+    AVAILABILITY_STREAM_MAX_SPACES: int = 50  # Spaces one client may follow
+    AVAILABILITY_STREAM_QUEUE_SIZE: int = 64  # Undelivered events before a slow client is dropped
+    AVAILABILITY_STREAM_HEARTBEAT_SECONDS: float = 15
+    AVAILABILITY_STREAM_RETRY_MS: int = 3000  # Reconnect delay suggested to clients
+    AVAILABILITY_STREAM_MAX_SECONDS: float = 300  # Then the stream ends and the client reconnects
+
+    # Booking reminders, dispatched by one worker per host
+    REMINDERS_ENABLED: bool = True
+    REMINDER_LEAD_MINUTES: int = 60  # How long before the start the reminder goes out
+    REMINDER_HORIZON_MINUTES: int = 180  # Bookings starting within this are kept in the timer wheel
+    REMINDER_RELOAD_MINUTES: int = 10  # Must stay below the horizon minus the lead
+    REMINDER_TICK_SECONDS: float = 1
+    REMINDER_BATCH_SIZE: int = 100
+    REMINDER_RETRY_SECONDS: float = 300
+    REMINDER_LOCK_PATH: str = "reminders.lock"
+
+    # Booking lifecycle emails, sent through the job queue
+    NOTIFICATIONS_ENABLED: bool = True
+    NOTIFICATION_COALESCE_SECONDS: float = 10  # A user's events within this go out as one email
+
+    # Notification delivery: "file" appends to a local outbox instead of sending mail
+    NOTIFIER_BACKEND: Literal["file", "smtp"] = "file"
+    NOTIFIER_OUTBOX_PATH: str = "notifications.outbox"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10
+    SMTP_POOL_SIZE: int = 4  # Connections per app worker, reused across batches
+    SMTP_IDLE_SECONDS: float = 30  # Idle connections are checked with NOOP before reuse
+    MAIL_FROM: str = "ReserveMe <no-reply@reserveme.local>"
+
+    # On-demand request profiling (admin only)
+    PROFILING_ENABLED: bool = True
+    PROFILE_MAX_PER_MINUTE: int = 2  # Per worker
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5
+    PROFILE_DIR: str = "profiles"
+
+    # Verified access tokens kept per worker, so repeated requests skip the HMAC check and claim parsing
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000  # 0 disables the cache
+
+    # Token revocation filter (defaults: ~1% false positives at REVOCATION_BLOOM_CAPACITY entries)
+    REVOCATION_BLOOM_BITS: int = 8 * 2**20
+    REVOCATION_BLOOM_HASHES: int = 7
+    REVOCATION_BLOOM_CAPACITY: int = 850_000
+    REVOCATION_RECENT_MAX: int = 100_000
+
+    # Auth rate limits: policy -> [requests, per seconds], checked before the DB and bcrypt
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: Literal["memory", "shared"] = "memory"  # shared: one mmap'd file for all workers
+    RATE_LIMIT_SHARED_PATH: str = "rate_limits.bin"
+    RATE_LIMIT_MAX_KEYS: int = 65536
+    RATE_LIMITS: dict = {
+        "auth_ip": [30, 60],
+        "auth_email": [10, 60],
+        "register_ip": [10, 3600],
+    }
+    LOGIN_MAX_FAILED_ATTEMPTS: int = 5
+    LOGIN_LOCKOUT_MINUTES: float = 5
+    # Reverse proxies in front of the app that append to X-Forwarded-For; 0 trusts no header
+    TRUSTED_PROXY_HOPS: int = 0
+
+    # Admission control: concurrent requests and queue slots per route class, per worker
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_CONCURRENCY: dict = {"critical": 32, "normal": 16, "low": 4}
+    ADMISSION_QUEUE_SIZE: dict = {"critical": 128, "normal": 64, "low": 8}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+
+    # Booking pricing
+    PRICING_MIN_DURATION_MINUTES: int = 60
+    PRICING_ROUNDING_MINUTES: int = 30  # Partial time is billed up to this increment
+    PRICING_PEAK_START_HOUR: int = 9
+    PRICING_PEAK_END_HOUR: int = 17
+    PRICING_PEAK_MULTIPLIER: float = 1.0  # Weekdays within the peak hours
+    PRICING_WEEKEND_MULTIPLIER: float = 1.0
+    QUOTE_MAX_CANDIDATES: int = 500
+
     # Other security settings
     ALLOWED_HOSTS: list = ["*"]
     CORS_ORIGINS: list = ["http://localhost:5173"] if DEBUG else ["https://reserveme-seven.vercel.app"]  # Add frontend URL if applicable
@@ -1,33 +1,70 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.database import engine, Base
 from app.config import settings
-from app.utils import logger, seed_admin
+from app.utils import (
+    logger,
+    seed_admin,
+    instrument_engine,
+    start_query_stats,
+    finish_request_profile,
+    ensure_booking_exclusion_constraint,
+    invalidation_bus,
+    shared_catalog,
+    admission_controller,
+    revocation_store,
+    reminder_dispatcher,
+    job_queue,
+    availability_broadcaster,
+    audit_trail
+)
 from app.routers import (
     auth_router, 
     space_router, 
     booking_router,
-    profile_router
+    profile_router,
+    admin_router,
+    payment_router
 )
 from app.models import *
 from app.background_tasks import scheduler, start_scheduler
+from uuid import uuid4
+import asyncio
 import time
 
 
+# Time every statement so slow queries and N+1 patterns show up per request
+instrument_engine(engine)
+
+
 # Create the FastAPI application
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
     logger.info("Starting up the application...")
     Base.metadata.create_all(bind=engine)  # Initialize database (create tables if they don't exist)
+    ensure_booking_exclusion_constraint(engine)
+    invalidation_bus.start(engine)
+    shared_catalog.start()
+    revocation_store.start()
+    reminder_dispatcher.start(engine)
+    availability_broadcaster.start(asyncio.get_running_loop())
+    audit_trail.start()
     start_scheduler()
+    await job_queue.start()
     # Seed the users
     seed_admin()  # Call the function to seed admin
     try:
         yield
     finally:
+        await job_queue.stop()
         scheduler.shutdown()
+        reminder_dispatcher.stop()
+        audit_trail.stop()
+        shared_catalog.stop()
+        invalidation_bus.stop()
         logger.info("Shutting down the application...")
 
 app = FastAPI(
@@ -57,6 +94,28 @@ app.include_router(auth_router, tags=["Authentication"])
 app.include_router(profile_router, tags=["Profile"])
 app.include_router(space_router, tags=["Spaces"])
 app.include_router(booking_router, tags=["Bookings"])
+app.include_router(admin_router, tags=["Admin"])
+app.include_router(payment_router, tags=["Payments"])
+
+# Shed load per route class so listings cannot starve bookings and payments.
+# Registered before log_requests, so shed requests are still logged.
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    if not admission_controller.enabled:
+        return await call_next(request)
+
+    route_class = admission_controller.route_class(request.method, request.url.path)
+    if not await route_class.acquire():
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry shortly"},
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        route_class.release()
+
 
 # Middleware to log route endpoints with client IP
 @app.middleware("http")
@@ -67,15 +126,30 @@ async def log_requests(request: Request, call_next):
     client_ip = request.headers.get("X-Forwarded-For") or request.headers.get("X-Real-IP") or request.client.host
     endpoint = request.url.path
     method = request.method
+    request_id = request.headers.get("X-Request-ID") or uuid4().hex
+    query_stats = start_query_stats(request_id)
     
-    logger.info(f"Request: {method} {endpoint} from {client_ip}")
+    logger.info(f"Request {request_id}: {method} {endpoint} from {client_ip}")
     
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        profile_id = finish_request_profile(request)
     duration = time.time() - start_time
     
     logger.info(
-        f"Response: {method} {endpoint} from {client_ip} returned {response.status_code} in {duration:.2f}s"
+        f"Response {request_id}: {method} {endpoint} from {client_ip} returned {response.status_code} in {duration:.2f}s "
+        f"({query_stats.count} queries, {query_stats.total_ms:.1f}ms in DB)"
     )
+    if query_stats.total_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        for query_duration, statement in query_stats.slowest:
+            logger.warning(f"Request {request_id} slowest query ({query_duration * 1000:.1f}ms): {statement}")
+
+    response.headers["X-Request-ID"] = request_id
+    response.headers["X-DB-Queries"] = str(query_stats.count)
+    response.headers["Server-Timing"] = query_stats.server_timing(duration)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
     return response
 
 
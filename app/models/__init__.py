@@ -1,3 +1,12 @@
 from .user import User
 from .booking import Booking
-from .space import Space
\ No newline at end of file
+from .space import Space
+from .cache_version import CacheVersion
+from .revoked_token import RevokedToken
+from .booking_reminder import BookingReminder
+from .job import Job
+from .payment_event import PaymentEvent
+from .receipt_document import ReceiptDocument
+from .calendar_feed_version import CalendarFeedVersion
+from .waitlist_entry import WaitlistEntry
+from .audit_log import AuditLog
\ No newline at end of file
@@ -0,0 +1,27 @@
+# app/models/audit_log.py
+
+from sqlalchemy import Column, Integer, String, UUID, DateTime, JSON, Index
+from datetime import datetime
+from app.database import Base
+
+
+class AuditLog(Base):
+    """SQLAlchemy model for one entry of the append-only audit trail."""
+
+    __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Admin queries filter on one of these and page by id, newest first
+        Index("ix_audit_logs_entity_type_entity_id_id", "entity_type", "entity_id", "id"),
+        Index("ix_audit_logs_actor_id_id", "actor_id", "id"),
+        Index("ix_audit_logs_action_id", "action", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Insertion order
+    at = Column(DateTime, default=datetime.now, nullable=False, index=True)  # When the action happened
+    actor_id = Column(UUID(as_uuid=True), nullable=True)  # None for background jobs
+    actor_name = Column(String, nullable=True)
+    action = Column(String, nullable=False)  # e.g. space.update, booking.delete
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(String, nullable=False)
+    changes = Column(JSON, nullable=True)  # {field: [old, new]}
+    request_id = Column(String, nullable=True)
@@ -1,7 +1,7 @@
 # app/models/booking.py
 
 from uuid import uuid4
-from sqlalchemy import Column, Integer, String, UUID, ForeignKey, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, UUID, ForeignKey, DateTime, Text, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -11,6 +11,15 @@ class Booking(Base):
     """SQLAlchemy model representing a booking reservation."""
 
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Range scans of upcoming bookings by status (reminders)
+        Index("ix_bookings_status_start_time", "status", "start_time"),
+        # Pending bookings by age (expiry, payment reconciliation)
+        Index("ix_bookings_status_created_at", "status", "created_at"),
+        # A space's or a user's bookings by start (conflict checks, calendar feeds)
+        Index("ix_bookings_space_id_start_time", "space_id", "start_time"),
+        Index("ix_bookings_user_id_start_time", "user_id", "start_time"),
+    )
 
     id = Column(UUID(as_uuid=True), default=uuid4, primary_key=True, index=True)
     receipt_id = Column(String, unique=True, nullable=True)  # Add this field
@@ -25,6 +34,6 @@ class Booking(Base):
     purpose = Column(Text, nullable=False)
     tx_ref = Column(String, nullable=True)
     transaction_id = Column(Integer, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(), nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
     user = relationship("User", back_populates="bookings")
     space = relationship("Space", back_populates="bookings")
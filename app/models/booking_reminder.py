@@ -0,0 +1,16 @@
+# app/models/booking_reminder.py
+
+from sqlalchemy import Column, UUID, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class BookingReminder(Base):
+    """SQLAlchemy model recording the reminder sent for a booking's start time."""
+
+    __tablename__ = "booking_reminders"
+
+    # No foreign key, so bookings can still be deleted; old rows are purged by a job
+    booking_id = Column(UUID(as_uuid=True), primary_key=True)
+    start_time = Column(DateTime, nullable=False, index=True)  # Rescheduled bookings are reminded again
+    sent_at = Column(DateTime, default=datetime.now, nullable=False)
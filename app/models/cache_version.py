@@ -0,0 +1,15 @@
+# app/models/cache_version.py
+
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class CacheVersion(Base):
+    """SQLAlchemy model holding the latest invalidation version of a cache key."""
+
+    __tablename__ = "cache_versions"
+
+    key = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
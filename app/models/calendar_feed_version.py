@@ -0,0 +1,18 @@
+# app/models/calendar_feed_version.py
+
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class CalendarFeedVersion(Base):
+    """
+    SQLAlchemy model holding the version of a calendar feed, bumped in the
+    transaction of every booking write the feed covers.
+    """
+
+    __tablename__ = "calendar_feed_versions"
+
+    key = Column(String, primary_key=True)  # space:{id} or user:{id}
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.now, nullable=False)
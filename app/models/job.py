@@ -0,0 +1,30 @@
+# app/models/job.py
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from datetime import datetime
+from app.database import Base
+
+
+class Job(Base):
+    """SQLAlchemy model for a background job in the durable job queue."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim scans: runnable jobs of a kind, oldest first
+        Index("ix_jobs_kind_status_run_at", "kind", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)  # Name of the registered handler
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(
+        String, default="queued", nullable=False
+    )  # Options: queued, running, done, dead
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, default=datetime.now, nullable=False)  # Not claimed before this
+    claimed_by = Column(String, nullable=True)  # Claim token of the worker running it
+    locked_until = Column(DateTime, nullable=True)  # A running job past this can be claimed again
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    finished_at = Column(DateTime, nullable=True, index=True)
@@ -0,0 +1,25 @@
+# app/models/payment_event.py
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Text
+from datetime import datetime
+from app.database import Base
+
+
+class PaymentEvent(Base):
+    """
+    SQLAlchemy model for a payment provider webhook delivery, stored as received.
+    Rows are only ever inserted; redeliveries are new rows.
+    """
+
+    __tablename__ = "payment_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    provider = Column(String, nullable=False)
+    event_type = Column(String, nullable=True)  # e.g. charge.completed
+    tx_ref = Column(String, nullable=True, index=True)
+    transaction_id = Column(BigInteger, nullable=True)  # Provider's transaction id
+    status = Column(String, nullable=True)  # Provider's charge status, e.g. successful
+    amount = Column(Float, nullable=True)
+    currency = Column(String, nullable=True)
+    body = Column(Text, nullable=False)  # Raw request body
+    received_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
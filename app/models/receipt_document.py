@@ -0,0 +1,23 @@
+# app/models/receipt_document.py
+
+from sqlalchemy import Column, UUID, String, DateTime, JSON
+from datetime import datetime
+from app.database import Base
+
+
+class ReceiptDocument(Base):
+    """
+    SQLAlchemy model for a booking's rendered receipt. The HTML and PDF live
+    on disk under RECEIPT_DIR, named by the SHA-256 of their content.
+    """
+
+    __tablename__ = "receipt_documents"
+
+    # No foreign key, so bookings can still be deleted; orphans are purged by a job
+    booking_id = Column(UUID(as_uuid=True), primary_key=True)
+    receipt_id = Column(String, nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # Of the data and renderer version; unchanged means no re-render
+    data = Column(JSON, nullable=False)  # The receipt as served by GET /bookings/{id}/receipt
+    html_digest = Column(String(64), nullable=False)
+    pdf_digest = Column(String(64), nullable=False)
+    rendered_at = Column(DateTime, default=datetime.now, nullable=False)
@@ -0,0 +1,16 @@
+# app/models/revoked_token.py
+
+from sqlalchemy import Column, String, Integer, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """SQLAlchemy model for a revoked refresh token, session or per-user token cutoff."""
+
+    __tablename__ = "revoked_tokens"
+
+    key = Column(String, primary_key=True)  # "jti:<id>", "sid:<id>" or "user:<username>"
+    issued_before = Column(Integer, nullable=True)  # User cutoff: tokens issued earlier are revoked
+    expires_at = Column(DateTime, nullable=False, index=True)  # When the entry can be dropped
+    created_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
@@ -0,0 +1,27 @@
+# app/models/waitlist_entry.py
+
+from uuid import uuid4
+from sqlalchemy import Column, UUID, String, ForeignKey, DateTime, Text, Index
+from datetime import datetime
+from app.database import Base
+
+
+class WaitlistEntry(Base):
+    """SQLAlchemy model representing a user waiting for a taken slot of a space."""
+
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        # A space's entries by start, so the entries a freed interval can serve are one range scan
+        Index("ix_waitlist_entries_space_id_start_time", "space_id", "start_time"),
+    )
+
+    id = Column(UUID(as_uuid=True), default=uuid4, primary_key=True, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    space_id = Column(UUID(as_uuid=True), ForeignKey("spaces.id"), nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    purpose = Column(Text, nullable=False)
+    status = Column(String, default="waiting", nullable=False)  # Options: waiting, promoted
+    booking_id = Column(UUID(as_uuid=True), nullable=True)  # The pending booking it was promoted to
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    promoted_at = Column(DateTime, nullable=True)
@@ -1,4 +1,6 @@
 from .auth import auth_router
 from .space import space_router
 from .booking import booking_router
-from .profile import profile_router
\ No newline at end of file
+from .profile import profile_router
+from .admin import admin_router
+from .payment import payment_router
@@ -0,0 +1,136 @@
+# app/routers/admin.py
+
+import os
+import re
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import AuditLog, Job, User
+from app.utils import admin_required, profile_path, collect_metrics, job_queue, audit_trail
+
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(admin_required)])
+
+
+@admin_router.get("/profiles/{profile_id}", response_class=FileResponse)
+async def get_profile_file(profile_id: str):
+    """
+    Download a stored request profile as collapsed stacks. Admin only.
+    """
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    path = profile_path(profile_id)
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+
+@admin_router.get("/metrics")
+async def get_metrics():
+    """
+    Counters of this worker's performance components. Admin only.
+    """
+    return collect_metrics()
+
+
+@admin_router.get("/jobs")
+async def list_jobs(
+    job_status: Literal["queued", "running", "done", "dead"] = Query("dead", alias="status"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Background jobs by status, most recent first (dead-lettered by default). Admin only.
+    """
+    jobs = db.query(Job).filter(Job.status == job_status).order_by(Job.id.desc()).limit(limit).all()
+    return [
+        {
+            "id": job.id,
+            "kind": job.kind,
+            "payload": job.payload,
+            "status": job.status,
+            "attempts": job.attempts,
+            "run_at": job.run_at,
+            "last_error": job.last_error,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+        for job in jobs
+    ]
+
+
+@admin_router.post("/jobs/{job_id}/retry")
+async def retry_job(
+    job_id: int,
+    current_user: User = Depends(admin_required),
+    db: Session = Depends(get_db),
+):
+    """
+    Requeue a dead-lettered job with a fresh set of attempts. Admin only.
+    """
+    if not job_queue.requeue(db, job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Dead-lettered job not found"
+        )
+    job_queue.notify()
+    audit_trail.record(current_user, "job.retry", "job", job_id)
+    return {"detail": f"Job {job_id} requeued"}
+
+
+@admin_router.get("/audit")
+async def list_audit_logs(
+    actor_id: UUID | None = None,
+    action: str | None = None,
+    entity_type: str | None = None,
+    entity_id: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    before_id: int | None = Query(None, description="`next_before_id` of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Audit trail entries, most recent first, filtered by actor, action or
+    entity. Pages by id, so deep pages cost the same as the first. Entries
+    appear a few seconds after the action. Admin only.
+    """
+    query = db.query(AuditLog)
+    if actor_id:
+        query = query.filter(AuditLog.actor_id == actor_id)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if entity_type:
+        query = query.filter(AuditLog.entity_type == entity_type)
+    if entity_id:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if since:
+        query = query.filter(AuditLog.at >= since)
+    if until:
+        query = query.filter(AuditLog.at < until)
+    if before_id:
+        query = query.filter(AuditLog.id < before_id)
+    entries = query.order_by(AuditLog.id.desc()).limit(limit).all()
+    return {
+        "data": [
+            {
+                "id": entry.id,
+                "at": entry.at,
+                "actor_id": entry.actor_id,
+                "actor_name": entry.actor_name,
+                "action": entry.action,
+                "entity_type": entry.entity_type,
+                "entity_id": entry.entity_id,
+                "changes": entry.changes,
+                "request_id": entry.request_id,
+            }
+            for entry in entries
+        ],
+        "next_before_id": entries[-1].id if len(entries) == limit else None,
+    }
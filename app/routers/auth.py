@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from uuid import uuid4
 from app.schemas.auth import (
     UserCreate,
     UserLogin,
@@ -21,19 +22,71 @@ from app.utils import (
     create_refresh_token,
     verify_refresh_token,
     get_current_user,
+    rate_limiter,
+    login_guard,
+    client_ip,
+    check_auth_attempt,
+    revocation_store,
     REFRESH_TOKEN_EXPIRE_DAYS
 )
 from app.database import get_db
 from app.config import settings
 
-MAX_FAILED_ATTEMPTS = 5
-LOCKOUT_DURATION = timedelta(minutes=5)
+MAX_FAILED_ATTEMPTS = settings.LOGIN_MAX_FAILED_ATTEMPTS
+LOCKOUT_DURATION = timedelta(minutes=settings.LOGIN_LOCKOUT_MINUTES)
 
 auth_router = APIRouter(prefix="/auth")
 
+
+def issue_session_tokens(response: Response, username: str, session_id: str | None = None) -> str:
+    """
+    Set a new refresh token cookie for the session (a new one if `session_id`
+    is None) and return a matching access token.
+    """
+    session_id = session_id or uuid4().hex
+    refresh_token = create_refresh_token(data={"sub": username, "sid": session_id})
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,  # Prevent JavaScript access (XSS protection)
+        secure=False if settings.DEBUG else True,    # Use HTTPS only (production best practice)
+        samesite="None",  # Prevent CSRF (adjust as needed)
+        max_age=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,  # Expiry in seconds
+    )
+    return create_access_token(data={"sub": username, "sid": session_id})
+
+
+def ensure_not_locked(db_user: User, now: datetime):
+    """
+    Honor lockouts persisted by any worker (or before a restart).
+    """
+    if (
+        db_user.failed_login_attempts >= MAX_FAILED_ATTEMPTS
+        and db_user.last_login
+        and now - db_user.last_login <= LOCKOUT_DURATION
+    ):
+        logger.warning(f"Account locked due to multiple failed login attempts: {db_user.email}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account locked. Try again later.",
+        )
+
+
+def record_failed_login(db: Session, db_user: User, now: datetime):
+    """
+    Count a failed password in memory; the row is written only when it locks the account.
+    """
+    if login_guard.record_failure(db_user.email):
+        db_user.failed_login_attempts = MAX_FAILED_ATTEMPTS
+        db_user.last_login = now  # Start of the lockout
+        db.commit()
+        logger.warning(f"Account locked due to multiple failed login attempts: {db_user.email}")
+    logger.warning(f"Failed login attempt for email: {db_user.email}")
+
 # Register route to create a new user account
 @auth_router.post("/register", response_model=RegisterResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, request: Request, db: Session = Depends(get_db)):
+    rate_limiter.hit("register_ip", client_ip(request))
     db_user = db.query(User).filter(User.email == user.email).first()
     if db_user:
         logger.warning(f"Attempt to register with an existing email: {user.email}")
@@ -74,9 +127,13 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
 @auth_router.post("/user/login", response_model=LoginResponse)
 async def user_login(
     user: UserLogin, 
+    request: Request,
     response: Response,
     db: Session = Depends(get_db)
     ):
+    # Rejects floods and locked accounts before any query or bcrypt work
+    check_auth_attempt(request, user.email)
+
     db_user = db.query(User).filter(User.email == user.email).first()
 
     if not db_user or not db_user.is_active:
@@ -85,50 +142,24 @@ async def user_login(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
         )
 
-    # Check if the user is locked out
     now = datetime.now()
-    if db_user.failed_login_attempts >= MAX_FAILED_ATTEMPTS:
-        time_since_last_login = now - db_user.last_login
-
-        # Reset failed attempts if lockout duration has passed
-        if time_since_last_login > LOCKOUT_DURATION:
-            db_user.failed_login_attempts = 0
-            db.commit()
-        else:
-            logger.warning(f"Account locked due to multiple failed login attempts: {user.email}")
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Account locked. Try again later.",
-            )
+    ensure_not_locked(db_user, now)
 
-    logger.info(f"{user.password}, {db_user.password}")
     # Verify the password
     if not verify_password(user.password, db_user.password):
-        db_user.failed_login_attempts += 1
-        db_user.last_login = now  # Update last login to track failed attempts timing
-        db.commit()
-        logger.warning(f"Failed login attempt for email: {user.email}")
+        record_failed_login(db, db_user, now)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
         )
 
     # Reset failed login attempts after successful login
+    login_guard.reset(user.email)
     db_user.failed_login_attempts = 0
     db_user.last_login = now
     db.commit()
 
-    # Generate tokens
-    access_token = create_access_token(data={"sub": db_user.username})
-    refresh_token = create_refresh_token(data={"sub": db_user.username})
-
-    response.set_cookie(
-        key="refresh_token",
-        value=refresh_token,
-        httponly=True,  # Prevent JavaScript access (XSS protection)
-        secure=False if settings.DEBUG else True,    # Use HTTPS only (production best practice)
-        samesite="None",  # Prevent CSRF (adjust as needed)
-        max_age=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,  # Expiry in seconds
-    )
+    # Generate tokens for a new session
+    access_token = issue_session_tokens(response, db_user.username)
 
     logger.info(f"User '{db_user.id}' logged in successfully.")
     return {
@@ -142,7 +173,12 @@ async def user_login(
 
 # Token refresh route
 @auth_router.post("/refresh-token", response_model=RefreshResponse)
-async def get_refresh_token(request: Request, response: Response, db: Session = Depends(get_db)):
+async def get_refresh_token(request: Request, response: Response):
+    """
+    Rotate the refresh token and issue a new access token. Each refresh token
+    works once, enforced by a single insert of its jti; presenting a used one
+    revokes its whole session.
+    """
     # Extract refresh token from cookies
     refresh_token = request.cookies.get("refresh_token")
 
@@ -154,24 +190,53 @@ async def get_refresh_token(request: Request, response: Response, db: Session =
     # Verify refresh token
     payload = verify_refresh_token(refresh_token)
     username: str = payload.get("sub")
-    
-    if not username:
+    jti, session_id = payload.get("jti"), payload.get("sid")
+
+    if not username or not jti or not session_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token payload"
         )
 
-    # Fetch user from database
-    db_user = db.query(User).filter(User.username == username).first()
-    if not db_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    # Retire this token. If it was already used it has been copied, so end the session
+    expires_at = datetime.fromtimestamp(payload["exp"])
+    if revocation_store.is_revoked(payload) or not revocation_store.use_refresh_token(jti, expires_at):
+        if not revocation_store.contains("sid", session_id):
+            revocation_store.revoke("sid", session_id, expires_at)
+            logger.warning(f"Refresh token reuse detected for user '{username}', session revoked.")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked"
+        )
 
-    # Generate new access token
-    access_token = create_access_token(data={"sub": username})
+    # Generate new access token, rotating the refresh token within the session
+    access_token = issue_session_tokens(response, username, session_id)
 
     # Return new access token in response
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+# Logout route revoking the session of the refresh token cookie
+@auth_router.post("/logout", response_model=DetailResponse)
+async def logout(request: Request, response: Response):
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        try:
+            payload = verify_refresh_token(refresh_token)
+        except HTTPException:
+            payload = None  # Expired or invalid: nothing left to revoke
+        if payload and payload.get("sid"):
+            # Revokes the refresh token and every access token of the session
+            revocation_store.revoke("sid", payload["sid"], datetime.fromtimestamp(payload["exp"]))
+            logger.info(f"User '{payload.get('sub')}' logged out.")
+
+    response.delete_cookie(
+        key="refresh_token",
+        httponly=True,
+        secure=False if settings.DEBUG else True,
+        samesite="None",
+    )
+    return {"detail": "Logged out successfully"}
+
+
 # Protected route for testing
 @auth_router.get("/protected-route", response_model=DetailResponse)
 async def protected_route(current_user: User = Depends(get_current_user)):
@@ -181,31 +246,32 @@ async def protected_route(current_user: User = Depends(get_current_user)):
 # Login route for user authentication and token generation
 @auth_router.post("/login", include_in_schema=False)
 async def login_for_oauth_form(
+    request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: Session = Depends(get_db)
 ):
+    check_auth_attempt(request, form_data.username)
     db_user = db.query(User).filter(User.email == form_data.username).first()
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
+        )
 
-    if not db_user or not verify_password(form_data.password, db_user.password):
+    now = datetime.now()
+    ensure_not_locked(db_user, now)
+    if not verify_password(form_data.password, db_user.password):
+        record_failed_login(db, db_user, now)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
         )
 
-    db_user.last_login = datetime.now()
+    login_guard.reset(db_user.email)
+    db_user.failed_login_attempts = 0
+    db_user.last_login = now
     db.commit()
     # Create and return the JWT access token
-    access_token = create_access_token(data={"sub": db_user.username})
-    refresh_token = create_refresh_token(data={"sub": db_user.username})
-
-    response.set_cookie(
-        key="refresh_token",
-        value=refresh_token,
-        httponly=True,  # Prevent JavaScript access (XSS protection)
-        secure=False if settings.DEBUG else True,    # Use HTTPS only (production best practice)
-        samesite="None",  # Prevent CSRF (adjust as needed)
-        max_age=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,  # Expiry in seconds
-    )
+    access_token = issue_session_tokens(response, db_user.username)
     return {
         "access_token": access_token,
         "token_type": "bearer"
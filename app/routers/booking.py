@@ -1,36 +1,257 @@
 # app/routers/booking.py
 
-from fastapi import HTTPException, Query, APIRouter, status, Depends
+from fastapi import HTTPException, Query, APIRouter, status, Depends, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from typing import Literal
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm import Session
-from app.models import Booking, Space, User
+from app.models import Booking, Space, User, ReceiptDocument, WaitlistEntry
 from app.utils import (
     logger, 
     get_current_user, 
     admin_required, 
+    profile_request,
     create_random_key, 
-    generate_and_store_receipt_id
+    job_queue,
+    notify_booking_event,
+    queue_receipt_render,
+    queue_waitlist_promotion,
+    audit_trail,
+    audit_changes,
+    receipt_data,
+    receipt_file,
+    RECEIPT_FORMATS,
+    IMMUTABLE_CACHE_CONTROL,
+    feed_validators,
+    user_calendar,
+    user_feed_token,
+    verify_user_feed_token,
+    availability_broadcaster,
+    lock_space_for_booking,
+    find_conflicting_booking,
+    price_interval,
+    json_response,
+    dump_json,
+    PydanticJSONResponse,
+    SingleFlight,
+    VersionedCache,
+    invalidation_bus,
+    shared_catalog,
+    booking_list_adapter,
+    all_bookings_adapter,
+    taken_bookings_adapter
     )
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.schemas import (
     BookingUpdate,
     BookingCreate,
     BookingResponse,
-    AdminBookingResponse,
     TakenBookingResponse,
     DetailResponse,
     PaymentResponse,
     ConfirmPayment,
     BookingConfirmationResponse,
     ReceiptResponse,
-    AllBookingResponse
+    AllBookingResponse,
+    CalendarFeedResponse,
+    WaitlistCreate,
+    WaitlistEntryResponse
 )
 
 booking_router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+# Busy slots drop out as they end, so entries also expire on their own
+availability_cache = VersionedCache("availability", invalidation_bus, max_age=60)
+
+
+def availability_key(space_id: UUID) -> str:
+    return f"availability:{space_id}"
+
+
+def publish_availability_change(space_id: UUID):
+    """
+    Invalidate the space's busy slots in every worker.
+    """
+    invalidation_bus.publish(availability_key(space_id))
+
+
+def admin_booking_rows(rows) -> list[dict]:
+    """
+    Map (Booking, username, space_name) rows to AdminBookingResponse fields.
+    Selecting the names in the query avoids lazy-loading user and space per row.
+    """
+    return [
+        {
+            "id": booking.id,
+            "receipt_id": booking.receipt_id,
+            "user_id": booking.user_id,
+            "username": username,
+            "space_id": booking.space_id,
+            "space_name": space_name,
+            "start_time": booking.start_time,
+            "end_time": booking.end_time,
+            "status": booking.status,
+            "total_cost": booking.total_cost,
+            "purpose": booking.purpose,
+            "tx_ref": booking.tx_ref,
+            "transaction_id": booking.transaction_id,
+            "created_at": booking.created_at,
+        }
+        for booking, username, space_name in rows
+    ]
+
+
+@booking_router.get("/calendar", response_model=CalendarFeedResponse)
+async def get_calendar_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    URL of the current user's bookings as an iCalendar feed, for calendar apps to subscribe to.
+    """
+    url = request.url_for("get_user_calendar", user_id=current_user.id).include_query_params(
+        token=user_feed_token(current_user.id)
+    )
+    return {"url": str(url)}
+
+
+@booking_router.get("/calendar/{user_id}.ics")
+async def get_user_calendar(
+    user_id: UUID,
+    request: Request,
+    token: str = Query(..., description="Token from GET /bookings/calendar"),
+    db: Session = Depends(get_db),
+):
+    """
+    A user's bookings as an iCalendar feed, streamed from the database.
+    Answered with 304 while none of the user's bookings has changed.
+    """
+    if not verify_user_feed_token(user_id, token):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Calendar not found"
+        )
+    not_modified, headers = await feed_validators(request, f"user:{user_id}", private=True)
+    if not_modified:
+        return not_modified
+
+    user = db.query(User.is_active, User.is_deleted).filter(User.id == user_id).first()
+    if not user or not user.is_active or user.is_deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Calendar not found"
+        )
+    return StreamingResponse(
+        user_calendar(user_id),
+        media_type="text/calendar; charset=utf-8",
+        headers={**headers, "Content-Disposition": 'inline; filename="bookings.ics"'},
+    )
+
+
+@booking_router.post(
+    "/waitlist", status_code=status.HTTP_201_CREATED, response_model=WaitlistEntryResponse
+)
+async def join_waitlist(
+    entry: WaitlistCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Wait for a taken slot. Should the overlapping bookings be deleted,
+    canceled or expire, the slot is booked for the user as a pending
+    booking, in the order users joined.
+    """
+    if entry.start_time <= datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only upcoming slots can be waited for",
+        )
+    if not db.query(Space.id).filter(Space.id == entry.space_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Space not found"
+        )
+    if not find_conflicting_booking(db, entry.space_id, entry.start_time, entry.end_time):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The space is free for this time; book it instead",
+        )
+
+    waiting = db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.status == "waiting",
+        WaitlistEntry.start_time > datetime.now(),
+    ).all()
+    if any(
+        (existing.space_id, existing.start_time, existing.end_time)
+        == (entry.space_id, entry.start_time, entry.end_time)
+        for existing in waiting
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You are already waiting for this slot",
+        )
+    if len(waiting) >= settings.WAITLIST_MAX_ENTRIES_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"You can wait for at most {settings.WAITLIST_MAX_ENTRIES_PER_USER} slots at once",
+        )
+
+    try:
+        new_entry = WaitlistEntry(**entry.model_dump(), user_id=current_user.id)
+        db.add(new_entry)
+        db.commit()
+        db.refresh(new_entry)
+        return new_entry
+    except SQLAlchemyError as e:
+        logger.error(f"Failed to join waitlist for user {current_user.id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
+@booking_router.get("/waitlist", response_model=list[WaitlistEntryResponse])
+async def get_waitlist(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    The current user's upcoming waitlist entries, waiting or promoted.
+    """
+    return db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == current_user.id,
+        WaitlistEntry.start_time > datetime.now(),
+    ).order_by(WaitlistEntry.start_time).all()
+
+
+@booking_router.delete("/waitlist/{entry_id}", response_model=DetailResponse)
+async def leave_waitlist(
+    entry_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Stop waiting for a slot. A promoted entry's booking is left as it is.
+    """
+    entry = db.query(WaitlistEntry).filter(
+        WaitlistEntry.id == entry_id, WaitlistEntry.user_id == current_user.id
+    ).first()
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Waitlist entry not found"
+        )
+    try:
+        db.delete(entry)
+        db.commit()
+        return {"detail": "Left the waitlist successfully"}
+    except SQLAlchemyError as e:
+        logger.error(f"Error deleting waitlist entry {entry_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
 
 @booking_router.get("/search", response_model=list[BookingResponse])
 async def search_bookings(
@@ -54,7 +275,7 @@ async def search_bookings(
             .filter(Booking.user_id == current_user.id)
             .all()
         )
-        return bookings
+        return json_response(booking_list_adapter, bookings)
     except Exception as e:
         logger.error(f"Error searching bookings: {e}")
         raise HTTPException(
@@ -85,7 +306,7 @@ async def get_all_bookings(
         current_page = (skip // limit) + 1
 
         bookings = (
-            db.query(Booking)
+            db.query(Booking, User.username, Space.name)
             .join(Space, Booking.space_id == Space.id)
             .join(User, Booking.user_id == User.id)
             .filter(Booking.user_id == current_user.id)
@@ -107,26 +328,8 @@ async def get_all_bookings(
             f"{base_url}?skip={prev_skip}&limit={limit}" if skip > 0 else None
         )
 
-        return {
-            "data": [
-                AdminBookingResponse(
-                    id=booking.id,
-                    receipt_id=booking.receipt_id,
-                    user_id=booking.user_id,
-                    username=booking.user.username,
-                    space_id=booking.space_id,
-                    space_name=booking.space.name,
-                    start_time=booking.start_time,
-                    end_time=booking.end_time,
-                    status=booking.status,
-                    total_cost=booking.total_cost,
-                    purpose=booking.purpose,
-                    tx_ref=booking.tx_ref,
-                    transaction_id=booking.transaction_id,
-                    created_at=booking.created_at,
-                ).model_dump()
-                for booking in bookings
-            ],
+        return json_response(all_bookings_adapter, {
+            "data": admin_booking_rows(bookings),
             "pagination": {
                 "current_page": current_page,
                 "next_page": current_page + 1 if next_skip < total_records else None,
@@ -136,7 +339,7 @@ async def get_all_bookings(
                 "next_request": next_request,
                 "prev_request": prev_request,
             },
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching bookings: {e}")
         raise HTTPException(
@@ -159,24 +362,30 @@ async def create_booking(
     Requires authentication.
     """
     try:
-        # Check for booking conflicts
-        check_booking = (
-            db.query(Booking)
-            .filter(
-                (Booking.start_time < booking.end_time)
-                & (Booking.end_time > booking.start_time)
+        # Hold the space's booking lock until commit so concurrent requests
+        # cannot both pass the conflict check
+        lock_space_for_booking(db, booking.space_id)
+
+        space = db.query(Space).filter(Space.id == booking.space_id).first()
+        if not space:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Space not found"
             )
-            .first()
+
+        # Check for booking conflicts
+        check_booking = find_conflicting_booking(
+            db, booking.space_id, booking.start_time, booking.end_time
         )
 
         if check_booking:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Booking conflict: Existing booking from {check_booking.start_time} to {check_booking.end_time}",
             )
 
-        rate = db.query(Space).filter(Space.id == booking.space_id).first().hourly_rate
-        total_cost = (booking.end_time - booking.start_time).seconds // 3600 * rate
+        # Same rules as POST /spaces/quote
+        total_cost = price_interval(space.hourly_rate, booking.start_time, booking.end_time).total_cost
 
         # Create the booking
         new_booking = Booking(
@@ -185,8 +394,16 @@ async def create_booking(
         db.add(new_booking)
         db.commit()
         db.refresh(new_booking)
+        publish_availability_change(new_booking.space_id)
         return new_booking
 
+    except IntegrityError:
+        # Raised by the overlap exclusion constraint
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booking conflict: The space is already booked for this time",
+        )
     except SQLAlchemyError as e:
         logger.error(f"Failed to create booking for user {current_user.id}: {e}")
         raise HTTPException(
@@ -234,13 +451,56 @@ async def update_booking(
             detail="You do not have permission to update this booking.",
         )
 
-    for key, value in update_data.model_dump(exclude_unset=True).items():
-        setattr(booking, key, value)
+    changes = update_data.model_dump(exclude_unset=True)
+    start_time = changes.get("start_time", booking.start_time)
+    end_time = changes.get("end_time", booking.end_time)
+    new_status = changes.get("status", booking.status)
+    if start_time >= end_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End time must be greater than start time",
+        )
 
     try:
+        # Re-check conflicts when the booking moves or stops being canceled
+        reclaims_slot = booking.status == "canceled" and new_status != "canceled"
+        moves = start_time != booking.start_time or end_time != booking.end_time
+        if new_status != "canceled" and (moves or reclaims_slot):
+            lock_space_for_booking(db, booking.space_id)
+            check_booking = find_conflicting_booking(
+                db, booking.space_id, start_time, end_time, exclude_booking_id=booking.id
+            )
+            if check_booking:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Booking conflict: Existing booking from {check_booking.start_time} to {check_booking.end_time}",
+                )
+
+        # Unpaid bookings are repriced when moved; paid ones keep their price
+        reprice = moves and booking.status == "pending"
+        if booking.status != "canceled" and (moves or new_status == "canceled"):
+            queue_waitlist_promotion(db, booking.space_id, booking.start_time, booking.end_time)
+        before = {key: getattr(booking, key) for key in (*changes, "total_cost")}
+        for key, value in changes.items():
+            setattr(booking, key, value)
+        if reprice:
+            booking.total_cost = price_interval(booking.space.hourly_rate, start_time, end_time).total_cost
+        queue_receipt_render(db, booking)
         db.commit()
+        job_queue.notify()
         db.refresh(booking)
+        publish_availability_change(booking.space_id)
+        audit_trail.record(current_user, "booking.update", "booking", booking.id, audit_changes(
+            before, {key: getattr(booking, key) for key in before}
+        ))
         return booking
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booking conflict: The space is already booked for this time",
+        )
     except SQLAlchemyError as e:
         logger.error(f"Error updating booking {booking_id}: {e}")
         raise HTTPException(
@@ -269,8 +529,16 @@ async def delete_booking(
         )
 
     try:
+        space_id = booking.space_id
+        before = {key: getattr(booking, key) for key in ("user_id", "space_id", "start_time", "end_time", "status")}
+        if booking.status != "canceled":
+            notify_booking_event(db, booking, "canceled")
+            queue_waitlist_promotion(db, space_id, booking.start_time, booking.end_time)
         db.delete(booking)
         db.commit()
+        job_queue.notify()
+        publish_availability_change(space_id)
+        audit_trail.record(current_user, "booking.delete", "booking", booking_id, audit_changes(before, dict.fromkeys(before)))
         return {"detail": "Booking deleted successfully"}
     except SQLAlchemyError as e:
         logger.error(f"Error deleting booking {booking_id}: {e}")
@@ -305,10 +573,38 @@ async def update_booking_status(
         )
 
     try:
-        booking.status = status_sent
+        if booking.status == "canceled" and status_sent != "canceled":
+            lock_space_for_booking(db, booking.space_id)
+            check_booking = find_conflicting_booking(
+                db, booking.space_id, booking.start_time, booking.end_time, exclude_booking_id=booking.id
+            )
+            if check_booking:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Booking conflict: Existing booking from {check_booking.start_time} to {check_booking.end_time}",
+                )
+
+        previous_status = booking.status
+        if booking.status != status_sent:
+            if status_sent == "canceled":
+                queue_waitlist_promotion(db, booking.space_id, booking.start_time, booking.end_time)
+            booking.status = status_sent
+            notify_booking_event(db, booking, "canceled" if status_sent == "canceled" else "status")
+            queue_receipt_render(db, booking)
         db.commit()
+        job_queue.notify()
         db.refresh(booking)
+        publish_availability_change(booking.space_id)
+        if previous_status != status_sent:
+            audit_trail.record(current_user, "booking.status", "booking", booking.id, {"status": [previous_status, status_sent]})
         return booking
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booking conflict: The space is already booked for this time",
+        )
     except SQLAlchemyError as e:
         logger.error(f"Error updating booking status: {e}")
         raise HTTPException(
@@ -317,26 +613,66 @@ async def update_booking_status(
         )
 
 
-@booking_router.get("/taken/{space_id}", response_model=list[TakenBookingResponse])
-async def get_taken_bookings(
-    space_id: UUID,
-    db: Session = Depends(get_db),
-):
+taken_bookings_flight = SingleFlight("taken_bookings")
+
+
+def load_taken_bookings(space_id: UUID) -> bytes:
     """
-    Fetch all taken bookings.
+    Serialized busy slots of a space. Runs in the threadpool with its own
+    session so concurrent requests can share one query.
     """
+    db = SessionLocal()
     try:
-        query = db.query(Booking).filter(
+        bookings = db.query(Booking.start_time, Booking.end_time).filter(
             Booking.end_time >= datetime.now(),
-            Booking.space_id == space_id
+            Booking.space_id == space_id,
+            Booking.status != "canceled",
+        ).all()
+        # Rows only carry the two columns the response needs
+        return dump_json(taken_bookings_adapter, bookings)
+    finally:
+        db.close()
+
+
+@booking_router.get("/availability/stream")
+async def stream_availability(
+    space_id: list[UUID] = Query(..., description="Spaces to follow; repeat the parameter for several"),
+):
+    """
+    Live busy slots of the given spaces as Server-Sent Events.
+    A `snapshot` event per space is followed by `changes` events as bookings
+    are created, confirmed, canceled, moved or expire. Slots carry their
+    booking ID, so clients replace them by ID.
+    """
+    space_ids = list(dict.fromkeys(str(value) for value in space_id))
+    if len(space_ids) > settings.AVAILABILITY_STREAM_MAX_SPACES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.AVAILABILITY_STREAM_MAX_SPACES} spaces can be followed at once",
         )
-        bookings = query.all()
+    if availability_broadcaster.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    return StreamingResponse(
+        availability_broadcaster.stream(space_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # No proxy buffering
+    )
+
 
-        # Response formatting
-        return [
-            {"start_time": booking.start_time, "end_time": booking.end_time}
-            for booking in bookings
-        ]
+@booking_router.get("/taken/{space_id}", response_model=list[TakenBookingResponse])
+async def get_taken_bookings(space_id: UUID):
+    """
+    Fetch all taken bookings.
+    """
+    try:
+        content = shared_catalog.taken_json(space_id) or await availability_cache.get_or_load(
+            availability_key(space_id), load_taken_bookings, space_id, flight=taken_bookings_flight
+        )
+        return PydanticJSONResponse(content=content)
     except HTTPException as http_exc:
         # Re-raise HTTP exceptions as-is
         raise http_exc
@@ -379,7 +715,7 @@ async def pay_booking(
     return {
         "tx_ref": booking.tx_ref,
         "amount": booking.total_cost,
-        "currency": "NGN",
+        "currency": settings.PAYMENT_CURRENCY,
         "customer": {
             "email": current_user.email, 
             "name": current_user.username,
@@ -399,7 +735,7 @@ async def confirm_booking_payment(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Confirm a booking payment and generate a receipt ID.
+    Confirm a booking payment. The receipt ID is generated in the background.
     """
     try:
         # Fetch and validate the booking
@@ -431,11 +767,16 @@ async def confirm_booking_payment(
         booking.status = "confirmed"
         booking.transaction_id = confirmation.transaction_id
 
-        # Generate and store the receipt ID
-        generate_and_store_receipt_id(db, booking)
+        # Receipt generation commits with the confirmation but runs after the response
+        job_queue.enqueue(db, "assign_receipt", {"booking_id": str(booking.id)})
+        notify_booking_event(db, booking, "confirmed")
 
         db.commit()
-        db.refresh(booking)
+        job_queue.notify()
+        publish_availability_change(booking.space_id)  # Lets the reminder dispatcher pick it up
+        audit_trail.record(current_user, "booking.confirm", "booking", booking.id, {
+            "status": ["pending", "confirmed"], "transaction_id": [None, booking.transaction_id],
+        })
 
         logger.info(f"Booking (ID: {booking_id}) confirmed with transaction ID: {confirmation.transaction_id}")
 
@@ -444,7 +785,6 @@ async def confirm_booking_payment(
             "booking_id": booking.id,
             "status": booking.status,
             "transaction_id": booking.transaction_id,
-            "receipt_id": booking.receipt_id,  # Include the receipt ID in the response
         }
 
     except HTTPException as http_exc:
@@ -466,6 +806,11 @@ async def get_booking_receipt(
     Fetch booking details for the receipt page.
     """
     try:
+        # Rendered when the receipt ID was assigned; one primary key lookup
+        document = owned_receipt_document(db, booking_id, current_user)
+        if document:
+            return document.data
+
         # Fetch the booking with user and space details
         booking = db.query(Booking).filter(
             Booking.id == booking_id,
@@ -478,38 +823,14 @@ async def get_booking_receipt(
                 detail=f"Booking with ID: {booking_id} not found",
             )
 
-        # Calculate duration
-        duration = booking.end_time - booking.start_time
-        duration_hours = duration.total_seconds() / 3600
-
-        # Format the response
-        response = {
-            "receipt_no": booking.receipt_id,
-            "company_name": "ReserveMe.com",
-            "user": {
-                "name": booking.user.username,
-                "email": booking.user.email,
-                "phone_number": booking.user.phone_number,
-            },
-            "space": {
-                "name": booking.space.name,
-                "location": booking.space.location,  # Assuming Space has an 'location' field
-            },
-            "booking": {
-                "date": booking.start_time.strftime("%B %d, %Y"),  # Format: January 15, 2024
-                "time": f"{booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}",  # Format: 10:00 AM - 12:00 PM
-                "duration": f"{duration_hours} hours",  # Format: 2 hours
-                "purpose": booking.purpose,
-            },
-            "payment": {
-                "amount": booking.total_cost,
-                "status": booking.status,
-                "transaction_id": booking.transaction_id,
-                "payment_date": booking.created_at.strftime("%B %d, %Y %I:%M %p"),  # Format: January 15, 2024 10:05 AM
-            }
-        }
+        if not booking.receipt_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Receipt not available yet",
+            )
 
-        return response
+        # Receipt ID assigned, rendering still queued
+        return receipt_data(booking)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -520,7 +841,81 @@ async def get_booking_receipt(
             detail="Internal Server Error",
         )
 
-@booking_router.get("/admin/all", response_model=AllBookingResponse)
+
+def owned_receipt_document(db: Session, booking_id: UUID, user: User) -> ReceiptDocument | None:
+    return db.query(ReceiptDocument).join(Booking, Booking.id == ReceiptDocument.booking_id).filter(
+        ReceiptDocument.booking_id == booking_id,
+        Booking.user_id == user.id,
+    ).first()
+
+
+@booking_router.get("/{booking_id}/receipt/download")
+async def download_booking_receipt(
+    booking_id: UUID,
+    request: Request,
+    format: Literal["pdf", "html"] = Query("pdf", description="Document format"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Redirect to the current receipt document, whose URL changes whenever the receipt does.
+    """
+    document = owned_receipt_document(db, booking_id, current_user)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not available yet",
+        )
+    digest = document.pdf_digest if format == "pdf" else document.html_digest
+    return RedirectResponse(
+        str(request.url_for("get_receipt_file", booking_id=booking_id, file_name=f"{digest}.{format}")),
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={"Cache-Control": "private, no-cache"},
+    )
+
+
+@booking_router.get("/{booking_id}/receipt/{file_name}")
+async def get_receipt_file(
+    booking_id: UUID,
+    file_name: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Serve a rendered receipt from disk. File names are content hashes, so
+    responses are cacheable for good; a superseded name redirects to the current one.
+    """
+    digest, _, fmt = file_name.partition(".")
+    document = owned_receipt_document(db, booking_id, current_user)
+    if not document or fmt not in RECEIPT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not found",
+        )
+
+    current_digest, path = receipt_file(document, fmt)
+    if digest != current_digest:
+        return RedirectResponse(
+            str(request.url_for("get_receipt_file", booking_id=booking_id, file_name=f"{current_digest}.{fmt}")),
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        )
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{digest}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        path,
+        media_type=RECEIPT_FORMATS[fmt],
+        headers=headers,
+        filename=f"{document.receipt_id}.{fmt}",
+        content_disposition_type="attachment" if fmt == "pdf" else "inline",
+    )
+
+@booking_router.get(
+    "/admin/all",
+    dependencies=[Depends(profile_request)],
+    response_model=AllBookingResponse,
+)
 async def admin_get_all_bookings(
     request: Request,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
@@ -536,7 +931,7 @@ async def admin_get_all_bookings(
         total_pages = (total_records // limit) + (1 if total_records % limit > 0 else 0)
         current_page = (skip // limit) + 1
         bookings = (
-            db.query(Booking)
+            db.query(Booking, User.username, Space.name)
             .join(User, Booking.user_id == User.id)
             .join(Space, Booking.space_id == Space.id)
             .order_by(Booking.created_at.desc())
@@ -558,26 +953,8 @@ async def admin_get_all_bookings(
         )
         
         # Map the results to the AdminBookingResponse schema
-        return  {
-            "data": [
-                AdminBookingResponse(
-                    id=booking.id,
-                    receipt_id=booking.receipt_id,
-                    user_id=booking.user_id,
-                    username=booking.user.username,
-                    space_id=booking.space_id,
-                    space_name=booking.space.name,
-                    start_time=booking.start_time,
-                    end_time=booking.end_time,
-                    status=booking.status,
-                    total_cost=booking.total_cost,
-                    purpose=booking.purpose,
-                    tx_ref=booking.tx_ref,
-                    transaction_id=booking.transaction_id,
-                    created_at=booking.created_at,
-                ).model_dump()
-                for booking in bookings
-            ],
+        return json_response(all_bookings_adapter, {
+            "data": admin_booking_rows(bookings),
             "pagination": {
                 "current_page": current_page,
                 "next_page": current_page + 1 if next_skip < total_records else None,
@@ -587,7 +964,7 @@ async def admin_get_all_bookings(
                 "next_request": next_request,
                 "prev_request": prev_request,
             },
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error fetching bookings for admin: {e}")
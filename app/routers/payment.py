@@ -0,0 +1,44 @@
+# app/routers/payment.py
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from app.utils import (
+    logger,
+    job_queue,
+    verify_webhook_signature,
+    parse_payment_event,
+    PAYMENT_EVENTS_JOB
+)
+from app.database import get_db
+
+payment_router = APIRouter(prefix="/payments")
+
+
+@payment_router.post("/webhook")
+async def payment_webhook(request: Request, db: Session = Depends(get_db)):
+    """
+    Receive a payment provider webhook. The event is stored as received and
+    acknowledged right away; bookings are confirmed by the job queue.
+    """
+    body = await request.body()
+    if not verify_webhook_signature(
+        body, request.headers.get("verif-hash"), request.headers.get("flutterwave-signature")
+    ):
+        logger.warning("Payment webhook with an invalid signature rejected.")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature"
+        )
+
+    try:
+        event = parse_payment_event(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body"
+        )
+
+    db.add(event)
+    db.flush()  # Assigns the event id for the job
+    job_queue.enqueue(db, PAYMENT_EVENTS_JOB, {"event_id": event.id, "tx_ref": event.tx_ref})
+    db.commit()
+    job_queue.notify()
+    return {"status": "received"}
@@ -1,10 +1,18 @@
 # app/routers/profile.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.models import User
-from app.utils import logger, get_current_user, hash_password, verify_password
+from app.utils import (
+    logger,
+    get_current_user,
+    hash_password,
+    verify_password,
+    login_guard,
+    check_auth_attempt,
+    revocation_store
+)
 from app.database import get_db
 from app.schemas import (
     UserResponse,
@@ -42,6 +50,7 @@ def delete_account(
         user.is_deleted = True
         user.is_active = False  # Mark the account inactive as well
         db.commit()
+        revocation_store.revoke_user_tokens(user.username)
         logger.info(f"User ID {user.id} soft deleted their account.")
         return {"detail": "Account deleted successfully."}
     except SQLAlchemyError as e:
@@ -74,6 +83,8 @@ def update_password(
 
         user.password = hash_password(payload.new_password)
         db.commit()
+        # Sign out every session, including this one
+        revocation_store.revoke_user_tokens(user.username)
         logger.info(f"User ID {user.id} updated their password.")
         return {"detail": "Password updated successfully."}
     except SQLAlchemyError as e:
@@ -95,6 +106,7 @@ def update_profile(
     Update the user's profile information.
     """
     try:
+        previous_username = None
         if payload.username and payload.username != user.username:
             db_user = db.query(User).filter(User.username == payload.username).first()
             if db_user:
@@ -105,6 +117,7 @@ def update_profile(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Username already registered",
                 )
+            previous_username = user.username
             user.username = payload.username
         if payload.email and payload.email != user.email:
             db_user = db.query(User).filter(User.email == payload.email).first()
@@ -119,6 +132,9 @@ def update_profile(
             user.email = payload.email
 
         db.commit()
+        if previous_username:
+            # Tokens name the user by username, so the old ones are retired
+            revocation_store.revoke_user_tokens(previous_username)
         logger.info(f"User ID {user.id} updated their profile.")
         return user
     except SQLAlchemyError as e:
@@ -132,17 +148,19 @@ def update_profile(
 
 @profile_router.post("/reactivate", response_model=DetailResponse)
 def reactivate_account_with_password(
-    user: UserLogin,
+    credentials: UserLogin,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """
     Reactivates a soft-deleted account using username and password verification.
     """
+    check_auth_attempt(request, credentials.email)
     try:
         # Fetch the user by username or email
         user = (
             db.query(User)
-            .filter(User.email == user.email, User.is_deleted == True)
+            .filter(User.email == credentials.email, User.is_deleted == True)
             .first()
         )
 
@@ -153,7 +171,8 @@ def reactivate_account_with_password(
             )
 
         # Verify the provided password
-        if not verify_password(user.password, hash_password(user.password)):
+        if not verify_password(credentials.password, user.password):
+            login_guard.record_failure(credentials.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password."
             )
@@ -169,7 +188,7 @@ def reactivate_account_with_password(
         }
     except SQLAlchemyError as e:
 
-        logger.error(f"Error reactivating user ID: {user.id} : {e}")
+        logger.error(f"Error reactivating account for {credentials.email}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal Server Error",
@@ -1,35 +1,78 @@
 # app/routers/space.py
 
-from fastapi import HTTPException, APIRouter, status, Depends
+import json
+from fastapi import HTTPException, APIRouter, status, Depends, Request
+from fastapi.responses import StreamingResponse
 from uuid import UUID
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.models import Space
-from app.utils import logger, admin_required
-from app.database import get_db
+from app.models import Space, User, WaitlistEntry
+from app.utils import (
+    logger,
+    admin_required,
+    dump_json,
+    PydanticJSONResponse,
+    SingleFlight,
+    VersionedCache,
+    invalidation_bus,
+    shared_catalog,
+    space_adapter,
+    space_list_adapter,
+    space_summary,
+    quote_candidates,
+    feed_validators,
+    space_calendar,
+    audit_trail,
+    audit_changes
+)
+from app.config import settings
+from app.database import get_db, SessionLocal
 from app.schemas import (
     SpaceResponse,
     SpaceCreateSchema,
     SpaceUpdateSchema,
-    DetailResponse
+    DetailResponse,
+    QuoteRequest,
+    QuoteResponse
 )
 
 space_router = APIRouter(prefix="/spaces")
 
 
-@space_router.get("/", response_model=list[SpaceResponse])
-async def get_all_spaces(db: Session = Depends(get_db)):
+space_cache = VersionedCache("spaces", invalidation_bus)
+
+
+def space_key(space_id: UUID) -> str:
+    return f"space:{space_id}"
+
+
+def publish_space_change(space_id: UUID):
     """
-    Fetch all spaces. Open to all users.
+    Invalidate the space list and the space's detail in every worker.
     """
+    invalidation_bus.publish("spaces", space_key(space_id))
+
+
+def load_spaces() -> bytes:
+    """
+    Serialized list of all spaces, with only the first image URL of each.
+    """
+    db = SessionLocal()
     try:
         spaces = db.query(Space).all()
-        # Modify the response to include only the first image URL
-        for space in spaces:
-            if isinstance(space.images, list) and space.images:
-                space.images = [space.images[0]]  # Keep only the first image URL
+        return dump_json(space_list_adapter, [space_summary(space) for space in spaces])
+    finally:
+        db.close()
+
 
-        return spaces
+@space_router.get("/", response_model=list[SpaceResponse])
+async def get_all_spaces():
+    """
+    Fetch all spaces. Open to all users.
+    """
+    try:
+        content = shared_catalog.spaces_json() or await space_cache.get_or_load("spaces", load_spaces)
+        return PydanticJSONResponse(content=content)
     except SQLAlchemyError as e:
         logger.error(f"Error fetching spaces: {e}")
         raise HTTPException(
@@ -38,24 +81,97 @@ async def get_all_spaces(db: Session = Depends(get_db)):
         )
 
 
+@space_router.post("/quote", response_model=list[QuoteResponse])
+async def quote_spaces(request: QuoteRequest, db: Session = Depends(get_db)):
+    """
+    Price booking options without booking them, using the same rules as
+    booking creation. Open to all users.
+    """
+    if len(request.candidates) > settings.QUOTE_MAX_CANDIDATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.QUOTE_MAX_CANDIDATES} candidates can be quoted at once",
+        )
+    try:
+        quotes = quote_candidates(
+            db, [(c.space_id, c.start_time, c.end_time) for c in request.candidates]
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Error quoting spaces: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error quoting spaces",
+        )
+    return [
+        {
+            **candidate.model_dump(),
+            "billable_hours": quote.billable_hours if quote else None,
+            "multiplier": quote.multiplier if quote else None,
+            "total_cost": quote.total_cost if quote else None,
+        }
+        for candidate, quote in zip(request.candidates, quotes)
+    ]
+
+
+space_detail_flight = SingleFlight("space_detail")
+
+
+def load_space(space_id: UUID) -> bytes | None:
+    """
+    Serialized space, or None if it does not exist. Runs in the threadpool
+    with its own session so concurrent requests can share one query.
+    """
+    db = SessionLocal()
+    try:
+        space = db.query(Space).filter(Space.id == space_id).first()
+        return dump_json(space_adapter, space) if space else None
+    finally:
+        db.close()
+
+
 @space_router.get("/{space_id}", response_model=SpaceResponse)
-async def get_space(space_id: UUID, db: Session = Depends(get_db)):
+async def get_space(space_id: UUID):
     """
     Fetch a specific space by ID. Open to all users.
     """
-    space = db.query(Space).filter(Space.id == space_id).first()
-    if not space:
+    content = shared_catalog.space_json(space_id) or await space_cache.get_or_load(
+        space_key(space_id), load_space, space_id, flight=space_detail_flight
+    )
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Space not found"
         )
-    return space
+    return PydanticJSONResponse(content=content)
 
 
-@space_router.post(
-    "/", dependencies=[Depends(admin_required)], response_model=SpaceResponse
-)
+@space_router.get("/{space_id}/calendar.ics")
+async def get_space_calendar(space_id: UUID, request: Request):
+    """
+    The space's bookings as an iCalendar feed, streamed from the database.
+    Answered with 304 while none of its bookings has changed. Open to all users.
+    """
+    not_modified, headers = await feed_validators(request, f"space:{space_id}", private=False)
+    if not_modified:
+        return not_modified
+
+    content = shared_catalog.space_json(space_id) or await space_cache.get_or_load(
+        space_key(space_id), load_space, space_id, flight=space_detail_flight
+    )
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Space not found"
+        )
+    return StreamingResponse(
+        space_calendar(space_id, json.loads(content)["name"]),
+        media_type="text/calendar; charset=utf-8",
+        headers={**headers, "Content-Disposition": 'inline; filename="calendar.ics"'},
+    )
+
+
+@space_router.post("/", response_model=SpaceResponse)
 async def create_space(
     space_data: SpaceCreateSchema,
+    current_user: User = Depends(admin_required),
     db: Session = Depends(get_db),
 ):
     """
@@ -73,6 +189,8 @@ async def create_space(
         db.add(new_space)
         db.commit()
         db.refresh(new_space)
+        publish_space_change(new_space.id)
+        audit_trail.record(current_user, "space.create", "space", new_space.id, audit_changes({}, space_data.model_dump()))
         logger.info(f"Space created: {new_space.name}")
         return new_space
     except HTTPException as http_exc:
@@ -87,12 +205,11 @@ async def create_space(
 
 
 
-@space_router.put(
-    "/{space_id}", dependencies=[Depends(admin_required)], response_model=SpaceResponse
-)
+@space_router.put("/{space_id}", response_model=SpaceResponse)
 async def update_space(
     space_id: UUID,
     update_data: SpaceUpdateSchema,
+    current_user: User = Depends(admin_required),
     db: Session = Depends(get_db),
 ):
     """
@@ -104,10 +221,14 @@ async def update_space(
             status_code=status.HTTP_404_NOT_FOUND, detail="Space not found"
         )
     try:
-        for key, value in update_data.model_dump(exclude_unset=True).items():
+        changes = update_data.model_dump(exclude_unset=True)
+        before = {key: getattr(space, key) for key in changes}
+        for key, value in changes.items():
             setattr(space, key, value)
         db.commit()
         db.refresh(space)
+        publish_space_change(space.id)
+        audit_trail.record(current_user, "space.update", "space", space.id, audit_changes(before, changes))
         logger.info(f"Space updated: {space.name}")
         return space
     except SQLAlchemyError as e:
@@ -118,10 +239,12 @@ async def update_space(
         )
 
 
-@space_router.delete(
-    "/{space_id}", dependencies=[Depends(admin_required)], response_model=DetailResponse
-)
-async def delete_space(space_id: UUID, db: Session = Depends(get_db)):
+@space_router.delete("/{space_id}", response_model=DetailResponse)
+async def delete_space(
+    space_id: UUID,
+    current_user: User = Depends(admin_required),
+    db: Session = Depends(get_db),
+):
     """
     Delete a space by ID. Admin only.
     """
@@ -131,8 +254,12 @@ async def delete_space(space_id: UUID, db: Session = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND, detail="Space not found"
         )
     try:
+        before = {key: getattr(space, key) for key in ("name", "location", "capacity", "hourly_rate")}
+        db.query(WaitlistEntry).filter(WaitlistEntry.space_id == space_id).delete()
         db.delete(space)
         db.commit()
+        publish_space_change(space_id)
+        audit_trail.record(current_user, "space.delete", "space", space_id, audit_changes(before, dict.fromkeys(before)))
         logger.info(f"Space deleted: {space.name}")
         return {"detail": "Space deleted successfully"}
     except SQLAlchemyError as e:
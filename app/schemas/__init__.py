@@ -17,7 +17,17 @@ from .booking import (
     ConfirmPayment,
     BookingConfirmationResponse,
     ReceiptResponse,
-    AllBookingResponse
+    AllBookingResponse,
+    CalendarFeedResponse,
+    WaitlistCreate,
+    WaitlistEntryResponse
+)
+from .space import (
+    SpaceCreateSchema,
+    SpaceResponse,
+    SpaceUpdateSchema,
+    QuoteCandidate,
+    QuoteRequest,
+    QuoteResponse
 )
-from .space import SpaceCreateSchema, SpaceResponse, SpaceUpdateSchema
 from .profile import UpdatePasswordRequest, UpdateProfileRequest
@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field, EmailStr, field_validator
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
+from app.utils.timezones import to_local_naive
 
 
 class BookingCreate(BaseModel):
@@ -14,6 +15,8 @@ class BookingCreate(BaseModel):
     end_time: datetime = Field(..., description="End time of the booking")
     purpose: str = Field(..., max_length=500, description="Purpose of the booking")
 
+    _local_times = field_validator("start_time", "end_time")(to_local_naive)
+
     @field_validator("end_time")
     @classmethod
     def check_range(cls, end_time, start_time):
@@ -31,6 +34,8 @@ class BookingUpdate(BaseModel):
     purpose: Optional[str] = Field(None, description="Updated purpose")
     status: Optional[str] = Field(None, description="Updated status")
 
+    _local_times = field_validator("start_time", "end_time")(to_local_naive)
+
 
 class BookingResponse(BaseModel):
     """Response schema for booking information."""
@@ -177,3 +182,30 @@ class ReceiptResponse(BaseModel):
     space: SpaceDetail = Field(..., description="Space details")
     booking: BookingDetail = Field(..., description="Booking details")
     payment: PaymentDetail = Field(..., description="Payment details")
+
+
+class CalendarFeedResponse(BaseModel):
+    """Response schema for the URL of a user's calendar feed."""
+
+    url: str = Field(..., description="iCalendar feed URL to subscribe to; keep it private")
+
+
+class WaitlistCreate(BookingCreate):
+    """Schema for waiting on a taken slot of a space."""
+
+
+class WaitlistEntryResponse(BaseModel):
+    """Response schema for a waitlist entry."""
+
+    id: UUID = Field(..., description="Unique waitlist entry ID")
+    space_id: UUID = Field(..., description="ID of the space waited for")
+    start_time: datetime = Field(..., description="Start time waited for")
+    end_time: datetime = Field(..., description="End time waited for")
+    purpose: str = Field(..., description="Purpose of the booking")
+    status: str = Field(..., description="waiting, or promoted once booked")
+    booking_id: Optional[UUID] = Field(None, description="Pending booking the entry was promoted to")
+    created_at: datetime = Field(..., description="When the user joined the waitlist")
+    promoted_at: Optional[datetime] = Field(None, description="When the entry was promoted")
+
+    class Config:
+        from_attributes = True
@@ -1,8 +1,10 @@
 # app/schemas/space.py
 
 from uuid import UUID
-from pydantic import BaseModel, Field
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional
+from app.utils.timezones import to_local_naive
 
 
 class SpaceCreateSchema(BaseModel):
@@ -92,3 +94,36 @@ class SpaceUpdateSchema(BaseModel):
     hourly_rate: Optional[float] = Field(
         None, gt=0, description="Updated hourly rental rate for the space"
     )
+
+
+class QuoteCandidate(BaseModel):
+    """A (space, interval) option to price."""
+
+    space_id: UUID = Field(..., description="ID of the space")
+    start_time: datetime = Field(..., description="Start time of the booking")
+    end_time: datetime = Field(..., description="End time of the booking")
+
+    _local_times = field_validator("start_time", "end_time")(to_local_naive)
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.start_time >= self.end_time:
+            raise ValueError("End time must be greater than start time")
+        return self
+
+
+class QuoteRequest(BaseModel):
+    """Schema for pricing several booking options at once."""
+
+    candidates: list[QuoteCandidate] = Field(..., min_length=1, description="Options to price")
+
+
+class QuoteResponse(BaseModel):
+    """Price of one candidate; null cost if the space does not exist."""
+
+    space_id: UUID = Field(..., description="ID of the space")
+    start_time: datetime = Field(..., description="Start time of the booking")
+    end_time: datetime = Field(..., description="End time of the booking")
+    billable_hours: Optional[float] = Field(None, description="Hours charged after minimum and rounding")
+    multiplier: Optional[float] = Field(None, description="Average peak/weekend multiplier")
+    total_cost: Optional[float] = Field(None, description="Price of the booking")
@@ -5,13 +5,79 @@ from .security import (
     create_refresh_token,
     verify_refresh_token,
     verify_access_token,
+    token_cache,
     REFRESH_TOKEN_EXPIRE_DAYS
 )  # Security functions
 from .logging_config import logger
+from .timezones import to_local_naive
+from .query_stats import instrument_engine, start_query_stats, current_request_id
+from .metrics import register_metrics, collect_metrics
+from .singleflight import SingleFlight
+from .cache_bus import invalidation_bus, InvalidationBus, VersionedCache
+from .revocation import revocation_store
+from .serialization import (
+    PydanticJSONResponse,
+    json_response,
+    dump_json,
+    space_summary,
+    booking_adapter,
+    booking_list_adapter,
+    all_bookings_adapter,
+    space_adapter,
+    space_list_adapter,
+    taken_bookings_adapter
+)
 from .helpers import (
     get_current_user, 
     admin_required, 
     seed_admin,
     create_random_key,
-    generate_and_store_receipt_id
-)
\ No newline at end of file
+    generate_and_store_receipt_id,
+    assign_receipt_ids,
+    lock_space_for_booking,
+    find_conflicting_booking,
+    ensure_booking_exclusion_constraint,
+    booking_lock_strategy
+)
+from .interval_store import IntervalStore, load_interval_stores, epoch
+from .shared_catalog import shared_catalog
+from .rate_limit import rate_limiter, login_guard, client_ip, check_auth_attempt
+from .admission import admission_controller, classify_request
+from .pricing import PricingRules, Quote, price_interval, quote_candidates
+from .timer_wheel import TimerWheel
+from .notifications import Notification, Notifier, FileNotifier, SMTPNotifier, SMTPPool, build_notifier
+from .reminders import reminder_dispatcher
+from .job_queue import job_queue, JobQueue
+from .booking_notifications import notify_booking_event, send_booking_notifications
+from .payments import (
+    verify_webhook_signature,
+    parse_payment_event,
+    process_payment_events,
+    apply_payment,
+    reconcile_payments,
+    new_reconciliation_run,
+    PAYMENT_EVENTS_JOB,
+    RECONCILE_JOB
+)
+from .receipts import (
+    receipt_data,
+    render_receipts,
+    queue_receipt_render,
+    purge_receipt_files,
+    receipt_file,
+    RENDER_RECEIPT_JOB,
+    RECEIPT_FORMATS,
+    IMMUTABLE_CACHE_CONTROL
+)
+from .calendar_feeds import (
+    feed_validators,
+    space_calendar,
+    user_calendar,
+    user_feed_token,
+    verify_user_feed_token
+)
+from .waitlist import queue_waitlist_promotion, promote_waitlist, PROMOTE_WAITLIST_JOB
+from .audit import audit_trail, AuditTrail, audit_changes
+from .availability_stream import availability_broadcaster, AvailabilityBroadcaster, load_slots
+from .payment_provider import FlutterwaveClient, ProviderTransaction, PaymentProviderError, build_payment_provider
+from .profiling import profile_request, finish_request_profile, profile_path
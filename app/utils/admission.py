@@ -0,0 +1,119 @@
+# app/utils/admission.py
+
+import asyncio
+import re
+from collections import deque
+from app.config import settings
+from .metrics import register_metrics
+
+# (method, path pattern) of requests that must keep working under overload
+CRITICAL_ROUTES = (
+    ("POST", re.compile(r"^/bookings/?$")),
+    ("POST", re.compile(r"^/bookings/[^/]+/confirm$")),
+    ("GET", re.compile(r"^/bookings/[^/]+/payment$")),
+    ("POST", re.compile(r"^/payments/webhook$")),
+)
+# Expensive listings, searches and admin tools, shed first
+LOW_PRIORITY_PREFIXES = ("/bookings/admin", "/bookings/search", "/admin/")
+# Cheap admin endpoints needed to diagnose the overload itself
+NORMAL_PRIORITY_PATHS = ("/admin/metrics",)
+
+
+def classify_request(method: str, path: str) -> str:
+    """Route class of a request: critical, normal or low."""
+    for route_method, pattern in CRITICAL_ROUTES:
+        if method == route_method and pattern.match(path):
+            return "critical"
+    if path.startswith(LOW_PRIORITY_PREFIXES) and path not in NORMAL_PRIORITY_PATHS:
+        return "low"
+    return "normal"
+
+
+class RouteClass:
+    """
+    Concurrency limit with a bounded FIFO queue for one route class.
+
+    `acquire` returns False right away when the queue is full, or after
+    ADMISSION_QUEUE_TIMEOUT_SECONDS without a slot; the caller sheds the
+    request instead of letting it pile up.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.max_queued = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_queued = max(self.max_queued, len(self._waiters))
+        try:
+            # The releasing request hands its slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(waiter), settings.ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The slot moves to the waiter; active is unchanged
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Per-route-class admission for one worker."""
+
+    def __init__(self):
+        self.enabled = settings.ADMISSION_CONTROL_ENABLED
+        self.classes = {
+            name: RouteClass(name, settings.ADMISSION_CONCURRENCY[name], settings.ADMISSION_QUEUE_SIZE[name])
+            for name in ("critical", "normal", "low")
+        }
+        register_metrics("admission", self.stats)
+
+    def route_class(self, method: str, path: str) -> RouteClass:
+        return self.classes[classify_request(method, path)]
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **{name: c.stats() for name, c in self.classes.items()}}
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,145 @@
+# app/utils/audit.py
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from app.config import settings
+from app.database import SessionLocal
+from app.models import AuditLog, User
+from .logging_config import logger
+from .metrics import register_metrics
+from .query_stats import current_request_id
+
+
+def audit_changes(before: dict, after: dict) -> dict:
+    """{field: [old, new]} for the fields of `after` whose value differs from `before`."""
+    return {
+        field: jsonable_encoder([before.get(field), value])
+        for field, value in after.items()
+        if before.get(field) != value
+    }
+
+
+class AuditTrail:
+    """
+    Append-only audit log of who did what to which entity.
+
+    `record` only appends to an in-memory buffer, so actions cost no extra
+    write on the request path. A background thread inserts the buffer in
+    batches, as soon as AUDIT_BATCH_SIZE entries are waiting or every
+    AUDIT_FLUSH_INTERVAL_SECONDS. Entries that could not be written are
+    kept for the next flush, up to AUDIT_BUFFER_MAX; entries still buffered
+    when a worker dies are lost.
+    """
+
+    def __init__(self):
+        self.enabled = settings.AUDIT_ENABLED
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+        self._buffer: deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        register_metrics("audit", self.stats)
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write what is still buffered."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def record(
+        self,
+        actor: User | None,
+        action: str,
+        entity_type: str,
+        entity_id: Any,
+        changes: dict | None = None,
+    ):
+        """
+        Buffer an audit entry. Call once the action has committed; `actor`
+        is None for background jobs.
+        """
+        if not self.enabled:
+            return
+        entry = {
+            "at": datetime.now(),
+            "actor_id": actor.id if actor else None,
+            "actor_name": actor.username if actor else None,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": str(entity_id),
+            "changes": changes or None,
+            "request_id": current_request_id(),
+        }
+        with self._lock:
+            self._buffer.append(entry)
+            self.recorded += 1
+            if len(self._buffer) > settings.AUDIT_BUFFER_MAX:
+                self._buffer.popleft()
+                self.dropped += 1
+            full = len(self._buffer) >= settings.AUDIT_BATCH_SIZE
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self) -> int:
+        """Write buffered entries in batches of AUDIT_BATCH_SIZE; returns the number written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), settings.AUDIT_BATCH_SIZE))]
+                if not batch:
+                    return written
+                db = SessionLocal()
+                try:
+                    db.execute(insert(AuditLog), batch)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    self.failures += 1
+                    with self._lock:
+                        self._buffer.extendleft(reversed(batch))  # Retried on the next flush, in order
+                    logger.error(f"Error writing {len(batch)} audit entries: {e}")
+                    return written
+                finally:
+                    db.close()
+                written += len(batch)
+                self.written += len(batch)
+                self.flushes += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "recorded": self.recorded,
+            "written": self.written,
+            "buffered": len(self._buffer),
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+
+audit_trail = AuditTrail()
@@ -0,0 +1,265 @@
+# app/utils/availability_stream.py
+
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import AsyncIterator
+from uuid import UUID
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Booking
+from .cache_bus import invalidation_bus
+from .logging_config import logger
+from .metrics import register_metrics
+
+# Bus keys carrying a space's booking changes to every worker
+CHANGES_PREFIX = "availability_changes:"
+# Booking columns that move a slot; writes touching anything else are not streamed
+SLOT_ATTRIBUTES = ("start_time", "end_time", "status", "space_id")
+
+
+def _slot(booking_id, start_time: datetime, end_time: datetime, booking_status: str) -> dict:
+    """A booking as streamed: free once canceled or deleted, busy otherwise."""
+    return {
+        "booking_id": str(booking_id),
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "status": booking_status,
+        "state": "free" if booking_status in ("canceled", "deleted") else "busy",
+    }
+
+
+def _slot_changes(session: Session) -> dict[str, list[dict]]:
+    """Changed slots per space id for the bookings this flush inserts, deletes or changes."""
+    changes = defaultdict(list)
+    for booking in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(booking, Booking):
+            continue
+        state = inspect(booking)
+        if booking in session.dirty and not any(state.attrs[name].history.has_changes() for name in SLOT_ATTRIBUTES):
+            continue
+        if booking.end_time < datetime.now(booking.end_time.tzinfo):
+            continue  # Past slots are of no use to a live view
+        booking_status = "deleted" if booking in session.deleted else booking.status
+        changes[str(booking.space_id)].append(_slot(booking.id, booking.start_time, booking.end_time, booking_status))
+        for space_id in state.attrs.space_id.history.deleted:
+            if space_id:  # Moved away: free in the old space
+                changes[str(space_id)].append(_slot(booking.id, booking.start_time, booking.end_time, "deleted"))
+    return changes
+
+
+def _collect_slot_changes(session: Session, flush_context):
+    try:
+        changes = _slot_changes(session)
+    except Exception as e:
+        # Streaming is best effort; never fail the write being flushed
+        logger.error(f"Error collecting availability changes: {e}")
+        return
+    if changes:
+        pending = session.info.setdefault("availability_changes", defaultdict(list))
+        for space_id, slots in changes.items():
+            pending[space_id].extend(slots)
+
+
+def _publish_slot_changes(session: Session):
+    changes = session.info.pop("availability_changes", None)
+    for space_id, slots in (changes or {}).items():
+        # Postgres drops payloads over its NOTIFY limit; workers then resync the space
+        invalidation_bus.publish(f"{CHANGES_PREFIX}{space_id}", payload={"changes": slots})
+
+
+def _discard_slot_changes(session: Session):
+    session.info.pop("availability_changes", None)
+
+
+# Every session, so no booking write is missing from the stream
+event.listen(SessionLocal, "after_flush", _collect_slot_changes)
+event.listen(SessionLocal, "after_commit", _publish_slot_changes)
+event.listen(SessionLocal, "after_rollback", _discard_slot_changes)
+
+
+def load_slots(space_ids: list[str]) -> dict[str, list[dict]]:
+    """Current and upcoming busy slots of the spaces, by space id."""
+    slots = {space_id: [] for space_id in space_ids}
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Booking.space_id, Booking.id, Booking.start_time, Booking.end_time, Booking.status
+        ).filter(
+            Booking.space_id.in_([UUID(space_id) for space_id in space_ids]),
+            Booking.end_time >= datetime.now(),
+            Booking.status != "canceled",
+        ).order_by(Booking.start_time)
+        for space_id, booking_id, start_time, end_time, booking_status in rows:
+            slots[str(space_id)].append(_slot(booking_id, start_time, end_time, booking_status))
+        return slots
+    finally:
+        db.close()
+
+
+def _event(name: str, data: dict) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class StreamClient:
+    """One subscriber: the spaces it follows and its bounded queue of encoded events."""
+
+    __slots__ = ("space_ids", "queue", "dropped")
+
+    def __init__(self, space_ids: list[str]):
+        self.space_ids = space_ids
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=settings.AVAILABILITY_STREAM_QUEUE_SIZE)
+        self.dropped = False
+
+
+class AvailabilityBroadcaster:
+    """
+    Pushes booking slot changes to Server-Sent Event subscribers of this worker.
+
+    Booking writes publish their changed slots per space on the invalidation
+    bus after commit, so every worker hears about every write. Each worker
+    encodes an event once and offers it to the queues of the space's
+    subscribers. A subscriber whose queue is full is dropped rather than
+    buffered without bound; its stream ends and the client reconnects to a
+    fresh snapshot. Changes whose payload did not survive the bus are
+    replaced by a snapshot of the space, loaded once per worker.
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.sent = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self._subscribers: set[StreamClient] = set()
+        self._clients: dict[str, set[StreamClient]] = {}  # space id -> subscribers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changes_seen: dict[str, int] = defaultdict(int)
+        self._resync_pending: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        register_metrics("availability_stream", self.stats)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        invalidation_bus.subscribe(self._on_invalidation)
+
+    @property
+    def full(self) -> bool:
+        """Whether this worker already streams to AVAILABILITY_STREAM_MAX_CLIENTS clients."""
+        return len(self._subscribers) >= settings.AVAILABILITY_STREAM_MAX_CLIENTS
+
+    def subscribe(self, space_ids: list[str]) -> StreamClient:
+        client = StreamClient(space_ids)
+        self._subscribers.add(client)
+        for space_id in space_ids:
+            self._clients.setdefault(space_id, set()).add(client)
+        return client
+
+    def unsubscribe(self, client: StreamClient):
+        self._subscribers.discard(client)
+        for space_id in client.space_ids:
+            clients = self._clients.get(space_id)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del self._clients[space_id]
+                    self._changes_seen.pop(space_id, None)
+
+    def _on_invalidation(self, key: str, payload=None):
+        # Runs on the publishing or bus listener thread; hand over to the event loop
+        if key.startswith(CHANGES_PREFIX) and self._loop is not None:
+            space_id = key[len(CHANGES_PREFIX):]
+            if space_id in self._clients:
+                self._loop.call_soon_threadsafe(self._broadcast, space_id, payload)
+
+    def _broadcast(self, space_id: str, payload):
+        if space_id not in self._clients:
+            return  # Last subscriber left meanwhile
+        self.events += 1
+        self._changes_seen[space_id] += 1
+        if isinstance(payload, dict) and "changes" in payload:
+            self._send(space_id, _event("changes", {"space_id": space_id, "slots": payload["changes"]}))
+        elif space_id not in self._resync_pending:
+            self._resync_pending.add(space_id)
+            task = self._loop.create_task(self._resync(space_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resync(self, space_id: str):
+        self._resync_pending.discard(space_id)
+        self.resyncs += 1
+        try:
+            while space_id in self._clients:
+                seen = self._changes_seen[space_id]
+                slots = await run_in_threadpool(load_slots, [space_id])
+                # A change delivered while loading may be newer than the snapshot
+                if self._changes_seen[space_id] == seen:
+                    self._send(space_id, _event("snapshot", {"space_id": space_id, "slots": slots[space_id]}))
+                    return
+        except Exception as e:
+            logger.error(f"Error resyncing availability of space {space_id}: {e}")
+
+    def _send(self, space_id: str, frame: bytes):
+        for client in list(self._clients.get(space_id, ())):
+            try:
+                client.queue.put_nowait(frame)
+                self.sent += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self._close(client)
+
+    def _close(self, client: StreamClient):
+        self.unsubscribe(client)
+        if not client.dropped:
+            client.dropped = True
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            client.queue.put_nowait(None)  # Ends the stream
+
+    async def stream(self, space_ids: list[str]) -> AsyncIterator[bytes]:
+        """
+        Event stream for `space_ids`: a snapshot of each space, then changes
+        as they are published, with comment lines as heartbeats. Subscribed
+        before the snapshot is read, so no change falls in between; changes
+        repeated by the snapshot are idempotent per booking id. The stream
+        ends after AVAILABILITY_STREAM_MAX_SECONDS, so clients spread over the
+        workers again and a graceful shutdown is not held up for long.
+        """
+        client = self.subscribe(space_ids)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.AVAILABILITY_STREAM_MAX_SECONDS
+        try:
+            yield f"retry: {settings.AVAILABILITY_STREAM_RETRY_MS}\n\n".encode()
+            slots = await run_in_threadpool(load_slots, space_ids)
+            for space_id in space_ids:
+                yield _event("snapshot", {"space_id": space_id, "slots": slots[space_id]})
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    frame = await asyncio.wait_for(
+                        client.queue.get(), min(remaining, settings.AVAILABILITY_STREAM_HEARTBEAT_SECONDS)
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(client)
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._subscribers),
+            "spaces": len(self._clients),
+            "events": self.events,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+        }
+
+
+availability_broadcaster = AvailabilityBroadcaster()
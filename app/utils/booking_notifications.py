@@ -0,0 +1,165 @@
+# app/utils/booking_notifications.py
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from string import Template
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Booking, User
+from .logging_config import logger
+from .job_queue import job_queue
+from .notifications import Notification, build_notifier
+
+# Job kind carrying one booking event
+NOTIFICATION_JOB = "booking_notification"
+
+
+@dataclass(frozen=True, slots=True)
+class EmailTemplate:
+    name: str
+    version: int  # Bump on every change; compiled templates are cached per version
+    subject: str
+    body: str
+
+
+TEMPLATES = {
+    template.name: template
+    for template in (
+        EmailTemplate(
+            "booking_confirmed", 1,
+            "Booking confirmed: $space_name on $date",
+            "Hi $username,\n\nYour booking of $space_name on $date, $time is confirmed.",
+        ),
+        EmailTemplate(
+            "booking_canceled", 1,
+            "Booking canceled: $space_name on $date",
+            "Hi $username,\n\nYour booking of $space_name on $date, $time has been canceled.",
+        ),
+        EmailTemplate(
+            "booking_promoted", 1,
+            "A slot opened up: $space_name on $date",
+            "Hi $username,\n\n$space_name is now free on $date, $time, and we have booked it for you "
+            "from the waitlist. Complete the payment to keep the booking.",
+        ),
+        EmailTemplate(
+            "booking_status", 1,
+            "Booking $status: $space_name on $date",
+            "Hi $username,\n\nYour booking of $space_name on $date, $time is now $status.",
+        ),
+        EmailTemplate(
+            "booking_digest", 1,
+            "$count updates to your bookings",
+            "Hi $username,\n\nHere is what changed in your bookings:\n\n$lines",
+        ),
+    )
+}
+LAYOUT = "$content\n\n--\n$app_name\n"
+
+_compiled: dict[tuple[str, int], tuple[Template, Template]] = {}
+
+
+def compiled_template(name: str) -> tuple[Template, Template]:
+    """Subject and body of a template, with the layout applied once per template version."""
+    template = TEMPLATES[name]
+    key = (name, template.version)
+    if key not in _compiled:
+        body = Template(LAYOUT).substitute(content=template.body, app_name=settings.APP_NAME.replace("$", "$$"))
+        _compiled[key] = (Template(template.subject), Template(body))
+    return _compiled[key]
+
+
+def notify_booking_event(db: Session, booking: Booking, event: str):
+    """
+    Queue an email about `booking` to its owner, in the caller's transaction.
+    `event` is "confirmed", "canceled", "promoted" or "status". Call before deleting the booking.
+    """
+    if not settings.NOTIFICATIONS_ENABLED:
+        return
+    job_queue.enqueue(db, NOTIFICATION_JOB, {
+        "user_id": str(booking.user_id),
+        "booking_id": str(booking.id),
+        "event": event,
+        "status": booking.status,
+        "space_name": booking.space.name,
+        "start_time": booking.start_time.isoformat(),
+        "end_time": booking.end_time.isoformat(),
+        "at": datetime.now().isoformat(),
+        "retries": 0,
+    }, delay_seconds=settings.NOTIFICATION_COALESCE_SECONDS)
+
+
+def _fields(event: dict) -> dict:
+    start_time = datetime.fromisoformat(event["start_time"])
+    end_time = datetime.fromisoformat(event["end_time"])
+    return {
+        "space_name": event["space_name"],
+        "status": event["status"],
+        "date": start_time.strftime("%B %d, %Y"),
+        "time": f"{start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')}",
+    }
+
+
+def render_notification(user: User, events: list[dict]) -> Notification:
+    """One email for all of a user's events: the event's own template, or a digest."""
+    if len(events) == 1:
+        event = events[0]
+        name = {
+            "confirmed": "booking_confirmed", "canceled": "booking_canceled", "promoted": "booking_promoted"
+        }.get(event["event"], "booking_status")
+        values = {"username": user.username, **_fields(event)}
+    else:
+        name = "booking_digest"
+        lines = []
+        for event in events:
+            fields = _fields(event)
+            lines.append(f"- {fields['space_name']}, {fields['date']}, {fields['time']}: {fields['status']}")
+        values = {"username": user.username, "count": len(events), "lines": "\n".join(lines)}
+    subject, body = compiled_template(name)
+    return Notification(ref=user.id, email=user.email, subject=subject.substitute(values), body=body.substitute(values))
+
+
+def send_booking_notifications(db: Session, payloads: list[dict]):
+    """
+    Send one email per user for a batch of booking events, folding in the
+    user's new events still waiting for their coalescing delay. Only the
+    latest event per booking is reported. Users whose email could not be
+    delivered get their events queued again with backoff, up to
+    JOB_MAX_ATTEMPTS times, rather than failing the whole batch.
+    """
+    user_ids = {payload["user_id"] for payload in payloads}
+    # Events waiting out a retry backoff keep it, so a failing mailbox is not retried every batch
+    payloads = payloads + job_queue.absorb(
+        db, NOTIFICATION_JOB, lambda payload: payload["user_id"] in user_ids and not payload["retries"],
+        due_within=settings.NOTIFICATION_COALESCE_SECONDS,
+    )
+
+    events_by_user: dict[str, dict[str, dict]] = defaultdict(dict)
+    for payload in sorted(payloads, key=lambda payload: payload["at"]):
+        events_by_user[payload["user_id"]][payload["booking_id"]] = payload
+
+    users = db.query(User).filter(User.id.in_([UUID(user_id) for user_id in events_by_user])).all()
+    notifications, pending = [], {}
+    for user in users:
+        if user.is_deleted:
+            continue
+        events = list(events_by_user[str(user.id)].values())
+        notifications.append(render_notification(user, events))
+        pending[user.id] = events
+    if not notifications:
+        return
+
+    delivered = build_notifier().send(notifications)
+    for user_id, events in pending.items():
+        if user_id in delivered:
+            continue
+        for event in events:
+            if event["retries"] + 1 >= settings.JOB_MAX_ATTEMPTS:
+                logger.error(f"Dropping booking notification for user {user_id} after {event['retries'] + 1} attempts.")
+                continue
+            job_queue.enqueue(
+                db, NOTIFICATION_JOB, {**event, "retries": event["retries"] + 1},
+                delay_seconds=settings.JOB_RETRY_BASE_SECONDS * 2 ** event["retries"],
+            )
+    logger.info(f"Sent {len(delivered)} booking notification emails for {len(payloads)} events.")
@@ -0,0 +1,393 @@
+# app/utils/cache_bus.py
+
+import fcntl
+import json
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Hashable
+from uuid import uuid4
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.config import settings
+from .logging_config import logger
+from .metrics import register_metrics
+from .singleflight import SingleFlight
+
+NOTIFY_CHANNEL = "cache_invalidation"
+# Postgres NOTIFY payloads must stay under 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7500
+
+Subscriber = Callable[[str, Any], None]
+
+
+class InvalidationBus:
+    """
+    Broadcasts cache invalidations to every worker.
+
+    Each worker keeps a local version per key, bumped whenever an
+    invalidation for the key is seen (locally or from another worker).
+    Caches remember the version an entry was filled at and treat the entry
+    as stale once the version moves on. Publishing applies the invalidation
+    locally right away, so a worker always reads its own writes.
+    """
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}-{uuid4().hex[:8]}"
+        self.published = 0
+        self.received = 0
+        self.resynced = 0
+        self._versions: dict[str, int] = {}
+        self._invalidated_at: dict[str, float] = {}
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+        self._backend: "BusBackend | None" = None
+        register_metrics("invalidation_bus", self.stats)
+
+    def start(self, engine: Engine):
+        backend = settings.BUS_BACKEND
+        if backend == "auto":
+            backend = "postgres" if engine.dialect.name == "postgresql" else "file"
+        if backend == "postgres":
+            self._backend = PostgresBusBackend(self, engine)
+        elif backend == "file":
+            self._backend = FileBusBackend(self, settings.BUS_FILE_PATH)
+        else:
+            self._backend = BusBackend(self)
+        self._backend.start()
+        logger.info(f"Cache invalidation bus started ({backend} backend).")
+
+    def stop(self):
+        if self._backend:
+            self._backend.stop()
+
+    def subscribe(self, callback: Subscriber):
+        """
+        Call `callback(key, payload)` for every invalidation. Callbacks run on
+        the publishing thread or the bus listener thread and must be quick.
+        """
+        self._subscribers.append(callback)
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def invalidated_at(self, key: str) -> float:
+        """Wall-clock time this worker last saw `key` invalidated (0 if never)."""
+        return self._invalidated_at.get(key, 0.0)
+
+    def publish(self, *keys: str, payload: Any = None):
+        """
+        Invalidate `keys` in every worker. Call after the write has committed.
+        """
+        for key in keys:
+            self.published += 1
+            self._apply(key, payload)
+            if self._backend:
+                try:
+                    self._backend.publish(key, payload)
+                except Exception as e:
+                    # Other workers catch up through resync or entry max age
+                    logger.error(f"Error publishing invalidation for {key}: {e}")
+
+    def _apply(self, key: str, payload: Any = None):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._invalidated_at[key] = time.time()
+        for callback in self._subscribers:
+            try:
+                callback(key, payload)
+            except Exception as e:
+                logger.error(f"Invalidation subscriber failed for {key}: {e}")
+
+    def receive(self, message: dict):
+        """Apply an invalidation received from another worker."""
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        self._apply(message["key"], message.get("payload"))
+
+    def invalidate_all(self):
+        """Bump every known key, used when messages may have been missed."""
+        self.resynced += 1
+        for key in list(self._versions):
+            self._apply(key)
+
+    def encode(self, key: str, payload: Any = None, version: int | None = None) -> str:
+        message = {"key": key, "origin": self.origin, "payload": payload}
+        if version is not None:
+            message["version"] = version
+        return json.dumps(message, default=str)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self._backend).__name__ if self._backend else None,
+            "published": self.published,
+            "received": self.received,
+            "resynced": self.resynced,
+            "keys": len(self._versions),
+        }
+
+
+class BusBackend:
+    """In-process backend, for a single worker and tests."""
+
+    def __init__(self, bus: InvalidationBus):
+        self.bus = bus
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def publish(self, key: str, payload: Any = None):
+        pass
+
+
+class FileBusBackend(BusBackend):
+    """
+    Development stand-in: invalidations are appended as JSON lines to a shared
+    file, and every worker tails it. Once the file grows past
+    BUS_FILE_MAX_BYTES a writer rotates it to `<path>.1`; workers finish
+    reading the rotated file before moving on, and invalidate all of their
+    keys if it was rotated away again before they got to it.
+    """
+
+    def __init__(self, bus: InvalidationBus, path: str):
+        super().__init__(bus)
+        self.path = path
+        self._inode = None
+        self._offset = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+
+    def start(self):
+        with open(self.path, "a") as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._offset = f.tell()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def publish(self, key: str, payload: Any = None):
+        line = self.bus.encode(key, payload) + "\n"
+        # Lock a sibling file so compaction can swap the log itself
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) > settings.BUS_FILE_MAX_BYTES:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, "a") as f:
+                    f.write(line)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _run(self):
+        while not self._stop.wait(settings.BUS_POLL_INTERVAL_SECONDS):
+            try:
+                self._poll()
+            except FileNotFoundError:
+                pass  # Mid-rotation
+            except Exception as e:
+                logger.error(f"Error reading invalidation bus file: {e}")
+
+    def _poll(self):
+        with open(self.path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._inode:
+                self._drain_rotated()
+                self._inode = inode
+                self._offset = 0
+            self._read(f)
+
+    def _drain_rotated(self):
+        try:
+            with open(f"{self.path}.1", "rb") as f:
+                if os.fstat(f.fileno()).st_ino == self._inode:
+                    self._read(f)
+                    return
+        except FileNotFoundError:
+            pass
+        # Rotated more than once since our last read; some lines are gone
+        self.bus.invalidate_all()
+
+    def _read(self, f):
+        f.seek(self._offset)
+        chunk = f.read()
+        # Only consume complete lines; a writer may be mid-append
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for line in complete.splitlines():
+            if line:
+                self.bus.receive(json.loads(line))
+
+
+class PostgresBusBackend(BusBackend):
+    """
+    Production backend: Postgres LISTEN/NOTIFY (psycopg2) plus a versions table.
+
+    Every publish bumps the key's row in `cache_versions` and notifies in the
+    same transaction. The listener resyncs from the table periodically and
+    after reconnecting, so a missed notification cannot leave a key stale.
+    """
+
+    def __init__(self, bus: InvalidationBus, engine: Engine):
+        super().__init__(bus)
+        self.engine = engine
+        self._seen: dict[str, int] = {}
+        self._last_resync = datetime.now()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def publish(self, key: str, payload: Any = None):
+        with self.engine.begin() as conn:
+            version = conn.execute(
+                text(
+                    "INSERT INTO cache_versions (key, version, updated_at) VALUES (:key, 1, now()) "
+                    "ON CONFLICT (key) DO UPDATE SET version = cache_versions.version + 1, updated_at = now() "
+                    "RETURNING version"
+                ),
+                {"key": key},
+            ).scalar()
+            message = self.bus.encode(key, payload, version)
+            if len(message) > MAX_NOTIFY_PAYLOAD:
+                message = self.bus.encode(key, version=version)
+            conn.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": NOTIFY_CHANNEL, "message": message})
+        self._see(key, version)
+
+    def _see(self, key: str, version: int):
+        self._seen[key] = max(version, self._seen.get(key, 0))
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                backoff = 1
+            except Exception as e:
+                logger.error(f"Invalidation bus listener error, reconnecting in {backoff}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        try:
+            connection = raw.driver_connection
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Anything published while we were not listening
+            self._resync()
+            while not self._stop.is_set():
+                if select.select([connection], [], [], settings.BUS_POLL_INTERVAL_SECONDS) != ([], [], []):
+                    connection.poll()
+                    while connection.notifies:
+                        message = json.loads(connection.notifies.pop(0).payload)
+                        self._see(message["key"], message.get("version", 0))
+                        self.bus.receive(message)
+                if datetime.now() - self._last_resync > timedelta(seconds=settings.BUS_RESYNC_SECONDS):
+                    self._resync()
+        finally:
+            raw.invalidate()
+
+    def _resync(self):
+        """
+        Apply table versions newer than the last ones this worker published
+        or received, including keys it has not heard of at all.
+        """
+        since = self._last_resync - timedelta(seconds=settings.BUS_RESYNC_SECONDS)
+        self._last_resync = datetime.now()
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT key, version FROM cache_versions WHERE updated_at >= :since"),
+                {"since": since},
+            ).all()
+        for key, version in rows:
+            if version > self._seen.get(key, 0):
+                self.bus.resynced += 1
+                self.bus._apply(key)
+                self._see(key, version)
+
+
+class VersionedCache:
+    """
+    Bounded in-process cache whose entries are tied to invalidation bus keys.
+
+    An entry is served only while its key's bus version is unchanged and it
+    is younger than `max_age`, which bounds staleness even if an invalidation
+    never arrives. Read the version with `bus.version(key)` *before* loading
+    and pass it to `set`, so an invalidation racing the load is not lost.
+    """
+
+    def __init__(self, name: str, bus: InvalidationBus, max_entries: int = 1024, max_age: float | None = None):
+        self.bus = bus
+        self.max_entries = max_entries
+        self.max_age = max_age if max_age is not None else settings.BUS_CACHE_MAX_AGE_SECONDS
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        register_metrics(f"cache.{name}", self.stats)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, version, filled_at = entry
+                if version == self.bus.version(key) and time.monotonic() - filled_at < self.max_age:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, version: int):
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self, key: str, loader: Callable[..., Any], *args, flight: SingleFlight | None = None
+    ) -> Any | None:
+        """
+        Cached value for `key`, or run `loader(*args)` in the threadpool (through
+        `flight` when given) and cache its result. None results are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def load():
+            # Captured in the loading thread, so callers joining a flight that
+            # started before an invalidation do not cache its result as fresh
+            return self.bus.version(key), loader(*args)
+
+        if flight is not None:
+            version, value = await flight.do(key, load)
+        else:
+            version, value = await run_in_threadpool(load)
+        if value is not None:
+            self.set(key, value, version)
+        return value
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+invalidation_bus = InvalidationBus()
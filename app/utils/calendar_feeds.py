@@ -0,0 +1,223 @@
+# app/utils/calendar_feeds.py
+
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from itertools import chain
+from typing import Iterator
+from uuid import UUID
+from fastapi import Request, Response, status
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Booking, CalendarFeedVersion, Space
+from .cache_bus import invalidation_bus, VersionedCache
+from .metrics import register_metrics
+
+# Bump when the generated calendars change shape, so clients fetch them again
+FEED_FORMAT_VERSION = 1
+# Booking columns shown in feeds; writes touching anything else leave feed versions alone
+FEED_ATTRIBUTES = ("start_time", "end_time", "status", "purpose", "space_id", "user_id")
+CHUNK_BYTES = 32 * 1024
+
+feed_versions = VersionedCache(
+    "calendar_feeds", invalidation_bus, max_entries=10_000, max_age=settings.CALENDAR_FEED_MAX_AGE_SECONDS
+)
+feed_stats = {"served": 0, "not_modified": 0}
+register_metrics("calendar_feeds", lambda: dict(feed_stats))
+
+
+def _feed_keys(session: Session) -> set[str]:
+    """Feeds covering the bookings this flush inserts, deletes or changes."""
+    keys = set()
+    for booking in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(booking, Booking):
+            continue
+        state = inspect(booking)
+        if booking in session.dirty and not any(state.attrs[name].history.has_changes() for name in FEED_ATTRIBUTES):
+            continue
+        for name, prefix in (("space_id", "space"), ("user_id", "user")):
+            history = state.attrs[name].history
+            # Old and new owner, should a booking move
+            keys.update(f"{prefix}:{value}" for value in chain(history.added, history.unchanged, history.deleted) if value)
+    return keys
+
+
+def _bump_feed_versions(session: Session, flush_context):
+    keys = _feed_keys(session)
+    if not keys:
+        return
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = datetime.now()
+    statement = insert(CalendarFeedVersion).values([
+        {"key": key, "version": 1, "updated_at": now} for key in sorted(keys)  # Sorted: no lock-order deadlocks
+    ])
+    session.connection().execute(statement.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"version": CalendarFeedVersion.version + 1, "updated_at": statement.excluded.updated_at},
+    ))
+    session.info.setdefault("calendar_feeds", set()).update(keys)
+
+
+def _publish_feed_versions(session: Session):
+    keys = session.info.pop("calendar_feeds", None)
+    if keys:
+        invalidation_bus.publish(*(f"calendar:{key}" for key in keys))
+
+
+def _discard_feed_versions(session: Session):
+    session.info.pop("calendar_feeds", None)
+
+
+# Every session, so no booking write can miss its feeds
+event.listen(SessionLocal, "after_flush", _bump_feed_versions)
+event.listen(SessionLocal, "after_commit", _publish_feed_versions)
+event.listen(SessionLocal, "after_rollback", _discard_feed_versions)
+
+
+def load_feed_version(key: str) -> tuple[int, datetime | None]:
+    db = SessionLocal()
+    try:
+        row = db.query(CalendarFeedVersion.version, CalendarFeedVersion.updated_at).filter(
+            CalendarFeedVersion.key == key
+        ).first()
+        return (row.version, row.updated_at) if row else (0, None)
+    finally:
+        db.close()
+
+
+async def feed_validators(request: Request, key: str, private: bool) -> tuple[Response | None, dict]:
+    """
+    ETag and Last-Modified of the feed `key` from its version, cached per
+    worker until a booking write invalidates it. Returns a 304 response if
+    the client's copy is current (None otherwise) and the headers for the feed.
+    """
+    version, updated_at = await feed_versions.get_or_load(f"calendar:{key}", load_feed_version, key)
+    headers = {
+        "ETag": f'"{FEED_FORMAT_VERSION}.{version}"',
+        "Cache-Control": f"{'private' if private else 'public'}, no-cache",
+    }
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = headers["ETag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    else:
+        fresh = False
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and updated_at is not None:
+            try:
+                fresh = updated_at.astimezone(timezone.utc).replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                pass
+    if fresh:
+        feed_stats["not_modified"] += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), headers
+    feed_stats["served"] += 1
+    return None, headers
+
+
+def user_feed_token(user_id: UUID) -> str:
+    """Secret part of a user's feed URL, so calendar apps can poll it without a login."""
+    key = hashlib.sha256(b"calendar-feed:" + settings.JWT_SECRET_KEY.encode()).digest()
+    return hmac.new(key, str(user_id).encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_user_feed_token(user_id: UUID, token: str) -> bool:
+    return hmac.compare_digest(user_feed_token(user_id), token)
+
+
+def _text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _line(name: str, value: str) -> bytes:
+    """One content line, folded at 75 octets as RFC 5545 requires."""
+    data = f"{name}:{value}".encode()
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74  # Continuation lines start with a space
+        while cut and (data[cut] & 0xC0) == 0x80:  # Never split a UTF-8 sequence
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+    parts.append(data)
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def _time(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")  # Floating: bookings are stored in local time
+
+
+def _calendar(name: str, rows, event_lines) -> Iterator[bytes]:
+    """The calendar in chunks of about CHUNK_BYTES; each chunk is one threadpool hop for the response."""
+    chunk = bytearray(b"".join((
+        _line("BEGIN", "VCALENDAR"),
+        _line("VERSION", "2.0"),
+        _line("PRODID", f"-//{_text(settings.APP_NAME)}//Bookings//EN"),
+        _line("CALSCALE", "GREGORIAN"),
+        _line("X-WR-CALNAME", _text(name)),
+        _line("REFRESH-INTERVAL;VALUE=DURATION", "PT15M"),
+    )))
+    for row in rows:
+        chunk += b"".join((
+            _line("BEGIN", "VEVENT"),
+            _line("UID", f"{row.id}@{settings.APP_NAME.lower()}"),
+            _line("DTSTAMP", _time(row.created_at)),
+            _line("DTSTART", _time(row.start_time)),
+            _line("DTEND", _time(row.end_time)),
+            _line("STATUS", "CONFIRMED" if row.status == "confirmed" else "TENTATIVE"),
+            *event_lines(row),
+            _line("END", "VEVENT"),
+        ))
+        if len(chunk) >= CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    chunk += _line("END", "VCALENDAR")
+    yield bytes(chunk)
+
+
+def space_calendar(space_id: UUID, space_name: str) -> Iterator[bytes]:
+    """
+    Stream a space's bookings as iCalendar, without who booked them or why.
+    Runs in the threadpool with its own session, reading rows in batches.
+    """
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Booking.id, Booking.start_time, Booking.end_time, Booking.status, Booking.created_at
+        ).filter(
+            Booking.space_id == space_id,
+            Booking.status != "canceled",
+            Booking.start_time >= datetime.now() - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS),
+        ).order_by(Booking.start_time).yield_per(500)
+        yield from _calendar(space_name, rows, lambda row: (_line("SUMMARY", "Booked"),))
+    finally:
+        db.close()
+
+
+def user_calendar(user_id: UUID) -> Iterator[bytes]:
+    """Stream a user's bookings as iCalendar, with the space and purpose of each."""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Booking.id, Booking.start_time, Booking.end_time, Booking.status, Booking.created_at,
+            Booking.purpose, Space.name.label("space_name"), Space.location,
+        ).join(Space, Space.id == Booking.space_id).filter(
+            Booking.user_id == user_id,
+            Booking.status != "canceled",
+            Booking.start_time >= datetime.now() - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS),
+        ).order_by(Booking.start_time).yield_per(500)
+        yield from _calendar(f"{settings.APP_NAME} bookings", rows, lambda row: (
+            _line("SUMMARY", _text(row.space_name)),
+            _line("LOCATION", _text(row.location or "")),
+            _line("DESCRIPTION", _text(row.purpose)),
+        ))
+    finally:
+        db.close()
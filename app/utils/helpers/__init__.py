@@ -1,4 +1,10 @@
 from .auth import get_current_user, admin_required
 from .seed import seed_admin
 from .txref_gen import create_random_key
-from .receipt_gen import generate_and_store_receipt_id
\ No newline at end of file
+from .receipt_gen import generate_and_store_receipt_id, assign_receipt_ids
+from .booking_lock import (
+    lock_space_for_booking,
+    find_conflicting_booking,
+    ensure_booking_exclusion_constraint,
+    booking_lock_strategy
+)
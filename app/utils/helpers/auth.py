@@ -8,7 +8,8 @@ from app.models import (
 )
 from app.utils import (
     logger,
-    verify_access_token
+    verify_access_token,
+    revocation_store
 )
 from app.database import get_db
 
@@ -53,6 +54,11 @@ async def get_current_user(
             logger.error("Invalid token payload: Missing 'sub' field.")
             raise credentials_exception
 
+        # In memory: logged-out sessions and tokens issued before a password change
+        if revocation_store.is_revoked(payload):
+            logger.warning(f"Revoked token presented by user '{username}'.")
+            raise credentials_exception
+
         db_user = db.query(User).filter(User.username == username).first()
         if not db_user or db_user.is_deleted:
             logger.warning(f"Unauthorized access attempt by user '{username}'.")
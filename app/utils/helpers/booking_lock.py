@@ -0,0 +1,102 @@
+# app/utils/helpers/booking_lock.py
+
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import func, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models import Booking, Space
+from app.config import settings
+from app.utils import logger
+
+LOCK_STRATEGIES = ("row", "advisory", "exclusion", "none")
+EXCLUSION_CONSTRAINT_NAME = "bookings_no_overlap"
+
+# Strategy in effect, once startup has checked what the database supports
+_effective_strategy: str | None = None
+
+
+def booking_lock_strategy() -> str:
+    """BOOKING_LOCK_STRATEGY, or the strategy it fell back to at startup."""
+    return _effective_strategy or settings.BOOKING_LOCK_STRATEGY
+
+
+def lock_space_for_booking(db: Session, space_id: UUID):
+    """
+    Serialize booking writes for one space until the current transaction ends.
+
+    Strategies (BOOKING_LOCK_STRATEGY):
+        row: lock the space row with SELECT ... FOR UPDATE.
+        advisory: take a transaction-scoped Postgres advisory lock keyed by the space.
+        exclusion: no lock; the database exclusion constraint rejects overlaps on commit.
+        none: no protection (only useful to benchmark the race).
+
+    SQLite has no row locks, so "row" and "advisory" take its database write
+    lock with a no-op update of the space row instead.
+    """
+    strategy = booking_lock_strategy()
+    if strategy in ("none", "exclusion"):
+        return
+
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(update(Space).where(Space.id == space_id).values(id=Space.id))
+    elif strategy == "advisory":
+        lock_key = int.from_bytes(space_id.bytes[:8], "big", signed=True)
+        db.execute(select(func.pg_advisory_xact_lock(lock_key)))
+    else:
+        db.query(Space.id).filter(Space.id == space_id).with_for_update().first()
+
+
+def find_conflicting_booking(
+    db: Session,
+    space_id: UUID,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_booking_id: UUID | None = None,
+) -> Booking | None:
+    """
+    Return a non-canceled booking of the space overlapping [start_time, end_time).
+    """
+    query = db.query(Booking).filter(
+        Booking.space_id == space_id,
+        Booking.status != "canceled",
+        Booking.start_time < end_time,
+        Booking.end_time > start_time,
+    )
+    if exclude_booking_id is not None:
+        query = query.filter(Booking.id != exclude_booking_id)
+    return query.first()
+
+
+def ensure_booking_exclusion_constraint(engine: Engine):
+    """
+    Install the overlap exclusion constraint when the "exclusion" strategy is used.
+
+    Requires Postgres with the btree_gist extension; other databases fall
+    back to the "row" strategy, leaving the settings untouched.
+    """
+    global _effective_strategy
+    _effective_strategy = settings.BOOKING_LOCK_STRATEGY
+    if _effective_strategy == "exclusion" and engine.dialect.name != "postgresql":
+        logger.warning("Exclusion constraints need Postgres, falling back to row locks.")
+        _effective_strategy = "row"
+    logger.info(f"Booking lock strategy: {_effective_strategy}.")
+    if _effective_strategy != "exclusion":
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+            {"name": EXCLUSION_CONSTRAINT_NAME},
+        ).first()
+        if exists:
+            return
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        conn.execute(
+            text(
+                f"ALTER TABLE bookings ADD CONSTRAINT {EXCLUSION_CONSTRAINT_NAME} "
+                "EXCLUDE USING gist (space_id WITH =, tsrange(start_time, end_time) WITH &&) "
+                "WHERE (status <> 'canceled')"
+            )
+        )
+    logger.info("Booking overlap exclusion constraint installed.")
@@ -2,26 +2,41 @@
 
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, Integer, cast
 from sqlalchemy.orm import Session
 from app.models import Booking
 
+RECEIPT_SEQUENCE_START = 1
+
 
 def generate_receipt_id(booking_id: UUID, created_at: datetime, sequence_number: int):
     return f"ORD-{created_at.year}-{sequence_number:03d}"
 
 
-def generate_and_store_receipt_id(db: Session, booking: Booking):
-    # Fetch the latest sequence number for the year
-    latest_sequence = db.query(func.max(Booking.receipt_id)).filter(
-        func.extract("year", Booking.created_at) == booking.created_at.year
+def latest_receipt_sequence(db: Session, year: int) -> int | None:
+    # Compare the numeric part, since "ORD-2024-999" sorts after "ORD-2024-1000" as a string
+    return db.query(
+        func.max(cast(func.substr(Booking.receipt_id, 10), Integer))
+    ).filter(
+        Booking.receipt_id.like(f"ORD-{year}-%")
     ).scalar()
 
-    if latest_sequence:
-        sequence_number = int(latest_sequence.split("-")[-1]) + 1
-    else:
-        sequence_number = 1
 
-    # Generate the receipt ID
-    booking.receipt_id = generate_receipt_id(booking.id, booking.created_at, sequence_number)
-    db.commit()
\ No newline at end of file
+def assign_receipt_ids(db: Session, bookings: list[Booking]):
+    """
+    Give each booking the next receipt ID of its year, reading the latest
+    sequence once per year for the whole batch. Does not commit.
+    """
+    next_sequence: dict[int, int] = {}
+    for booking in bookings:
+        year = booking.created_at.year
+        if year not in next_sequence:
+            latest_sequence = latest_receipt_sequence(db, year)
+            next_sequence[year] = latest_sequence + 1 if latest_sequence else RECEIPT_SEQUENCE_START
+        booking.receipt_id = generate_receipt_id(booking.id, booking.created_at, next_sequence[year])
+        next_sequence[year] += 1
+
+
+def generate_and_store_receipt_id(db: Session, booking: Booking):
+    assign_receipt_ids(db, [booking])
+    db.commit()
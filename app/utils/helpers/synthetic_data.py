@@ -0,0 +1,331 @@
+# app/utils/helpers/synthetic_data.py
+"""
+Generate high volumes of realistic users, spaces and bookings.
+
+    python -m app.utils.helpers.synthetic_data --users 100000 --spaces 2000 --bookings 10000000
+
+Bookings never overlap within a space (same rule as `create_booking`), get a
+realistic status mix for past and upcoming slots, and confirmed bookings get
+transaction and receipt ids. Rows are streamed in batches and written with
+COPY on Postgres and `executemany` elsewhere.
+"""
+
+import argparse
+import io
+import json
+import random
+import string
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+from uuid import UUID
+from sqlalchemy import func, Integer, cast
+from app.database import engine, Base, SessionLocal
+from app.models import User, Space, Booking
+from app.utils import hash_password, logger
+from .receipt_gen import generate_receipt_id, RECEIPT_SEQUENCE_START
+
+# Every synthetic user shares this password, hashed once per run
+SYNTHETIC_PASSWORD = "Synthetic123"
+DEFAULT_BATCH_SIZE = 20000
+TX_REF_CHARS = string.ascii_uppercase + string.digits
+PURPOSES = [
+    "Team meeting",
+    "Client presentation",
+    "Workshop",
+    "Interview",
+    "Training session",
+    "Board meeting",
+    "Product demo",
+    "Hackathon",
+]
+AMENITIES = ["WiFi", "Projector", "Whiteboard", "Air conditioning", "Coffee", "TV screen", "Sound system"]
+LOCATIONS = ["Lagos", "Abuja", "Port Harcourt", "Ibadan", "Kano", "Enugu"]
+
+USER_COLUMNS = [
+    "id", "username", "email", "password", "phone_number", "is_admin",
+    "joined_at", "last_login", "failed_login_attempts", "is_active", "is_deleted",
+]
+SPACE_COLUMNS = [
+    "id", "name", "description", "capacity", "is_available", "location",
+    "amenities", "hourly_rate", "created_at", "images",
+]
+BOOKING_COLUMNS = [
+    "id", "receipt_id", "user_id", "space_id", "start_time", "end_time", "status",
+    "total_cost", "purpose", "tx_ref", "transaction_id", "created_at",
+]
+
+
+def synthetic_email(index: int) -> str:
+    return f"synthetic{index}@example.com"
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_users(rng: random.Random, count: int, first_index: int, password_hash: str, now: datetime) -> Iterator[dict]:
+    for index in range(first_index, first_index + count):
+        joined_at = now - timedelta(days=rng.randint(0, 730), seconds=rng.randint(0, 86399))
+        yield {
+            "id": _uuid(rng),
+            "username": f"synthetic_user_{index}",
+            "email": synthetic_email(index),
+            "password": password_hash,
+            "phone_number": f"+234{rng.randint(7000000000, 9099999999)}",
+            "is_admin": False,
+            "joined_at": joined_at,
+            "last_login": None,
+            "failed_login_attempts": 0,
+            "is_active": True,
+            "is_deleted": False,
+        }
+
+
+def generate_spaces(rng: random.Random, count: int, first_index: int, now: datetime) -> Iterator[dict]:
+    for index in range(first_index, first_index + count):
+        location = rng.choice(LOCATIONS)
+        yield {
+            "id": _uuid(rng),
+            "name": f"Synthetic Space {index}",
+            "description": f"Synthetic space {index} in {location}",
+            "capacity": rng.choice([4, 6, 8, 12, 20, 50, 100, 250]),
+            "is_available": rng.random() > 0.05,
+            "location": location,
+            "amenities": rng.sample(AMENITIES, rng.randint(1, 4)),
+            "hourly_rate": float(rng.choice([1500, 2500, 5000, 7500, 10000, 25000])),
+            "created_at": now - timedelta(days=rng.randint(365, 1095)),
+            "images": [],
+        }
+
+
+class BookingSequences:
+    """Hands out transaction ids and per-year receipt sequence numbers."""
+
+    def __init__(self, next_transaction_id: int, receipt_sequences: dict[int, int]):
+        self.next_transaction_id = next_transaction_id
+        self.receipt_sequences = defaultdict(lambda: RECEIPT_SEQUENCE_START, receipt_sequences)
+
+    def transaction_id(self) -> int:
+        self.next_transaction_id += 1
+        return self.next_transaction_id - 1
+
+    def receipt_id(self, created_at: datetime) -> str:
+        sequence = self.receipt_sequences[created_at.year]
+        self.receipt_sequences[created_at.year] = sequence + 1
+        return generate_receipt_id(None, created_at, sequence)
+
+
+def _status_for(rng: random.Random, end_time: datetime, now: datetime) -> str:
+    roll = rng.random()
+    if end_time <= now:
+        # Past bookings: stale pending ones are cleaned up hourly, so they are rare
+        return "confirmed" if roll < 0.83 else "canceled" if roll < 0.98 else "pending"
+    return "confirmed" if roll < 0.6 else "pending" if roll < 0.9 else "canceled"
+
+
+def generate_bookings(
+    rng: random.Random,
+    spaces: list[tuple[UUID, float]],
+    user_ids: list[UUID],
+    per_space: int,
+    window_start: datetime,
+    window_end: datetime,
+    now: datetime,
+    sequences: BookingSequences,
+) -> Iterator[dict]:
+    """
+    Walk each space's timeline from `window_start`, placing back-to-back or
+    gapped bookings of whole hours so no two bookings of a space overlap.
+    """
+    window_hours = (window_end - window_start).total_seconds() / 3600
+    mean_gap_hours = max(window_hours / max(per_space, 1) - 2.5, 0)
+
+    for space_id, hourly_rate in spaces:
+        cursor = window_start + timedelta(minutes=30 * rng.randint(0, 16))
+        for _ in range(per_space):
+            if mean_gap_hours:
+                gap = rng.expovariate(1 / mean_gap_hours)
+                cursor += timedelta(minutes=30 * int(gap * 2))
+            hours = rng.choice([1, 1, 2, 2, 2, 3, 4])
+            start_time = cursor
+            end_time = start_time + timedelta(hours=hours)
+            cursor = end_time
+
+            status = _status_for(rng, end_time, now)
+            created_at = min(now, start_time - timedelta(days=rng.randint(0, 30), minutes=rng.randint(1, 1440)))
+            has_tx_ref = status == "confirmed" or rng.random() < 0.5
+            yield {
+                "id": _uuid(rng),
+                "receipt_id": sequences.receipt_id(created_at) if status == "confirmed" else None,
+                "user_id": user_ids[rng.randrange(len(user_ids))],
+                "space_id": space_id,
+                "start_time": start_time,
+                "end_time": end_time,
+                "status": status,
+                "total_cost": hours * hourly_rate,
+                "purpose": rng.choice(PURPOSES),
+                "tx_ref": "".join(rng.choices(TX_REF_CHARS, k=24)) if has_tx_ref else None,
+                "transaction_id": sequences.transaction_id() if status == "confirmed" else None,
+                "created_at": created_at,
+            }
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat(sep=" ")
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def _copy_rows(conn, table, columns: list[str], rows: list[dict]):
+    """Write a batch with Postgres COPY (psycopg2 or psycopg 3)."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+        buffer.write("\n")
+    sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def write_rows(table, columns: list[str], rows: Iterable[dict], batch_size: int) -> int:
+    """Insert rows in batches, one transaction per batch. Returns the row count."""
+    use_copy = engine.dialect.name == "postgresql"
+    written = 0
+    started = time.perf_counter()
+    for batch in _batches(rows, batch_size):
+        with engine.begin() as conn:
+            if use_copy:
+                _copy_rows(conn, table, columns, batch)
+            else:
+                conn.execute(table.insert(), batch)
+        written += len(batch)
+        elapsed = time.perf_counter() - started
+        logger.info(f"{table.name}: {written} rows ({written / elapsed:,.0f} rows/s)")
+    return written
+
+
+def _existing_state(db) -> tuple[int, int, int, dict[int, int]]:
+    """Offsets that let repeated runs append without unique violations."""
+    user_count = db.query(func.count(User.id)).scalar()
+    space_count = db.query(func.count(Space.id)).scalar()
+    max_transaction_id = db.query(func.max(Booking.transaction_id)).scalar() or 0
+    receipt_sequence = cast(func.substr(Booking.receipt_id, 10), Integer)
+    receipt_sequences = {
+        int(year): int(sequence) + 1
+        for year, sequence in db.query(
+            func.substr(Booking.receipt_id, 5, 4), func.max(receipt_sequence)
+        )
+        .filter(Booking.receipt_id.isnot(None))
+        .group_by(func.substr(Booking.receipt_id, 5, 4))
+        .all()
+    }
+    return user_count, space_count, max_transaction_id + 1, receipt_sequences
+
+
+def seed_synthetic_data(
+    users: int,
+    spaces: int,
+    bookings_per_space: int,
+    days_back: int = 365,
+    days_ahead: int = 90,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    seed: int = 42,
+) -> dict:
+    """
+    Append synthetic users, spaces and bookings to the configured database.
+    Returns the inserted volumes and timings.
+    """
+    now = datetime.now()
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        first_user, first_space, next_transaction_id, receipt_sequences = _existing_state(db)
+    finally:
+        db.close()
+
+    # Reproducible for a given seed and starting point; appending runs get fresh ids
+    rng = random.Random(f"{seed}:{first_user}:{first_space}")
+
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+    user_rows = list(generate_users(rng, users, first_user, password_hash, now))
+    space_rows = list(generate_spaces(rng, spaces, first_space, now))
+    write_rows(User.__table__, USER_COLUMNS, user_rows, batch_size)
+    write_rows(Space.__table__, SPACE_COLUMNS, space_rows, batch_size)
+
+    sequences = BookingSequences(next_transaction_id, receipt_sequences)
+    booking_count = write_rows(
+        Booking.__table__,
+        BOOKING_COLUMNS,
+        generate_bookings(
+            rng,
+            [(space["id"], space["hourly_rate"]) for space in space_rows],
+            [user["id"] for user in user_rows],
+            bookings_per_space,
+            now - timedelta(days=days_back),
+            now + timedelta(days=days_ahead),
+            now,
+            sequences,
+        ),
+        batch_size,
+    )
+    return {
+        "users": len(user_rows),
+        "spaces": len(space_rows),
+        "bookings": booking_count,
+        "first_user_index": first_user,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--spaces", type=int, default=500)
+    parser.add_argument("--bookings", type=int, help="Total bookings, spread evenly over the spaces")
+    parser.add_argument("--bookings-per-space", type=int, default=1000)
+    parser.add_argument("--days-back", type=int, default=365, help="How far into the past bookings start")
+    parser.add_argument("--days-ahead", type=int, default=90, help="How far into the future bookings are spread")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+    args = parser.parse_args()
+
+    if args.users < 1 or args.spaces < 1:
+        parser.error("--users and --spaces must be at least 1")
+    per_space = args.bookings // args.spaces if args.bookings else args.bookings_per_space
+    result = seed_synthetic_data(
+        args.users, args.spaces, per_space, args.days_back, args.days_ahead, args.batch_size, args.seed
+    )
+    logger.info(f"Synthetic data generated: {result}")
+
+
+if __name__ == "__main__":
+    main()
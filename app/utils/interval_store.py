@@ -0,0 +1,111 @@
+# app/utils/interval_store.py
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Sequence
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.models import Booking
+
+# Upper bound for open-ended queries, in epoch seconds
+FOREVER = 2**62
+
+
+def epoch(value: datetime) -> int:
+    """Naive local datetime to epoch seconds, the unit used by interval stores."""
+    return int(value.timestamp())
+
+
+class IntervalStore:
+    """
+    Busy intervals of one space as parallel int64 arrays of epoch seconds,
+    sorted by start (about 16 bytes per interval instead of an ORM object).
+
+    Overlap queries bisect on the starts: anything overlapping [start, end)
+    begins before `end` and no earlier than `start - max_length`, so only that
+    window is scanned. Stores built over read-only buffers (e.g. a mapped
+    catalog snapshot) can be queried but not modified.
+    """
+
+    __slots__ = ("starts", "ends", "max_length")
+
+    def __init__(self, starts: Sequence[int] | None = None, ends: Sequence[int] | None = None, max_length: int | None = None):
+        self.starts = starts if starts is not None else array("q")
+        self.ends = ends if ends is not None else array("q")
+        if max_length is None:
+            max_length = max((e - s for s, e in zip(self.starts, self.ends)), default=0)
+        self.max_length = max_length
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[int, int]]) -> "IntervalStore":
+        """Bulk load from (start, end) pairs in any order."""
+        starts, ends = array("q"), array("q")
+        for start, end in sorted(pairs):
+            starts.append(start)
+            ends.append(end)
+        return cls(starts, ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.starts) * 16
+
+    def overlapping(self, start: int, end: int) -> list[tuple[int, int]]:
+        """Intervals overlapping [start, end), in start order."""
+        starts, ends = self.starts, self.ends
+        low = bisect_left(starts, start - self.max_length)
+        high = bisect_left(starts, end, low)
+        return [(starts[i], ends[i]) for i in range(low, high) if ends[i] > start]
+
+    def is_free(self, start: int, end: int) -> bool:
+        starts, ends = self.starts, self.ends
+        low = bisect_left(starts, start - self.max_length)
+        high = bisect_left(starts, end, low)
+        return not any(ends[i] > start for i in range(low, high))
+
+    def insert(self, start: int, end: int):
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.max_length = max(self.max_length, end - start)
+
+    def delete(self, start: int, end: int) -> bool:
+        """Remove one (start, end) interval; False if it is not stored."""
+        starts, ends = self.starts, self.ends
+        for index in range(bisect_left(starts, start), bisect_right(starts, start)):
+            if ends[index] == end:
+                del starts[index]
+                del ends[index]
+                # max_length is left as is: a loose bound only widens the scan
+                return True
+        return False
+
+
+def load_interval_stores(
+    db: Session, since: datetime | None = None, space_id: UUID | None = None
+) -> dict[UUID, IntervalStore]:
+    """
+    Bulk load non-canceled bookings ending after `since` into one store per space,
+    reading only the three columns needed.
+    """
+    query = db.query(Booking.space_id, Booking.start_time, Booking.end_time).filter(
+        Booking.status != "canceled"
+    )
+    if since is not None:
+        query = query.filter(Booking.end_time >= since)
+    if space_id is not None:
+        query = query.filter(Booking.space_id == space_id)
+
+    stores: dict[UUID, IntervalStore] = defaultdict(IntervalStore)
+    for row_space_id, start_time, end_time in query.order_by(Booking.space_id, Booking.start_time).yield_per(10_000):
+        store = stores[row_space_id]
+        start, end = epoch(start_time), epoch(end_time)
+        # Rows arrive sorted, so appending keeps the arrays ordered
+        store.starts.append(start)
+        store.ends.append(end)
+        store.max_length = max(store.max_length, end - start)
+    return dict(stores)
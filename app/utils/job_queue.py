@@ -0,0 +1,248 @@
+# app/utils/job_queue.py
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import uuid4
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Job
+from .logging_config import logger
+from .metrics import register_metrics
+
+
+@dataclass(frozen=True, slots=True)
+class JobHandler:
+    kind: str
+    fn: Callable[[Session, list[dict]], Callable[[], None] | None]
+    batch_size: int
+    max_attempts: int
+
+
+class JobQueue:
+    """
+    Durable job queue in the jobs table, worked by asyncio tasks in every worker.
+
+    `enqueue` adds a job to the caller's transaction, so it exists exactly
+    when the state change that needs it commits. Workers claim runnable
+    jobs of one kind in batches (FOR UPDATE SKIP LOCKED on Postgres; a
+    conditional UPDATE keeps SQLite claims exclusive too) under a lease, and
+    run the handler in a thread. A handler gets the payloads of the batch
+    and a session; its changes and the jobs' completion commit together,
+    and a callable it returns runs after that commit (e.g. to publish
+    invalidations).
+    A failed batch is retried job by job, so one bad job cannot hold back
+    the others; failed jobs back off exponentially and are dead-lettered
+    after `max_attempts`. Jobs whose worker died are claimed again once
+    their lease runs out, so handlers must be idempotent.
+    """
+
+    def __init__(self):
+        self.enabled = settings.JOB_QUEUE_ENABLED
+        self.handlers: dict[str, JobHandler] = {}
+        self.claimed = 0
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._next_kind = 0
+        register_metrics("job_queue", self.stats)
+
+    def handler(self, kind: str, batch_size: int = 1, max_attempts: int | None = None):
+        """Register the decorated function(db, payloads) as the handler of `kind` jobs."""
+        def register(fn):
+            self.handlers[kind] = JobHandler(kind, fn, batch_size, max_attempts or settings.JOB_MAX_ATTEMPTS)
+            return fn
+        return register
+
+    def enqueue(self, db: Session, kind: str, payload: dict, delay_seconds: float = 0) -> Job:
+        """Add a job to `db`'s transaction; call `notify` after committing it."""
+        handler = self.handlers.get(kind)
+        job = Job(
+            kind=kind,
+            payload=payload,
+            max_attempts=handler.max_attempts if handler else settings.JOB_MAX_ATTEMPTS,
+            run_at=datetime.now() + timedelta(seconds=delay_seconds),
+        )
+        db.add(job)
+        return job
+
+    def notify(self):
+        """Wake this worker's job tasks instead of waiting for their next poll."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(settings.JOB_WORKERS)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    async def _work(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                ran = await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Error running background jobs: {e}")
+                ran = False
+            if not ran:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    def run_once(self) -> bool:
+        """Claim and run one batch, trying each kind in turn; False if nothing was runnable."""
+        kinds = list(self.handlers)
+        for i in range(len(kinds)):
+            handler = self.handlers[kinds[(self._next_kind + i) % len(kinds)]]
+            jobs = self.claim(handler.kind, handler.batch_size)
+            if jobs:
+                self._next_kind = (self._next_kind + i + 1) % len(kinds)
+                self._execute(handler, jobs)
+                return True
+        return False
+
+    def claim(self, kind: str, limit: int) -> list[Job]:
+        now = datetime.now()
+        token = uuid4().hex
+        runnable = or_(Job.status == "queued", and_(Job.status == "running", Job.locked_until < now))
+        db = SessionLocal()
+        try:
+            ids = [
+                job_id for (job_id,) in db.query(Job.id).filter(
+                    Job.kind == kind, Job.run_at <= now, runnable
+                ).order_by(Job.run_at).limit(limit).with_for_update(skip_locked=True)
+            ]
+            if not ids:
+                db.rollback()
+                return []
+            db.execute(
+                update(Job).where(Job.id.in_(ids), runnable).values(
+                    status="running",
+                    claimed_by=token,
+                    attempts=Job.attempts + 1,
+                    locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                ).execution_options(synchronize_session=False)
+            )
+            db.commit()
+            jobs = db.query(Job).filter(Job.claimed_by == token).order_by(Job.id).all()
+            db.expunge_all()
+        finally:
+            db.close()
+        self.claimed += len(jobs)
+        return jobs
+
+    def _execute(self, handler: JobHandler, jobs: list[Job]):
+        db = SessionLocal()
+        try:
+            after_commit = handler.fn(db, [job.payload for job in jobs])
+            db.execute(
+                update(Job).where(
+                    Job.id.in_([job.id for job in jobs]), Job.claimed_by == jobs[0].claimed_by
+                ).values(status="done", finished_at=datetime.now(), locked_until=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            self.completed += len(jobs)
+        except Exception as e:
+            db.rollback()
+            if len(jobs) > 1:
+                # Isolate the failing job(s) from the rest of the batch
+                for job in jobs:
+                    self._execute(handler, [job])
+            else:
+                self._fail(jobs[0], e)
+            return
+        finally:
+            db.close()
+        if callable(after_commit):
+            try:
+                after_commit()
+            except Exception as e:
+                logger.error(f"Error after completing {handler.kind} jobs: {e}")
+        self.notify()  # The handler may have queued follow-up jobs
+
+    def _fail(self, job: Job, error: Exception):
+        values = {"locked_until": None, "last_error": f"{type(error).__name__}: {error}"}
+        if job.attempts >= job.max_attempts:
+            values.update(status="dead", finished_at=datetime.now())
+            self.dead += 1
+            logger.error(f"Job {job.id} ({job.kind}) dead-lettered after {job.attempts} attempts: {error}")
+        else:
+            delay = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+            values.update(status="queued", run_at=datetime.now() + timedelta(seconds=delay * random.uniform(0.5, 1)))
+            self.retried += 1
+            logger.warning(f"Job {job.id} ({job.kind}) failed, retrying in {delay:.0f}s: {error}")
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job).where(Job.id == job.id, Job.claimed_by == job.claimed_by).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def absorb(
+        self, db: Session, kind: str, accept: Callable[[dict], bool], due_within: float, limit: int = 1000
+    ) -> list[dict]:
+        """
+        Fold queued `kind` jobs due within `due_within` seconds whose payload
+        `accept`s into the batch a handler is running: they complete (or roll
+        back) with `db`'s transaction. Returns their payloads.
+        """
+        now = datetime.now()
+        candidates = [
+            (job_id, payload) for job_id, payload in db.query(Job.id, Job.payload).filter(
+                Job.kind == kind, Job.status == "queued", Job.run_at <= now + timedelta(seconds=due_within)
+            ).order_by(Job.run_at).limit(limit)
+            if accept(payload)
+        ]
+        absorbed = []
+        for job_id, payload in candidates:
+            # Skip jobs another worker claimed in the meantime
+            if db.execute(
+                update(Job).where(Job.id == job_id, Job.status == "queued").values(status="done", finished_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount:
+                absorbed.append(payload)
+        return absorbed
+
+    def requeue(self, db: Session, job_id: int) -> bool:
+        """Give a dead-lettered job a fresh set of attempts."""
+        requeued = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == "dead").values(
+                status="queued", attempts=0, run_at=datetime.now(), finished_at=None, claimed_by=None
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return bool(requeued)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "workers": len(self._tasks),
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+
+job_queue = JobQueue()
@@ -0,0 +1,16 @@
+# app/utils/metrics.py
+
+from typing import Callable
+
+# Name -> function returning a snapshot of that component's counters
+_collectors: dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, collector: Callable[[], dict]):
+    """Expose a component's counters under `name` in the admin metrics endpoint."""
+    _collectors[name] = collector
+
+
+def collect_metrics() -> dict:
+    """Snapshot of every registered component's counters for this worker."""
+    return {name: collector() for name, collector in sorted(_collectors.items())}
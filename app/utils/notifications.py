@@ -0,0 +1,190 @@
+# app/utils/notifications.py
+
+import json
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from uuid import UUID
+from app.config import settings
+from .logging_config import logger
+from .metrics import register_metrics
+
+
+@dataclass(frozen=True, slots=True)
+class Notification:
+    """One message to one recipient; `ref` identifies what it is about (e.g. a booking id)."""
+
+    ref: UUID
+    email: str
+    subject: str
+    body: str
+
+
+class Notifier:
+    """
+    Delivers notifications in batches. `send` returns the refs that were
+    delivered; anything else may be retried by the caller.
+    """
+
+    name = "base"
+
+    def send(self, notifications: list[Notification]) -> set[UUID]:
+        raise NotImplementedError
+
+
+class FileNotifier(Notifier):
+    """Appends notifications as JSON lines to a local outbox file (development stand-in)."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notifications: list[Notification]) -> set[UUID]:
+        lines = "".join(
+            json.dumps({
+                "ref": str(n.ref),
+                "to": n.email,
+                "subject": n.subject,
+                "body": n.body,
+                "sent_at": datetime.now().isoformat(),
+            }) + "\n"
+            for n in notifications
+        )
+        with self._lock, open(self.path, "a") as outbox:
+            outbox.write(lines)
+        return {n.ref for n in notifications}
+
+
+class SMTPPool:
+    """
+    Up to SMTP_POOL_SIZE SMTP connections, reused across batches. Taking a
+    connection blocks while all of them are busy, which throttles senders
+    to what the pool (and the mail server) can take. A connection idle for
+    longer than SMTP_IDLE_SECONDS is checked with NOOP before reuse.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.opened = 0
+        self.reused = 0
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _open(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        if settings.SMTP_USE_TLS:
+            smtp.starttls()
+        if settings.SMTP_USERNAME:
+            smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        self.opened += 1
+        return smtp
+
+    def _take(self) -> smtplib.SMTP:
+        with self._lock:
+            smtp, idle_since = self._idle.pop() if self._idle else (None, 0.0)
+        if smtp is not None and time.monotonic() - idle_since > settings.SMTP_IDLE_SECONDS:
+            try:
+                if smtp.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except (smtplib.SMTPException, OSError):
+                self._close(smtp)
+                smtp = None
+        if smtp is None:
+            return self._open()
+        self.reused += 1
+        return smtp
+
+    def _close(self, smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            smtp = self._take()
+            try:
+                yield smtp
+            except Exception:
+                self._close(smtp)  # State unknown; the next user opens a fresh one
+                raise
+            with self._lock:
+                self._idle.append((smtp, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            self._close(smtp)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": len(self._idle), "opened": self.opened, "reused": self.reused}
+
+
+class SMTPNotifier(Notifier):
+    """
+    Sends a batch over the pooled SMTP connections, split across up to
+    SMTP_POOL_SIZE connections in parallel.
+    """
+
+    name = "smtp"
+
+    def __init__(self):
+        self.pool = SMTPPool(settings.SMTP_POOL_SIZE)
+        self._executor = ThreadPoolExecutor(max_workers=settings.SMTP_POOL_SIZE, thread_name_prefix="smtp")
+        register_metrics("smtp_pool", self.pool.stats)
+
+    def _send_chunk(self, notifications: list[Notification]) -> set[UUID]:
+        delivered = set()
+        try:
+            with self.pool.connection() as smtp:
+                for n in notifications:
+                    message = EmailMessage()
+                    message["From"] = settings.MAIL_FROM
+                    message["To"] = n.email
+                    message["Subject"] = n.subject
+                    message.set_content(n.body)
+                    try:
+                        smtp.send_message(message)
+                        delivered.add(n.ref)
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                        logger.error(f"Failed to send notification {n.ref} to {n.email}: {e}")
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"SMTP connection failed after {len(delivered)}/{len(notifications)} messages: {e}")
+        return delivered
+
+    def send(self, notifications: list[Notification]) -> set[UUID]:
+        if not notifications:
+            return set()
+        chunk_size = -(-len(notifications) // self.pool.size)
+        chunks = [notifications[i:i + chunk_size] for i in range(0, len(notifications), chunk_size)]
+        delivered = set()
+        for chunk_delivered in self._executor.map(self._send_chunk, chunks):
+            delivered |= chunk_delivered
+        return delivered
+
+
+_notifier: Notifier | None = None
+
+
+def build_notifier() -> Notifier:
+    """The notifier selected by NOTIFIER_BACKEND, shared by everything sending in this worker."""
+    global _notifier
+    if _notifier is None:
+        if settings.NOTIFIER_BACKEND == "smtp":
+            _notifier = SMTPNotifier()
+        else:
+            _notifier = FileNotifier(settings.NOTIFIER_OUTBOX_PATH)
+    return _notifier
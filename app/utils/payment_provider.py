@@ -0,0 +1,142 @@
+# app/utils/payment_provider.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import settings
+from .metrics import register_metrics
+
+
+@dataclass(frozen=True, slots=True)
+class ProviderTransaction:
+    """A transaction as the payment provider reports it."""
+
+    tx_ref: str
+    transaction_id: int
+    status: str  # successful, failed or pending
+    amount: float
+    currency: str
+
+
+class PaymentProviderError(Exception):
+    """The provider could not be asked, or gave an answer we cannot use."""
+
+
+class FlutterwaveClient:
+    """
+    Verifies transactions with the provider's API
+    (GET /transactions/verify_by_reference).
+
+    Requests go through one pooled session keeping up to `concurrency`
+    connections alive, and `verify_many` runs at most `concurrency` of them
+    at once, so a large batch is neither serialized nor allowed to flood
+    the provider. Idempotent GETs are retried on 429 and 5xx with backoff.
+    """
+
+    name = "flutterwave"
+
+    def __init__(self, base_url: str, secret_key: str, concurrency: int, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {secret_key}"
+        retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(429, 502, 503, 504), allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="payment-verify")
+        self.requests = 0
+        self.failures = 0
+        self.request_seconds = 0.0
+
+    def verify(self, tx_ref: str) -> ProviderTransaction | None:
+        """The provider's transaction for `tx_ref`, or None if it has none."""
+        started = time.perf_counter()
+        try:
+            response = self.session.get(
+                f"{self.base_url}/transactions/verify_by_reference",
+                params={"tx_ref": tx_ref},
+                timeout=self.timeout,
+            )
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.failures += 1
+            raise PaymentProviderError(f"Verifying {tx_ref} failed: {e}") from e
+        finally:
+            self.requests += 1
+            self.request_seconds += time.perf_counter() - started
+
+        if response.status_code in (400, 404) and body.get("status") == "error":
+            return None  # "No transaction was found for this id"
+        data = body.get("data")
+        if response.status_code != 200 or not isinstance(data, dict):
+            self.failures += 1
+            raise PaymentProviderError(f"Verifying {tx_ref} returned HTTP {response.status_code}")
+        try:
+            transaction = ProviderTransaction(
+                tx_ref=str(data["tx_ref"]),
+                transaction_id=int(data["id"]),
+                status=str(data["status"]),
+                amount=float(data["amount"]),
+                currency=str(data["currency"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            self.failures += 1
+            raise PaymentProviderError(f"Unexpected verification response for {tx_ref}: {e}") from e
+        if transaction.tx_ref != tx_ref:
+            self.failures += 1
+            raise PaymentProviderError(f"Verification of {tx_ref} returned tx_ref {transaction.tx_ref}")
+        return transaction
+
+    def verify_many(self, tx_refs: list[str]) -> tuple[dict[str, ProviderTransaction | None], set[str]]:
+        """
+        Verify `tx_refs` concurrently. Returns the answers by tx_ref and the
+        tx_refs that could not be verified this time.
+        """
+        def attempt(tx_ref):
+            try:
+                return tx_ref, self.verify(tx_ref), None
+            except PaymentProviderError as e:
+                return tx_ref, None, e
+
+        verified, failed = {}, set()
+        for tx_ref, transaction, error in self._executor.map(attempt, tx_refs):
+            if error is None:
+                verified[tx_ref] = transaction
+            else:
+                failed.add(tx_ref)
+        return verified, failed
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "mean_request_ms": round(1000 * self.request_seconds / self.requests, 1) if self.requests else None,
+        }
+
+
+_provider: FlutterwaveClient | None = None
+_provider_lock = threading.Lock()
+
+
+def build_payment_provider() -> FlutterwaveClient | None:
+    """The provider client shared by this worker; None while PAYMENT_PROVIDER_SECRET_KEY is unset."""
+    global _provider
+    if not settings.PAYMENT_PROVIDER_SECRET_KEY:
+        return None
+    with _provider_lock:
+        if _provider is None:
+            _provider = FlutterwaveClient(
+                settings.PAYMENT_PROVIDER_URL,
+                settings.PAYMENT_PROVIDER_SECRET_KEY,
+                settings.PAYMENT_RECONCILE_CONCURRENCY,
+                settings.PAYMENT_PROVIDER_TIMEOUT_SECONDS,
+            )
+            register_metrics("payment_provider", _provider.stats)
+    return _provider
@@ -0,0 +1,300 @@
+# app/utils/payments.py
+
+import base64
+import hashlib
+import hmac
+import json
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import UUID
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Booking, PaymentEvent, Space
+from .logging_config import logger
+from .cache_bus import invalidation_bus
+from .job_queue import job_queue
+from .booking_notifications import notify_booking_event
+from .waitlist import queue_waitlist_promotion
+from .audit import audit_trail
+from .metrics import register_metrics
+from .payment_provider import build_payment_provider
+
+# Job kind applying stored webhook events
+PAYMENT_EVENTS_JOB = "payment_events"
+# Job kind reconciling one page of pending bookings with the provider
+RECONCILE_JOB = "reconcile_payments"
+# Format of the references issued by create_random_key
+TX_REF_PATTERN = re.compile(r"[A-Z0-9]{24}")
+
+
+def verify_webhook_signature(body: bytes, verif_hash: str | None, signature: str | None) -> bool:
+    """
+    Check a webhook against PAYMENT_WEBHOOK_SECRET_HASH, either as Flutterwave's
+    `verif-hash` header (the secret itself) or as a base64 HMAC-SHA256 of the
+    body in `flutterwave-signature`. Rejects everything while no secret is set.
+    """
+    secret = settings.PAYMENT_WEBHOOK_SECRET_HASH
+    if not secret:
+        return False
+    if signature:
+        expected = base64.b64encode(hmac.new(secret.encode(), body, hashlib.sha256).digest()).decode()
+        return hmac.compare_digest(signature, expected)
+    return verif_hash is not None and hmac.compare_digest(verif_hash, secret)
+
+
+def parse_payment_event(body: bytes) -> PaymentEvent:
+    """
+    Build the stored event from a raw Flutterwave-style body. Fields that are
+    missing or malformed stay empty; processing then ignores the event.
+    """
+    payload = json.loads(body)
+    data = payload.get("data") if isinstance(payload, dict) else None
+    data = data if isinstance(data, dict) else {}
+
+    def number(value, kind):
+        try:
+            return kind(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    return PaymentEvent(
+        provider="flutterwave",
+        event_type=payload.get("event") if isinstance(payload, dict) else None,
+        tx_ref=str(data["tx_ref"])[:64] if data.get("tx_ref") else None,
+        transaction_id=number(data.get("id"), int),
+        status=str(data.get("status")) if data.get("status") else None,
+        amount=number(data.get("amount"), float),
+        currency=str(data.get("currency")) if data.get("currency") else None,
+        body=body.decode("utf-8", errors="replace"),
+    )
+
+
+def apply_payment(db: Session, booking: Booking, transaction_id: int, amount: float | None,
+                  currency: str | None, used_by: dict[int, UUID]) -> bool:
+    """
+    Confirm the locked `booking` with a successful charge if it is pending,
+    the amount and currency cover it and `transaction_id` is not used by
+    another booking (`used_by` maps transaction ids to their bookings and is
+    updated). Queues the receipt and notification jobs. Returns whether the
+    booking was confirmed; a redelivery of the applied charge returns False.
+    """
+    if booking.status == "confirmed":
+        if booking.transaction_id != transaction_id:
+            logger.warning(
+                f"Second payment {transaction_id} for confirmed booking {booking.id} (tx_ref {booking.tx_ref})."
+            )
+        return False
+    if booking.status != "pending":
+        logger.warning(f"Payment {transaction_id} for {booking.status} booking {booking.id} ignored.")
+        return False
+    if currency != settings.PAYMENT_CURRENCY or (amount or 0) < booking.total_cost:
+        logger.warning(
+            f"Payment {transaction_id} of {amount} {currency} does not cover "
+            f"booking {booking.id} ({booking.total_cost} {settings.PAYMENT_CURRENCY})."
+        )
+        return False
+    if used_by.get(transaction_id, booking.id) != booking.id:
+        logger.warning(f"Transaction {transaction_id} already used, booking {booking.id} not confirmed.")
+        return False
+
+    booking.status = "confirmed"
+    booking.transaction_id = transaction_id
+    used_by[transaction_id] = booking.id
+    job_queue.enqueue(db, "assign_receipt", {"booking_id": str(booking.id)})
+    notify_booking_event(db, booking, "confirmed")
+    return True
+
+
+def record_confirmations(confirmed: list[tuple]):
+    """Audit bookings confirmed by the provider, as (booking id, transaction id) pairs."""
+    for booking_id, transaction_id in confirmed:
+        audit_trail.record(None, "booking.confirm", "booking", booking_id, {
+            "status": ["pending", "confirmed"], "transaction_id": [None, transaction_id],
+        })
+
+
+def process_payment_events(db: Session, payloads: list[dict]) -> Callable[[], None] | None:
+    """
+    Apply a batch of stored webhook events, grouped by tx_ref, with one
+    locking query for all their bookings.
+
+    A successful charge confirms the pending booking with that tx_ref if the
+    amount and currency cover it and the transaction id is not used by
+    another booking; receipt and notification jobs are queued with it.
+    Redeliveries of an applied charge are no-ops, so the batch is safe to
+    run again. Returns a callback publishing the availability changes.
+    """
+    events = db.query(PaymentEvent).filter(
+        PaymentEvent.id.in_([payload["event_id"] for payload in payloads])
+    ).order_by(PaymentEvent.id).all()
+
+    charges: dict[str, list[PaymentEvent]] = defaultdict(list)
+    for event in events:
+        if (
+            event.event_type == "charge.completed"
+            and event.status == "successful"
+            and event.tx_ref
+            and TX_REF_PATTERN.fullmatch(event.tx_ref)
+            and event.transaction_id is not None
+        ):
+            charges[event.tx_ref].append(event)
+    if not charges:
+        return None
+
+    bookings = {
+        booking.tx_ref: booking
+        for booking in db.query(Booking).filter(Booking.tx_ref.in_(charges)).with_for_update()
+    }
+    # Loaded into the session so the notifications below need no query per booking
+    db.query(Space).filter(Space.id.in_({booking.space_id for booking in bookings.values()})).all()
+    transaction_ids = {event.transaction_id for tx_events in charges.values() for event in tx_events}
+    used_by = dict(
+        db.query(Booking.transaction_id, Booking.id).filter(Booking.transaction_id.in_(transaction_ids)).all()
+    )
+
+    confirmed_spaces, confirmed = set(), []
+    for tx_ref, tx_events in charges.items():
+        booking = bookings.get(tx_ref)
+        if booking is None:
+            logger.warning(f"Payment for unknown tx_ref {tx_ref} ignored.")
+            continue
+        for event in tx_events:
+            if apply_payment(db, booking, event.transaction_id, event.amount, event.currency, used_by):
+                confirmed_spaces.add(booking.space_id)
+                confirmed.append((booking.id, event.transaction_id))
+                logger.info(f"Booking (ID: {booking.id}) confirmed by webhook, transaction ID: {event.transaction_id}")
+
+    def publish():
+        for space_id in confirmed_spaces:
+            invalidation_bus.publish(f"availability:{space_id}")
+        record_confirmations(confirmed)
+
+    return publish
+
+
+# Totals of the last reconciliation run finished by this worker
+last_reconciliation: dict = {}
+register_metrics("payment_reconciliation", lambda: last_reconciliation)
+
+
+def new_reconciliation_run() -> dict:
+    """Payload of the first page job of a reconciliation run."""
+    return {
+        "started_at": datetime.now().isoformat(),
+        "after": None,
+        "totals": dict.fromkeys(
+            ("checked", "confirmed", "released", "awaiting", "mismatched", "unverified", "verify_seconds"), 0
+        ),
+    }
+
+
+def reconcile_payments(db: Session, run: dict) -> Callable[[], None] | None:
+    """
+    Reconcile one page of pending bookings that have a tx_ref with the
+    provider, then queue the next page in the same transaction.
+
+    The page is read without locks and verified concurrently (see
+    FlutterwaveClient.verify_many) with no transaction open; the outcome is
+    applied in one transaction that locks the bookings still pending. Paid
+    bookings are confirmed as by a webhook; ones with no successful
+    transaction are released once older than PENDING_BOOKING_TTL_HOURS.
+    Paid bookings whose payment does not match are left pending and counted
+    as mismatched. The last page logs the totals of the run.
+    """
+    provider = build_payment_provider()
+    if provider is None:
+        logger.warning("Payment reconciliation skipped: PAYMENT_PROVIDER_SECRET_KEY is not set.")
+        return None
+
+    now = datetime.now()
+    query = db.query(Booking.id, Booking.created_at, Booking.tx_ref).filter(
+        Booking.status == "pending",
+        Booking.tx_ref.isnot(None),
+        Booking.created_at <= now - timedelta(minutes=settings.PAYMENT_RECONCILE_MIN_AGE_MINUTES),
+    )
+    if run["after"]:
+        created_at, booking_id = datetime.fromisoformat(run["after"][0]), UUID(run["after"][1])
+        query = query.filter(or_(
+            Booking.created_at > created_at, and_(Booking.created_at == created_at, Booking.id > booking_id)
+        ))
+    page = query.order_by(Booking.created_at, Booking.id).limit(settings.PAYMENT_RECONCILE_PAGE_SIZE).all()
+    db.rollback()  # Nothing is held open while the provider is asked
+
+    totals = run["totals"]
+    confirmed_spaces, released_spaces = set(), set()
+    confirmed, released = [], []
+    if page:
+        started = time.perf_counter()
+        verified, failed = provider.verify_many([tx_ref for _, _, tx_ref in page])
+        totals["verify_seconds"] += time.perf_counter() - started
+        totals["checked"] += len(page)
+        totals["unverified"] += len(failed)
+
+        bookings = db.query(Booking).filter(
+            Booking.id.in_([booking_id for booking_id, _, tx_ref in page if tx_ref not in failed]),
+            Booking.status == "pending",
+        ).with_for_update().all()
+        db.query(Space).filter(Space.id.in_({booking.space_id for booking in bookings})).all()
+        paid = {
+            tx_ref: transaction for tx_ref, transaction in verified.items()
+            if transaction is not None and transaction.status == "successful"
+        }
+        used_by = dict(db.query(Booking.transaction_id, Booking.id).filter(
+            Booking.transaction_id.in_({transaction.transaction_id for transaction in paid.values()})
+        ).all())
+        release_cutoff = now - timedelta(hours=settings.PENDING_BOOKING_TTL_HOURS)
+
+        for booking in bookings:
+            transaction = verified.get(booking.tx_ref)
+            if booking.tx_ref in paid:
+                if apply_payment(db, booking, transaction.transaction_id, transaction.amount,
+                                 transaction.currency, used_by):
+                    totals["confirmed"] += 1
+                    confirmed_spaces.add(booking.space_id)
+                    confirmed.append((booking.id, transaction.transaction_id))
+                    logger.info(
+                        f"Booking (ID: {booking.id}) confirmed by reconciliation, "
+                        f"transaction ID: {transaction.transaction_id}"
+                    )
+                else:
+                    totals["mismatched"] += 1
+            elif (transaction is None or transaction.status == "failed") and booking.created_at <= release_cutoff:
+                queue_waitlist_promotion(db, booking.space_id, booking.start_time, booking.end_time)
+                db.delete(booking)
+                totals["released"] += 1
+                released_spaces.add(booking.space_id)
+                released.append(booking.id)
+            else:
+                totals["awaiting"] += 1  # Not paid (or still processing) within the hold
+
+    if len(page) == settings.PAYMENT_RECONCILE_PAGE_SIZE:
+        last_id, last_created_at, _ = page[-1]
+        job_queue.enqueue(db, RECONCILE_JOB, {**run, "after": [last_created_at.isoformat(), str(last_id)]})
+    else:
+        elapsed = (datetime.now() - datetime.fromisoformat(run["started_at"])).total_seconds()
+        last_reconciliation.clear()
+        last_reconciliation.update(
+            totals,
+            verify_seconds=round(totals["verify_seconds"], 2),
+            seconds=round(elapsed, 2),
+            bookings_per_s=round(totals["checked"] / elapsed, 1) if elapsed > 0 else None,
+            finished_at=datetime.now().isoformat(),
+        )
+        logger.info(
+            f"Payment reconciliation checked {totals['checked']} pending bookings in {elapsed:.1f}s: "
+            f"{totals['confirmed']} confirmed, {totals['released']} released, {totals['awaiting']} awaiting payment, "
+            f"{totals['mismatched']} mismatched, {totals['unverified']} not verified."
+        )
+
+    def publish():
+        for space_id in confirmed_spaces | released_spaces:
+            invalidation_bus.publish(f"availability:{space_id}")
+        record_confirmations(confirmed)
+        for booking_id in released:
+            audit_trail.record(None, "booking.release", "booking", booking_id, {"status": ["pending", None]})
+
+    return publish
@@ -0,0 +1,103 @@
+# app/utils/pricing.py
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, time as day_time
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.models import Space
+from app.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class PricingRules:
+    """Pricing knobs, read from settings by default."""
+
+    min_duration_minutes: int
+    rounding_minutes: int
+    peak_start_hour: int
+    peak_end_hour: int
+    peak_multiplier: float
+    weekend_multiplier: float
+
+    @classmethod
+    def from_settings(cls) -> "PricingRules":
+        return cls(
+            min_duration_minutes=settings.PRICING_MIN_DURATION_MINUTES,
+            rounding_minutes=settings.PRICING_ROUNDING_MINUTES,
+            peak_start_hour=settings.PRICING_PEAK_START_HOUR,
+            peak_end_hour=settings.PRICING_PEAK_END_HOUR,
+            peak_multiplier=settings.PRICING_PEAK_MULTIPLIER,
+            weekend_multiplier=settings.PRICING_WEEKEND_MULTIPLIER,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    billable_hours: float
+    multiplier: float
+    total_cost: float
+
+
+def _weighted_hours(start_time: datetime, end_time: datetime, rules: PricingRules) -> float:
+    """
+    Hours in [start_time, end_time) weighted by their multiplier. Weekend days
+    use the weekend multiplier throughout; weekdays use the peak multiplier
+    inside the peak window and 1 outside it.
+    """
+    weighted = 0.0
+    day = datetime.combine(start_time.date(), day_time.min, tzinfo=start_time.tzinfo)
+    while day < end_time:
+        next_day = day + timedelta(days=1)
+        segment_start, segment_end = max(start_time, day), min(end_time, next_day)
+        hours = (segment_end - segment_start).total_seconds() / 3600
+        if day.weekday() >= 5:
+            weighted += hours * rules.weekend_multiplier
+        else:
+            peak_start = day + timedelta(hours=rules.peak_start_hour)
+            peak_end = day + timedelta(hours=rules.peak_end_hour)
+            peak = max((min(segment_end, peak_end) - max(segment_start, peak_start)).total_seconds() / 3600, 0)
+            weighted += peak * rules.peak_multiplier + (hours - peak)
+        day = next_day
+    return weighted
+
+
+def price_interval(
+    hourly_rate: float, start_time: datetime, end_time: datetime, rules: PricingRules | None = None
+) -> Quote:
+    """
+    Price one booking. Billable time is the duration raised to the minimum
+    and rounded up to the rounding increment; it is charged at the average
+    multiplier of the hours actually booked.
+    """
+    rules = rules or PricingRules.from_settings()
+    minutes = (end_time - start_time).total_seconds() / 60
+    if minutes <= 0:
+        raise ValueError("End time must be greater than start time")
+
+    billable_minutes = max(minutes, rules.min_duration_minutes)
+    if rules.rounding_minutes > 0:
+        billable_minutes = math.ceil(billable_minutes / rules.rounding_minutes - 1e-9) * rules.rounding_minutes
+    multiplier = _weighted_hours(start_time, end_time, rules) / (minutes / 60)
+    billable_hours = billable_minutes / 60
+    return Quote(
+        billable_hours=round(billable_hours, 4),
+        multiplier=round(multiplier, 4),
+        total_cost=round(hourly_rate * billable_hours * multiplier, 2),
+    )
+
+
+def quote_candidates(
+    db: Session, candidates: list[tuple[UUID, datetime, datetime]]
+) -> list[Quote | None]:
+    """
+    Price many (space_id, start_time, end_time) candidates with one Space query.
+    Unknown spaces give None.
+    """
+    space_ids = {space_id for space_id, _, _ in candidates}
+    rates = dict(db.query(Space.id, Space.hourly_rate).filter(Space.id.in_(space_ids)).all())
+    rules = PricingRules.from_settings()
+    return [
+        price_interval(rates[space_id], start_time, end_time, rules) if space_id in rates else None
+        for space_id, start_time, end_time in candidates
+    ]
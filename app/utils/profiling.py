@@ -0,0 +1,149 @@
+# app/utils/profiling.py
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from uuid import uuid4
+from fastapi import Depends, HTTPException, Request, status
+from app.config import settings
+from app.models import User
+from .logging_config import logger
+from .helpers.auth import get_current_user, admin_required
+
+# Header and query flag an admin sends to profile a request
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+
+
+class SamplingProfiler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    Samples are aggregated as collapsed stacks ("outer;inner count"), the
+    format read by flamegraph.pl, speedscope and most flamegraph viewers.
+    Async routes run on the event loop thread, so frames of other requests
+    served concurrently by the same worker can appear in the profile.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileRateLimiter:
+    """Global cap on how many requests a worker profiles, so it is safe to leave enabled."""
+
+    def __init__(self, max_per_minute: int):
+        self.max_per_minute = max_per_minute
+        self._started: deque[float] = deque()
+        self._active = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            while self._started and now - self._started[0] > 60:
+                self._started.popleft()
+            if self._active or len(self._started) >= self.max_per_minute:
+                return False
+            self._started.append(now)
+            self._active = True
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active = False
+
+
+profile_limiter = ProfileRateLimiter(settings.PROFILE_MAX_PER_MINUTE)
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(settings.PROFILE_DIR, f"{profile_id}.folded")
+
+
+async def profile_request(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Start profiling the request if an admin asked for it.
+
+    Add this dependency to an async route; profiling is requested with the
+    `X-Profile: 1` header or the `?profile=1` query flag. The profile is
+    finished by `finish_request_profile` once the response is ready.
+    """
+    requested = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY_PARAM)
+    if requested not in ("1", "true"):
+        return
+    await admin_required(current_user)
+
+    if not settings.PROFILING_ENABLED or not profile_limiter.acquire():
+        logger.warning(f"Profiling request by '{current_user.username}' rejected by rate cap.")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Profiling is disabled or rate limited. Try again later.",
+        )
+
+    profiler = SamplingProfiler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    profiler.start()
+    request.state.profiler = profiler
+    logger.info(f"Profiling {request.method} {request.url.path} for admin '{current_user.username}'.")
+
+
+def finish_request_profile(request: Request) -> str | None:
+    """
+    Stop the request's profiler, if any, and store its collapsed stacks.
+    Returns the id of the stored profile.
+    """
+    profiler = getattr(request.state, "profiler", None)
+    if profiler is None:
+        return None
+    try:
+        profiler.stop()
+        profile_id = uuid4().hex
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        with open(profile_path(profile_id), "w") as f:
+            f.write(profiler.collapsed())
+        logger.info(
+            f"Stored profile {profile_id} ({sum(profiler.samples.values())} samples "
+            f"over {profiler.duration:.2f}s) for {request.method} {request.url.path}"
+        )
+        return profile_id
+    except OSError as e:
+        logger.error(f"Error storing request profile: {e}")
+        return None
+    finally:
+        request.state.profiler = None
+        profile_limiter.release()
@@ -0,0 +1,121 @@
+# app/utils/query_stats.py
+
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+from .logging_config import logger
+
+# Number of slowest statements kept per request
+SLOWEST_STATEMENTS_KEPT = 3
+
+
+class QueryStats:
+    """Statement count, total DB time and slowest statements for one request."""
+
+    __slots__ = ("request_id", "count", "total_time", "slowest")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest: list[tuple[float, str]] = []
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if (
+            len(self.slowest) < SLOWEST_STATEMENTS_KEPT
+            or duration > self.slowest[-1][0]
+        ):
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_STATEMENTS_KEPT:]
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_time * 1000
+
+    def server_timing(self, app_duration: float) -> str:
+        """Format the stats as a `Server-Timing` header value."""
+        return (
+            f'db;dur={self.total_ms:.1f};desc="{self.count} queries", '
+            f"app;dur={app_duration * 1000:.1f}"
+        )
+
+
+# Stats of the request currently being served (None outside requests, e.g. jobs)
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats(request_id: str) -> QueryStats:
+    """
+    Start collecting query stats for the current request.
+
+    The stats object is mutable and shared with child tasks and threadpool
+    workers, since they copy the context when the request handler is run.
+    """
+    stats = QueryStats(request_id)
+    _current_stats.set(stats)
+    return stats
+
+
+def current_request_id() -> str | None:
+    """ID of the request being served, None outside requests."""
+    stats = _current_stats.get()
+    return stats.request_id if stats else None
+
+
+def _explain(conn, cursor, statement: str, parameters):
+    """Log the query plan of a slow SELECT statement."""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return
+    prefix = "EXPLAIN QUERY PLAN" if conn.dialect.name == "sqlite" else "EXPLAIN"
+    try:
+        # Use a raw DBAPI cursor so the EXPLAIN itself is not instrumented
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(f"{prefix} {statement}", parameters)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.close()
+        logger.info(f"Query plan:\n{plan}")
+    except Exception as e:
+        logger.warning(f"Could not explain slow query: {e}")
+
+
+def instrument_engine(engine: Engine):
+    """
+    Attach event hooks that time every statement executed by `engine`.
+
+    Timings are added to the current request's stats and statements slower
+    than `SLOW_QUERY_THRESHOLD_MS` are logged (with their plan if
+    `EXPLAIN_SLOW_QUERIES` is set).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            request_id = stats.request_id if stats else "-"
+            logger.warning(
+                f"Slow query ({duration * 1000:.1f}ms) in request {request_id}: {statement}"
+            )
+            if settings.EXPLAIN_SLOW_QUERIES and not executemany:
+                _explain(conn, cursor, statement, parameters)
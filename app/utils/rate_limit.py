@@ -0,0 +1,225 @@
+# app/utils/rate_limit.py
+
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from app.config import settings
+from .logging_config import logger
+from .metrics import register_metrics
+
+# Shared slot: key hash, tokens, last refill (epoch seconds)
+SLOT = struct.Struct("<Qdd")
+
+
+def client_ip(request: Request) -> str:
+    """
+    Client address for per-IP limits. Behind TRUSTED_PROXY_HOPS proxies it is
+    the X-Forwarded-For entry the outermost trusted proxy appended; entries
+    left of it are set by the client and never used.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("X-Forwarded-For")
+            for address in header.split(",")
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryBuckets:
+    """Token buckets for this worker, bounded to the most recently used keys."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, rate: float, cost: float) -> float:
+        """
+        Refill the bucket, take `cost` tokens if available and return the
+        tokens left (negative: the shortfall, nothing was taken).
+        """
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            left = tokens - cost
+            self._buckets[key] = (left if left >= 0 else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return left
+
+    def reset(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SharedBuckets:
+    """
+    Token buckets shared by every worker on the host through a mmap'd file of
+    fixed slots, each guarded by a byte-range lock. A key whose slot holds
+    another key's partly used bucket shares it (stricter, never looser);
+    the slot is taken over once that bucket has refilled.
+    """
+
+    def __init__(self, path: str, slots: int):
+        self.slots = slots
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < slots * SLOT.size:
+            os.ftruncate(self._fd, slots * SLOT.size)
+        self._mm = mmap.mmap(self._fd, slots * SLOT.size)
+
+    def _slot(self, key: str) -> tuple[int, int]:
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return digest, (digest % self.slots) * SLOT.size
+
+    def consume(self, key: str, capacity: float, rate: float, cost: float) -> float:
+        digest, offset = self._slot(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, SLOT.size, offset)
+        try:
+            now = time.time()
+            stored, tokens, updated = SLOT.unpack_from(self._mm, offset)
+            tokens = _refill(tokens, updated, now, capacity, rate) if updated else capacity
+            if stored != digest and tokens >= capacity:
+                stored = digest
+            left = tokens - cost
+            SLOT.pack_into(self._mm, offset, stored, left if left >= 0 else tokens, now)
+            return left
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, SLOT.size, offset)
+
+    def reset(self, key: str):
+        digest, offset = self._slot(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, SLOT.size, offset)
+        try:
+            if SLOT.unpack_from(self._mm, offset)[0] == digest:
+                SLOT.pack_into(self._mm, offset, 0, 0.0, 0.0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, SLOT.size, offset)
+
+    def __len__(self) -> int:
+        return self.slots
+
+
+class RateLimiter:
+    """
+    Token-bucket limits for the auth endpoints, checked before any database
+    query or password hash. Policies come from RATE_LIMITS as
+    name -> [requests, per seconds].
+    """
+
+    def __init__(self):
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.policies = {name: (float(count), float(seconds)) for name, (count, seconds) in settings.RATE_LIMITS.items()}
+        self.rejected: dict[str, int] = {name: 0 for name in self.policies}
+        self._buckets: MemoryBuckets | SharedBuckets | None = None
+        register_metrics("rate_limit", self.stats)
+
+    @property
+    def buckets(self) -> MemoryBuckets | SharedBuckets:
+        # Created on first use so the shared file is opened in the worker, not the master
+        if self._buckets is None:
+            if settings.RATE_LIMIT_BACKEND == "shared":
+                self._buckets = SharedBuckets(settings.RATE_LIMIT_SHARED_PATH, settings.RATE_LIMIT_MAX_KEYS)
+            else:
+                self._buckets = MemoryBuckets(settings.RATE_LIMIT_MAX_KEYS)
+        return self._buckets
+
+    def _consume(self, policy: str, key: str, cost: float = 1) -> float:
+        capacity, seconds = self.policies[policy]
+        return self.buckets.consume(f"{policy}:{key}", capacity, capacity / seconds, cost)
+
+    def hit(self, policy: str, key: str):
+        """Count one request against `policy` for `key`; 429 once it is used up."""
+        if not self.enabled:
+            return
+        left = self._consume(policy, key)
+        if left < 0:
+            self.rejected[policy] += 1
+            capacity, seconds = self.policies[policy]
+            retry_after = math.ceil(-left * seconds / capacity)
+            logger.warning(f"Rate limit '{policy}' exceeded for {key}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Try again later.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": settings.RATE_LIMIT_BACKEND,
+            "keys": len(self._buckets) if self._buckets is not None else 0,
+            "rejected": dict(self.rejected),
+        }
+
+
+class LoginGuard:
+    """
+    Failed-login tracking kept in the rate limiter's buckets: each failure
+    takes a token from a bucket of LOGIN_MAX_FAILED_ATTEMPTS, an empty bucket
+    means locked out, and one attempt comes back per LOGIN_LOCKOUT_MINUTES.
+    A successful login refills the bucket.
+
+    Failures cost no database write; callers persist the lockout only when
+    `record_failure` reports that the threshold was just crossed.
+    """
+
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+        self.lockouts = 0
+        register_metrics("login_guard", lambda: {"lockouts": self.lockouts})
+
+    def _consume(self, email: str, cost: float) -> float:
+        capacity = float(settings.LOGIN_MAX_FAILED_ATTEMPTS)
+        rate = 1 / (settings.LOGIN_LOCKOUT_MINUTES * 60.0)
+        return self.limiter.buckets.consume(f"login_failures:{email.lower()}", capacity, rate, cost)
+
+    def is_locked(self, email: str) -> bool:
+        return self._consume(email, 0) < 1
+
+    def record_failure(self, email: str) -> bool:
+        """Count a failed attempt; True if it locked the account."""
+        locked = self._consume(email, 1) < 1
+        if locked:
+            self.lockouts += 1
+        return locked
+
+    def reset(self, email: str):
+        self.limiter.buckets.reset(f"login_failures:{email.lower()}")
+
+
+rate_limiter = RateLimiter()
+login_guard = LoginGuard(rate_limiter)
+
+
+def check_auth_attempt(request: Request, email: str):
+    """
+    Per-IP and per-email limits plus the in-memory lockout, for endpoints
+    that verify a password. Raises before any database or bcrypt work.
+    """
+    rate_limiter.hit("auth_ip", client_ip(request))
+    rate_limiter.hit("auth_email", email.lower())
+    if rate_limiter.enabled and login_guard.is_locked(email):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account locked. Try again later.",
+        )
@@ -0,0 +1,262 @@
+# app/utils/receipts.py
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from html import escape
+from string import Template
+from uuid import UUID
+from sqlalchemy.orm import Session, joinedload
+from app.config import settings
+from app.models import Booking, ReceiptDocument
+from .logging_config import logger
+from .job_queue import job_queue
+
+# Job kind rendering a booking's receipt documents
+RENDER_RECEIPT_JOB = "render_receipt"
+# Bump when the layouts below change, so existing receipts are rendered again
+RENDER_VERSION = 1
+RECEIPT_FORMATS = {"html": "text/html; charset=utf-8", "pdf": "application/pdf"}
+# Content-addressed files never change, so clients may keep them for good
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+HTML_LAYOUT = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Receipt $receipt_no</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; max-width: 640px; margin: 40px auto; color: #222; }
+h1 { font-size: 22px; margin-bottom: 4px; }
+h2 { font-size: 15px; margin: 24px 0 8px; border-bottom: 1px solid #ddd; }
+td { padding: 2px 12px 2px 0; vertical-align: top; }
+td:first-child { color: #666; }
+</style>
+</head>
+<body>
+<h1>$company_name</h1>
+<p>Receipt $receipt_no</p>
+$sections
+</body>
+</html>
+""")
+
+
+def receipt_data(booking: Booking) -> dict:
+    """The receipt of a booking with a receipt ID, as GET /bookings/{id}/receipt returns it."""
+    duration_hours = (booking.end_time - booking.start_time).total_seconds() / 3600
+    return {
+        "receipt_no": booking.receipt_id,
+        "company_name": "ReserveMe.com",
+        "user": {
+            "name": booking.user.username,
+            "email": booking.user.email,
+            "phone_number": booking.user.phone_number,
+        },
+        "space": {
+            "name": booking.space.name,
+            "location": booking.space.location,
+        },
+        "booking": {
+            "date": booking.start_time.strftime("%B %d, %Y"),  # Format: January 15, 2024
+            "time": f"{booking.start_time.strftime('%I:%M %p')} - {booking.end_time.strftime('%I:%M %p')}",  # Format: 10:00 AM - 12:00 PM
+            "duration": f"{duration_hours} hours",  # Format: 2 hours
+            "purpose": booking.purpose,
+        },
+        "payment": {
+            "amount": booking.total_cost,
+            "status": booking.status,
+            "transaction_id": booking.transaction_id,
+            "payment_date": booking.created_at.strftime("%B %d, %Y %I:%M %p"),  # Format: January 15, 2024 10:05 AM
+        },
+    }
+
+
+def _sections(data: dict) -> list[tuple[str, list[tuple[str, str]]]]:
+    """The receipt as titled sections of (label, value) rows, shared by both formats."""
+    payment = data["payment"]
+    return [
+        ("Customer", [
+            ("Name", data["user"]["name"]),
+            ("Email", data["user"]["email"]),
+            ("Phone", data["user"]["phone_number"] or ""),
+        ]),
+        ("Space", [
+            ("Name", data["space"]["name"]),
+            ("Location", data["space"]["location"]),
+        ]),
+        ("Booking", [
+            ("Date", data["booking"]["date"]),
+            ("Time", data["booking"]["time"]),
+            ("Duration", data["booking"]["duration"]),
+            ("Purpose", data["booking"]["purpose"]),
+        ]),
+        ("Payment", [
+            ("Amount", f"{payment['amount']:,.2f} {settings.PAYMENT_CURRENCY}"),
+            ("Status", payment["status"]),
+            ("Transaction ID", str(payment["transaction_id"] or "")),
+            ("Payment date", payment["payment_date"]),
+        ]),
+    ]
+
+
+def render_html(data: dict) -> bytes:
+    sections = "\n".join(
+        f"<h2>{escape(title)}</h2>\n<table>\n"
+        + "".join(f"<tr><td>{escape(label)}</td><td>{escape(str(value))}</td></tr>\n" for label, value in rows)
+        + "</table>"
+        for title, rows in _sections(data)
+    )
+    return HTML_LAYOUT.substitute(
+        receipt_no=escape(data["receipt_no"]), company_name=escape(data["company_name"]), sections=sections
+    ).encode()
+
+
+def _pdf_string(value: str) -> bytes:
+    text = value.encode("cp1252", errors="replace")
+    return b"(" + text.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def render_pdf(data: dict) -> bytes:
+    """
+    A one-page A4 PDF in the standard Helvetica fonts, written directly.
+    The output depends only on `data` (no timestamps), so equal receipts
+    have equal digests.
+    """
+    lines = [(b"F2", 18, data["company_name"]), (b"F1", 11, f"Receipt {data['receipt_no']}")]
+    for title, rows in _sections(data):
+        lines.append((b"F2", 12, ""))
+        lines.append((b"F2", 12, title))
+        lines.extend((b"F1", 10, f"{label}: {value}") for label, value in rows)
+
+    operations, y = [], 790
+    for font, size, text in lines:
+        if text:
+            operations.append(b"BT /%s %d Tf 56 %d Td %s Tj ET" % (font, size, y, _pdf_string(text)))
+        y -= int(size * 1.6)
+    stream = b"\n".join(operations)
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def receipt_path(digest: str, fmt: str) -> str:
+    return os.path.join(settings.RECEIPT_DIR, digest[:2], f"{digest}.{fmt}")
+
+
+def store_receipt_file(content: bytes, fmt: str) -> str:
+    """Write `content` under its SHA-256 unless already there; returns the digest."""
+    digest = hashlib.sha256(content).hexdigest()
+    path = receipt_path(digest, fmt)
+    if os.path.exists(path):
+        os.utime(path)  # Not mistaken for an unreferenced old file before its document commits
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)  # Readers never see a partial file
+    return digest
+
+
+def receipt_file(document: ReceiptDocument, fmt: str) -> tuple[str, str]:
+    """
+    Digest and path of a document's rendering in `fmt`. A file missing from
+    this host's RECEIPT_DIR is rendered again from the stored data.
+    """
+    digest = document.pdf_digest if fmt == "pdf" else document.html_digest
+    path = receipt_path(digest, fmt)
+    if not os.path.exists(path):
+        render = render_pdf if fmt == "pdf" else render_html
+        digest = store_receipt_file(render(document.data), fmt)
+        path = receipt_path(digest, fmt)
+    return digest, path
+
+
+def queue_receipt_render(db: Session, booking: Booking):
+    """Have a booking's receipt rendered again after a change, in the caller's transaction."""
+    if booking.receipt_id:
+        job_queue.enqueue(db, RENDER_RECEIPT_JOB, {"booking_id": str(booking.id)})
+
+
+def render_receipts(db: Session, booking_ids: list[UUID]) -> int:
+    """
+    Render the HTML and PDF receipts of bookings with a receipt ID and
+    record them; bookings whose receipt data is unchanged since their last
+    rendering are skipped. Returns the number rendered. Does not commit.
+    """
+    bookings = db.query(Booking).options(joinedload(Booking.user), joinedload(Booking.space)).filter(
+        Booking.id.in_(booking_ids), Booking.receipt_id.isnot(None)
+    ).all()
+    documents = {
+        document.booking_id: document
+        for document in db.query(ReceiptDocument).filter(ReceiptDocument.booking_id.in_(booking_ids))
+    }
+    rendered = 0
+    for booking in bookings:
+        data = receipt_data(booking)
+        fingerprint = hashlib.sha256(
+            json.dumps([RENDER_VERSION, data], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        document = documents.get(booking.id)
+        if document is not None and document.fingerprint == fingerprint:
+            continue
+        if document is None:
+            document = ReceiptDocument(booking_id=booking.id)
+            db.add(document)
+        document.receipt_id = booking.receipt_id
+        document.fingerprint = fingerprint
+        document.data = data
+        document.html_digest = store_receipt_file(render_html(data), "html")
+        document.pdf_digest = store_receipt_file(render_pdf(data), "pdf")
+        document.rendered_at = datetime.now()
+        rendered += 1
+    if rendered:
+        logger.info(f"Rendered {rendered} receipts.")
+    return rendered
+
+
+def purge_receipt_files(db: Session, min_age_seconds: float = 3600) -> int:
+    """
+    Delete documents of bookings that no longer exist, then files under
+    RECEIPT_DIR that no document refers to (superseded renderings). Files
+    younger than `min_age_seconds` are kept, as their document may not have
+    committed yet. Returns the number of files deleted.
+    """
+    db.query(ReceiptDocument).filter(
+        ~ReceiptDocument.booking_id.in_(db.query(Booking.id).scalar_subquery())
+    ).delete(synchronize_session=False)
+    db.commit()
+    referenced = set()
+    for html_digest, pdf_digest in db.query(ReceiptDocument.html_digest, ReceiptDocument.pdf_digest):
+        referenced.update((f"{html_digest}.html", f"{pdf_digest}.pdf"))
+
+    deleted = 0
+    cutoff = time.time() - min_age_seconds
+    for directory, _, names in os.walk(settings.RECEIPT_DIR):
+        for name in names:
+            path = os.path.join(directory, name)
+            if name not in referenced and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                deleted += 1
+    return deleted
@@ -0,0 +1,256 @@
+# app/utils/reminders.py
+
+import fcntl
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+from sqlalchemy import and_
+from sqlalchemy.engine import Engine
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Booking, BookingReminder, Space, User
+from .logging_config import logger
+from .metrics import register_metrics
+from .cache_bus import invalidation_bus
+from .interval_store import epoch
+from .notifications import Notification, Notifier, build_notifier
+from .timer_wheel import TimerWheel
+
+
+def _upcoming_query(db, start_from: datetime, start_until: datetime):
+    """
+    Confirmed bookings starting in [start_from, start_until) that have no
+    reminder for their current start time. Served by ix_bookings_status_start_time.
+    """
+    return db.query(Booking.id, Booking.space_id, Booking.start_time).outerjoin(
+        BookingReminder,
+        and_(BookingReminder.booking_id == Booking.id, BookingReminder.start_time == Booking.start_time),
+    ).filter(
+        Booking.status == "confirmed",
+        Booking.start_time >= start_from,
+        Booking.start_time < start_until,
+        BookingReminder.booking_id.is_(None),
+    )
+
+
+def reminder_notification(booking_id: UUID, email: str, username: str, space_name: str, location: str,
+                          start_time: datetime, end_time: datetime) -> Notification:
+    return Notification(
+        ref=booking_id,
+        email=email,
+        subject=f"Reminder: {space_name} at {start_time:%Y-%m-%d %H:%M}",
+        body=(
+            f"Hi {username},\n\n"
+            f"Your booking of {space_name} ({location}) starts at {start_time:%Y-%m-%d %H:%M} "
+            f"and ends at {end_time:%H:%M}.\n\n"
+            f"{settings.APP_NAME}"
+        ),
+    )
+
+
+class ReminderDispatcher:
+    """
+    Sends a reminder REMINDER_LEAD_MINUTES before each confirmed booking starts.
+
+    One worker, whichever holds the leader file lock, loads the bookings
+    starting within REMINDER_HORIZON_MINUTES with one indexed range query
+    (again every REMINDER_RELOAD_MINUTES) and keeps their reminder times in
+    a timer wheel. Booking changes arrive as availability invalidations on
+    the bus and reload just that space. Due reminders are re-read from the
+    database in batches right before sending, so a booking canceled or
+    moved in between is skipped or rescheduled, and recorded in
+    booking_reminders once delivered so they are sent only once.
+    """
+
+    def __init__(self):
+        self.enabled = settings.REMINDERS_ENABLED
+        self.is_leader = False
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.reloads = 0
+        self.notifier: Notifier | None = None
+        self._wheel: TimerWheel | None = None
+        self._scheduled: dict[UUID, tuple[UUID, datetime]] = {}  # booking id -> (space id, start time)
+        self._dirty_spaces: set[UUID] = set()
+        self._dirty_lock = threading.Lock()
+        self._last_reload = 0.0
+        self._stop = threading.Event()
+        self._lock_file = None
+        self._thread: threading.Thread | None = None
+        register_metrics("reminders", self.stats)
+
+    def start(self, engine: Engine):
+        if not self.enabled:
+            return
+        # create_all does not add indexes to an existing bookings table
+        next(index for index in Booking.__table__.indexes if index.name == "ix_bookings_status_start_time").create(
+            bind=engine, checkfirst=True
+        )
+        self.notifier = build_notifier()
+        invalidation_bus.subscribe(self._on_invalidation)
+        self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._lock_file:
+            self._lock_file.close()
+
+    def _on_invalidation(self, key: str, payload=None):
+        if key.startswith("availability:"):
+            with self._dirty_lock:
+                self._dirty_spaces.add(UUID(key.split(":", 1)[1]))
+
+    def _try_lead(self):
+        if self._lock_file is None:
+            self._lock_file = open(settings.REMINDER_LOCK_PATH, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        self.is_leader = True
+        self._wheel = TimerWheel(settings.REMINDER_TICK_SECONDS, time.time())
+        logger.info(f"Worker {os.getpid()} is dispatching booking reminders.")
+
+    def _run(self):
+        while not self._stop.wait(settings.REMINDER_TICK_SECONDS):
+            try:
+                if not self.is_leader:
+                    self._try_lead()
+                if self.is_leader:
+                    self._tick()
+            except Exception as e:
+                logger.error(f"Error dispatching booking reminders: {e}")
+
+    def _tick(self):
+        now = time.time()
+        if now - self._last_reload >= settings.REMINDER_RELOAD_MINUTES * 60:
+            with self._dirty_lock:
+                self._dirty_spaces.clear()
+            self._reload()
+            self._last_reload = now
+        else:
+            with self._dirty_lock:
+                spaces, self._dirty_spaces = self._dirty_spaces, set()
+            if spaces:
+                self._reload(spaces)
+
+        due = self._wheel.advance(time.time())
+        batch_size = settings.REMINDER_BATCH_SIZE
+        for i in range(0, len(due), batch_size):
+            self._dispatch(due[i:i + batch_size])
+
+    def _schedule(self, booking_id: UUID, space_id: UUID, start_time: datetime):
+        self._scheduled[booking_id] = (space_id, start_time)
+        self._wheel.schedule(booking_id, epoch(start_time) - settings.REMINDER_LEAD_MINUTES * 60)
+
+    def _unschedule(self, booking_id: UUID):
+        self._scheduled.pop(booking_id, None)
+        self._wheel.cancel(booking_id)
+
+    def _reload(self, space_ids: set[UUID] | None = None):
+        """
+        Re-read upcoming bookings, of `space_ids` or all, and make the wheel
+        match: new and moved bookings are (re)scheduled, the rest dropped.
+        """
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            query = _upcoming_query(db, now, now + timedelta(minutes=settings.REMINDER_HORIZON_MINUTES))
+            if space_ids is not None:
+                query = query.filter(Booking.space_id.in_(space_ids))
+            rows = query.all()
+        finally:
+            db.close()
+
+        found = set()
+        for booking_id, space_id, start_time in rows:
+            found.add(booking_id)
+            self._schedule(booking_id, space_id, start_time)
+        for booking_id, (space_id, _) in list(self._scheduled.items()):
+            if booking_id not in found and (space_ids is None or space_id in space_ids):
+                self._unschedule(booking_id)
+        self.reloads += 1
+
+    def _dispatch(self, booking_ids: list[UUID]):
+        """Re-check a batch of due reminders against the database and send the valid ones."""
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                Booking.id, Booking.space_id, Booking.start_time, Booking.end_time,
+                User.email, User.username, Space.name, Space.location,
+            ).join(User, User.id == Booking.user_id).join(Space, Space.id == Booking.space_id).outerjoin(
+                BookingReminder,
+                and_(BookingReminder.booking_id == Booking.id, BookingReminder.start_time == Booking.start_time),
+            ).filter(
+                Booking.id.in_(booking_ids),
+                Booking.status == "confirmed",
+                Booking.start_time > now,
+                BookingReminder.booking_id.is_(None),
+                User.is_deleted.is_not(True),
+            ).all()
+
+            notifications, start_times = [], {}
+            lead = timedelta(minutes=settings.REMINDER_LEAD_MINUTES)
+            for booking_id, space_id, start_time, end_time, email, username, space_name, location in rows:
+                if start_time - lead > now:
+                    # Moved later since it was scheduled
+                    self._schedule(booking_id, space_id, start_time)
+                    continue
+                start_times[booking_id] = start_time
+                notifications.append(
+                    reminder_notification(booking_id, email, username, space_name, location, start_time, end_time)
+                )
+            for booking_id in booking_ids:
+                if booking_id not in start_times and booking_id not in self._wheel:
+                    self._scheduled.pop(booking_id, None)
+                    self.skipped += 1
+
+            if not notifications:
+                return
+            try:
+                delivered = self.notifier.send(notifications)
+            except Exception as e:
+                logger.error(f"Reminder notifier '{self.notifier.name}' failed: {e}")
+                delivered = set()
+
+            for booking_id in delivered:
+                db.merge(BookingReminder(booking_id=booking_id, start_time=start_times[booking_id], sent_at=now))
+                self._scheduled.pop(booking_id, None)
+            db.commit()
+            self.sent += len(delivered)
+
+            # Retry undelivered ones later, while their booking has not started
+            retry_at = time.time() + settings.REMINDER_RETRY_SECONDS
+            for booking_id, start_time in start_times.items():
+                if booking_id not in delivered:
+                    self.failed += 1
+                    if retry_at < epoch(start_time):
+                        self._wheel.schedule(booking_id, retry_at)
+                    else:
+                        self._scheduled.pop(booking_id, None)
+            if delivered:
+                logger.info(f"Sent {len(delivered)} booking reminders.")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "leader": self.is_leader,
+            "notifier": self.notifier.name if self.notifier else None,
+            "scheduled": len(self._wheel) if self._wheel else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "reloads": self.reloads,
+        }
+
+
+reminder_dispatcher = ReminderDispatcher()
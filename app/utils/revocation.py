@@ -0,0 +1,240 @@
+# app/utils/revocation.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import SessionLocal
+from app.models import RevokedToken
+from .logging_config import logger
+from .metrics import register_metrics
+from .cache_bus import invalidation_bus
+from .security import REFRESH_TOKEN_EXPIRE_DAYS
+
+# Bus key carrying new revocations to the other workers
+REVOCATION_KEY = "token_revocations"
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (double hashing on one blake2b digest)."""
+
+    __slots__ = ("bits", "size", "hashes", "count")
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.bits = bytearray((size_bits + 7) // 8)
+        self.size = size_bits
+        self.hashes = hashes
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """
+    Revoked sessions (sid) and per-user cutoffs checked in memory, plus used
+    refresh tokens (jti).
+
+    Every revocation goes into a bloom filter, and recent ones also into an
+    exact LRU. A token whose keys miss the filter, which is almost every
+    token, is known valid without any I/O. Only a filter hit that the exact
+    store cannot confirm, i.e. a false positive or an old entry, is checked
+    against the revoked_tokens table. Revocations are persisted there and
+    broadcast to the other workers over the invalidation bus; the filter
+    is rebuilt from the table at startup and by the hourly purge job.
+
+    Used refresh tokens stay out of the filter, so rotation cannot fill it:
+    each is claimed with one insert into the same table, whose primary key
+    rejects a second use from any worker, and is kept in an exact store
+    until it expires so reuse on this worker needs no query.
+    """
+
+    def __init__(self):
+        self.checks = 0
+        self.filter_hits = 0
+        self.db_lookups = 0
+        self._bloom = BloomFilter(settings.REVOCATION_BLOOM_BITS, settings.REVOCATION_BLOOM_HASHES)
+        self._recent: OrderedDict[str, float] = OrderedDict()  # key -> expiry (epoch seconds)
+        self._cleared: OrderedDict[str, None] = OrderedDict()  # filter false positives
+        self._cutoffs: dict[str, int] = {}  # username -> tokens issued before this are revoked
+        self._used: OrderedDict[str, float] = OrderedDict()  # refresh jti -> expiry (epoch seconds)
+        self._lock = threading.Lock()
+        register_metrics("token_revocation", self.stats)
+
+    def start(self):
+        invalidation_bus.subscribe(self._on_invalidation)
+        self.reload()
+
+    def reload(self):
+        """Rebuild the filter and caches from the table, dropping expired entries."""
+        bloom = BloomFilter(settings.REVOCATION_BLOOM_BITS, settings.REVOCATION_BLOOM_HASHES)
+        recent: OrderedDict[str, float] = OrderedDict()
+        cutoffs: dict[str, int] = {}
+        db = SessionLocal()
+        try:
+            rows = db.query(RevokedToken.key, RevokedToken.issued_before, RevokedToken.expires_at).filter(
+                RevokedToken.expires_at > datetime.now(),
+                ~RevokedToken.key.startswith("jti:"),  # Used refresh tokens are claimed, not filtered
+            ).order_by(RevokedToken.created_at).yield_per(10_000)
+            for key, issued_before, expires_at in rows:
+                if issued_before is not None:
+                    cutoffs[key.split(":", 1)[1]] = issued_before
+                    continue
+                bloom.add(key)
+                recent[key] = expires_at.timestamp()
+                if len(recent) > settings.REVOCATION_RECENT_MAX:
+                    recent.popitem(last=False)
+        finally:
+            db.close()
+        with self._lock:
+            self._bloom, self._recent, self._cutoffs = bloom, recent, cutoffs
+            self._cleared.clear()
+        if bloom.count > settings.REVOCATION_BLOOM_CAPACITY:
+            logger.warning(f"Revocation filter holds {bloom.count} entries; raise REVOCATION_BLOOM_BITS.")
+
+    def _remember(self, key: str, expires_at: float, issued_before: int | None = None):
+        with self._lock:
+            if issued_before is not None:
+                username = key.split(":", 1)[1]
+                self._cutoffs[username] = max(issued_before, self._cutoffs.get(username, 0))
+                return
+            self._bloom.add(key)
+            self._recent[key] = expires_at
+            self._recent.move_to_end(key)
+            if len(self._recent) > settings.REVOCATION_RECENT_MAX:
+                self._recent.popitem(last=False)
+            self._cleared.pop(key, None)
+
+    def _on_invalidation(self, key: str, payload=None):
+        if key != REVOCATION_KEY:
+            return
+        if payload:
+            self._remember(payload["key"], payload["expires_at"], payload.get("issued_before"))
+        else:
+            # Messages may have been missed (resync or bus rotation)
+            self.reload()
+
+    def _persist(self, entry: RevokedToken, merge: bool = False) -> bool:
+        db = SessionLocal()
+        try:
+            if merge:
+                db.merge(entry)
+            else:
+                db.add(entry)
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    def revoke(self, kind: str, value: str, expires_at: datetime) -> bool:
+        """
+        Revoke a whole session ("sid") until `expires_at`. Returns False if
+        it was already revoked.
+        """
+        key = f"{kind}:{value}"
+        if not self._persist(RevokedToken(key=key, expires_at=expires_at)):
+            return False
+        self._remember(key, expires_at.timestamp())
+        invalidation_bus.publish(REVOCATION_KEY, payload={"key": key, "expires_at": expires_at.timestamp()})
+        return True
+
+    def use_refresh_token(self, jti: str, expires_at: datetime) -> bool:
+        """
+        Mark a refresh token as used until `expires_at`. Returns False if it
+        already was, which means it is being reused.
+        """
+        now = time.time()
+        used_until = self._used.get(jti)
+        if used_until is not None and used_until > now:
+            return False
+        first_use = self._persist(RevokedToken(key=f"jti:{jti}", expires_at=expires_at))
+        with self._lock:
+            self._used[jti] = expires_at.timestamp()
+            self._used.move_to_end(jti)
+            # Oldest first, and tokens share one lifetime, so expired ones sit at the front
+            while self._used and (
+                len(self._used) > settings.REVOCATION_RECENT_MAX or next(iter(self._used.values())) <= now
+            ):
+                self._used.popitem(last=False)
+        return first_use
+
+    def revoke_user_tokens(self, username: str):
+        """Revoke every token of the user issued until now (password change, deletion)."""
+        key = f"user:{username}"
+        issued_before = int(time.time())
+        expires_at = datetime.now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        self._persist(RevokedToken(key=key, issued_before=issued_before, expires_at=expires_at), merge=True)
+        self._remember(key, expires_at.timestamp(), issued_before)
+        invalidation_bus.publish(
+            REVOCATION_KEY,
+            payload={"key": key, "expires_at": expires_at.timestamp(), "issued_before": issued_before},
+        )
+
+    def _contains(self, key: str) -> bool:
+        if key not in self._bloom:
+            return False
+        self.filter_hits += 1
+        expires_at = self._recent.get(key)
+        if expires_at is not None:
+            return expires_at > time.time()
+        if key in self._cleared:
+            return False
+
+        self.db_lookups += 1
+        db = SessionLocal()
+        try:
+            row = db.get(RevokedToken, key)
+            revoked = row is not None and row.expires_at > datetime.now()
+        finally:
+            db.close()
+        if revoked:
+            self._remember(key, row.expires_at.timestamp())
+        else:
+            with self._lock:
+                self._cleared[key] = None
+                if len(self._cleared) > settings.REVOCATION_RECENT_MAX:
+                    self._cleared.popitem(last=False)
+        return revoked
+
+    def contains(self, kind: str, value: str) -> bool:
+        return self._contains(f"{kind}:{value}")
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Whether a verified token payload has been revoked by session or user cutoff."""
+        self.checks += 1
+        cutoff = self._cutoffs.get(payload.get("sub"))
+        if cutoff is not None and payload.get("iat", 0) < cutoff:
+            return True
+        sid = payload.get("sid")
+        return bool(sid) and self._contains(f"sid:{sid}")
+
+    def stats(self) -> dict:
+        return {
+            "checks": self.checks,
+            "filter_entries": self._bloom.count,
+            "filter_hits": self.filter_hits,
+            "db_lookups": self.db_lookups,
+            "recent": len(self._recent),
+            "used_refresh_tokens": len(self._used),
+            "user_cutoffs": len(self._cutoffs),
+        }
+
+
+revocation_store = RevocationStore()
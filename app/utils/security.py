@@ -1,11 +1,17 @@
 # app/utils/security.py
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, HTTPException
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
 from pydantic import ValidationError
 from app.config import settings
+from .metrics import register_metrics
 
 
 # Password hashing context using bcrypt
@@ -30,12 +36,69 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 15
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"token_type": "access", "exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"token_type": "access", "iat": now, "exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+class VerifiedTokenCache:
+    """
+    Payloads of access tokens that already passed `jwt.decode`, keyed by the
+    token's SHA-256 digest and bounded to the most recently used entries.
+    An entry is only served until the token's `exp`; after that the token
+    goes through `jwt.decode` again, which rejects it as expired. Revocation
+    is checked by the caller on every request, cached or not.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()  # digest -> (payload, exp)
+        self._lock = threading.Lock()
+        register_metrics("token_cache", self.stats)
+
+    def get(self, token: str) -> dict | None:
+        if not self.max_entries:
+            return None
+        digest = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+        return dict(entry[0])  # Callers get their own copy
+
+    def set(self, token: str, payload: dict):
+        if not self.max_entries or "exp" not in payload:
+            return
+        digest = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            self._entries[digest] = (dict(payload), float(payload["exp"]))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
 def verify_access_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("token_type") != "access":
@@ -43,6 +106,7 @@ def verify_access_token(token: str) -> dict:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token type for access",
             )
+        token_cache.set(token, payload)
         return payload
     except JWTError as e:  # Unified JWTError handling
         error_msg = str(e).lower()
@@ -71,9 +135,15 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 
 def create_refresh_token(data: dict) -> str:
+    """
+    Refresh tokens carry a unique `jti`, so each one can be used (rotated) once,
+    and the `sid` of the login session they belong to.
+    """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"token_type": "refresh", "exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.setdefault("sid", uuid4().hex)
+    to_encode.update({"token_type": "refresh", "jti": uuid4().hex, "iat": now, "exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -0,0 +1,74 @@
+# app/utils/serialization.py
+
+from typing import Any, Callable
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class PydanticJSONResponse(Response):
+    """JSON response whose body was already serialized to bytes by pydantic."""
+
+    media_type = "application/json"
+
+
+class LazyTypeAdapter:
+    """
+    TypeAdapter compiled once, on first use. The schemas are resolved then,
+    so importing app.utils does not import app.schemas, which uses it.
+    """
+
+    def __init__(self, resolve: Callable[[], Any]):
+        self._resolve = resolve
+        self._adapter: TypeAdapter | None = None
+
+    def __getattr__(self, name: str):
+        if self._adapter is None:
+            self._adapter = TypeAdapter(self._resolve())
+        return getattr(self._adapter, name)
+
+
+def _schemas():
+    import app.schemas
+    return app.schemas
+
+
+booking_adapter = LazyTypeAdapter(lambda: _schemas().BookingResponse)
+booking_list_adapter = LazyTypeAdapter(lambda: list[_schemas().BookingResponse])
+all_bookings_adapter = LazyTypeAdapter(lambda: _schemas().AllBookingResponse)
+space_adapter = LazyTypeAdapter(lambda: _schemas().SpaceResponse)
+space_list_adapter = LazyTypeAdapter(lambda: list[_schemas().SpaceResponse])
+taken_bookings_adapter = LazyTypeAdapter(lambda: list[_schemas().TakenBookingResponse])
+
+
+def space_summary(space) -> dict:
+    """
+    Space as listed in the catalog: only the first image URL, ORM object untouched.
+    """
+    return {
+        "id": space.id,
+        "name": space.name,
+        "description": space.description,
+        "capacity": space.capacity,
+        "is_available": space.is_available,
+        "location": space.location,
+        "amenities": space.amenities,
+        "hourly_rate": space.hourly_rate,
+        "images": space.images[:1] if isinstance(space.images, list) else [],
+    }
+
+
+def dump_json(adapter: TypeAdapter | LazyTypeAdapter, data: Any) -> bytes:
+    """
+    Validate `data` (dicts or ORM objects) once and serialize it straight to bytes.
+    """
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def json_response(adapter: TypeAdapter | LazyTypeAdapter, data: Any, status_code: int = 200) -> PydanticJSONResponse:
+    """
+    Build the response without FastAPI's second validation and jsonable_encoder pass.
+
+    Routes keep their `response_model` for the OpenAPI schema; returning a
+    Response instance makes FastAPI send it as is.
+    """
+    return PydanticJSONResponse(content=dump_json(adapter, data), status_code=status_code)
@@ -0,0 +1,266 @@
+# app/utils/shared_catalog.py
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import datetime
+from uuid import UUID
+from app.config import settings
+from .logging_config import logger
+from .metrics import register_metrics
+from .cache_bus import invalidation_bus
+from .serialization import dump_json, space_adapter, space_list_adapter, space_summary, taken_bookings_adapter
+from .interval_store import FOREVER, IntervalStore, load_interval_stores
+
+# File layout, little-endian:
+#   header | index entries sorted by space id | JSON blobs | starts (int64[]) | ends (int64[])
+# Busy intervals are epoch seconds, grouped by space and sorted by start.
+MAGIC = b"RMCATv2\0"
+HEADER = struct.Struct("<8sQdIIQQQQ")  # magic, generation, built_at, spaces, pad, list off/len, intervals off/count
+ENTRY = struct.Struct("<16sQIQIq")  # space id, detail off/len, first interval, interval count, longest interval
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of one mapped snapshot file. Nothing is copied out of the
+    mapping except the bytes a caller asks for, so every worker shares the
+    same page-cache pages.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.generation, self.built_at, self.space_count, _,
+         self._list_off, self._list_len, self._iv_off, self.interval_count) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        self.size = len(self._mm)
+        view = memoryview(self._mm)
+        ends_off = self._iv_off + 8 * self.interval_count
+        self.starts = view[self._iv_off:ends_off].cast("q")
+        self.ends = view[ends_off:ends_off + 8 * self.interval_count].cast("q")
+
+    def spaces_json(self) -> bytes:
+        return self._mm[self._list_off:self._list_off + self._list_len]
+
+    def _entry(self, space_id: UUID) -> tuple | None:
+        """Binary search of the sorted index, straight from the mapping."""
+        target = space_id.bytes
+        low, high = 0, self.space_count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * ENTRY.size
+            key = self._mm[offset:offset + 16]
+            if key < target:
+                low = middle + 1
+            elif key > target:
+                high = middle
+            else:
+                return ENTRY.unpack_from(self._mm, offset)
+        return None
+
+    def space_json(self, space_id: UUID) -> bytes | None:
+        entry = self._entry(space_id)
+        if entry is None:
+            return None
+        _, offset, length, _, _, _ = entry
+        return self._mm[offset:offset + length]
+
+    def interval_store(self, space_id: UUID) -> IntervalStore:
+        """Read-only IntervalStore over the space's slice of the mapped arrays."""
+        entry = self._entry(space_id)
+        if entry is None:
+            return IntervalStore(self.starts[0:0], self.ends[0:0], 0)
+        _, _, _, first, count, max_length = entry
+        return IntervalStore(self.starts[first:first + count], self.ends[first:first + count], max_length)
+
+
+def build_snapshot(path: str, generation: int) -> int:
+    """
+    Write the catalog and future busy intervals to `path` atomically.
+    Returns the snapshot size in bytes.
+    """
+    from app.database import SessionLocal
+    from app.models import Space
+
+    built_at = time.time()  # Before reading, so concurrent writes count as newer
+    db = SessionLocal()
+    try:
+        spaces = sorted(db.query(Space).all(), key=lambda space: space.id.bytes)
+        stores = load_interval_stores(db, since=datetime.fromtimestamp(built_at))
+        list_json = dump_json(space_list_adapter, [space_summary(space) for space in spaces])
+        details = [dump_json(space_adapter, space) for space in spaces]
+    finally:
+        db.close()
+
+    # Concatenate the per-space stores in index order
+    starts, ends = array("q"), array("q")
+    list_off = HEADER.size + ENTRY.size * len(spaces)
+    offset = list_off + len(list_json)
+    entries = bytearray()
+    for space, detail in zip(spaces, details):
+        store = stores.get(space.id, IntervalStore())
+        entries += ENTRY.pack(space.id.bytes, offset, len(detail), len(starts), len(store), store.max_length)
+        starts.extend(store.starts)
+        ends.extend(store.ends)
+        offset += len(detail)
+    iv_off = (offset + 7) // 8 * 8  # Align the int64 arrays
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, generation, built_at, len(spaces), 0, list_off, len(list_json), iv_off, len(starts)))
+        f.write(entries)
+        f.write(list_json)
+        for detail in details:
+            f.write(detail)
+        f.write(b"\0" * (iv_off - offset))
+        starts.tofile(f)
+        ends.tofile(f)
+        size = f.tell()
+    # Readers keep their old mapping until they notice the new file
+    os.replace(tmp_path, path)
+    return size
+
+
+class SharedCatalog:
+    """
+    Space catalog and busy intervals shared by all workers through one mmap'd file.
+
+    One worker, whichever holds the leader file lock, rebuilds the snapshot
+    after space or booking invalidations (at most every
+    SHARED_CATALOG_REBUILD_SECONDS) and every SHARED_CATALOG_MAX_AGE_SECONDS.
+    All workers map the latest file, so the catalog costs the same memory
+    for any number of workers and a new worker starts with it warm.
+
+    A key invalidated on the bus after the snapshot was built is not served
+    from it; callers fall back to their own cache or the database.
+    """
+
+    def __init__(self):
+        self.enabled = settings.SHARED_CATALOG_ENABLED
+        self.path = settings.SHARED_CATALOG_PATH
+        self.is_leader = False
+        self.hits = 0
+        self.fallbacks = 0
+        self.builds = 0
+        self._snapshot: CatalogSnapshot | None = None
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._lock_file = None
+        self._thread: threading.Thread | None = None
+        register_metrics("shared_catalog", self.stats)
+
+    def start(self):
+        if not self.enabled:
+            return
+        invalidation_bus.subscribe(self._on_invalidation)
+        self._remap()
+        self._thread = threading.Thread(target=self._run, name="shared-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._lock_file:
+            self._lock_file.close()
+
+    def _on_invalidation(self, key: str, payload=None):
+        if key == "spaces" or key.startswith(("space:", "availability:")):
+            self._dirty.set()
+
+    def _try_lead(self):
+        if self._lock_file is None:
+            self._lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        self.is_leader = True
+        self._dirty.set()
+        logger.info(f"Worker {os.getpid()} is building the shared space catalog.")
+
+    def _run(self):
+        interval = settings.SHARED_CATALOG_REBUILD_SECONDS
+        while not self._stop.wait(interval):
+            try:
+                if not self.is_leader:
+                    self._try_lead()
+                if self.is_leader and (self._dirty.is_set() or self._expired()):
+                    self._dirty.clear()
+                    generation = self._snapshot.generation + 1 if self._snapshot else 1
+                    size = build_snapshot(self.path, generation)
+                    self.builds += 1
+                    logger.info(f"Shared catalog generation {generation} built ({size} bytes).")
+                self._remap()
+            except Exception as e:
+                logger.error(f"Error refreshing shared catalog: {e}")
+
+    def _expired(self) -> bool:
+        return self._snapshot is None or time.time() - self._snapshot.built_at > settings.SHARED_CATALOG_MAX_AGE_SECONDS
+
+    def _remap(self):
+        try:
+            if self._snapshot and os.stat(self.path).st_ino == self._snapshot.inode:
+                return
+            self._snapshot = CatalogSnapshot(self.path)
+        except FileNotFoundError:
+            pass
+
+    def snapshot(self, *keys: str) -> CatalogSnapshot | None:
+        """
+        The current snapshot if it is fresh for every key in `keys`, else None.
+        """
+        if not self.enabled:
+            return None
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or self._expired()
+            or any(invalidation_bus.invalidated_at(key) >= snapshot.built_at for key in keys)
+        ):
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return snapshot
+
+    def spaces_json(self) -> bytes | None:
+        snapshot = self.snapshot("spaces")
+        return snapshot.spaces_json() if snapshot else None
+
+    def space_json(self, space_id: UUID) -> bytes | None:
+        snapshot = self.snapshot(f"space:{space_id}")
+        return snapshot.space_json(space_id) if snapshot else None
+
+    def taken_json(self, space_id: UUID) -> bytes | None:
+        """Serialized busy slots of the space that have not ended yet."""
+        snapshot = self.snapshot(f"availability:{space_id}")
+        if snapshot is None:
+            return None
+        now = int(time.time())
+        return dump_json(taken_bookings_adapter, [
+            {"start_time": datetime.fromtimestamp(start), "end_time": datetime.fromtimestamp(end)}
+            for start, end in snapshot.interval_store(space_id).overlapping(now, FOREVER)
+        ])
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "leader": self.is_leader,
+            "generation": snapshot.generation if snapshot else None,
+            "age_s": round(time.time() - snapshot.built_at, 1) if snapshot else None,
+            "bytes": snapshot.size if snapshot else 0,
+            "intervals": snapshot.interval_count if snapshot else 0,
+            "builds": self.builds,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
+
+
+shared_catalog = SharedCatalog()
@@ -0,0 +1,50 @@
+# app/utils/singleflight.py
+
+import asyncio
+from typing import Any, Callable, Hashable
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from .metrics import register_metrics
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls within a worker into one execution.
+
+    The first caller for a key runs `fn` in the threadpool; callers arriving
+    while it is in flight await the same result instead of issuing their own
+    query. The call runs in its own task, so a disconnecting first caller does
+    not cancel it for the others. Results are shared, so they should be
+    immutable (e.g. serialized bytes).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.enabled = name in settings.SINGLEFLIGHT_ROUTES
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        register_metrics(f"singleflight.{name}", self.stats)
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        if not self.enabled:
+            self.executed += 1
+            return await run_in_threadpool(fn, *args)
+
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,98 @@
+# app/utils/timer_wheel.py
+
+import math
+from typing import Hashable
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: `levels` wheels of `slots` buckets each, where
+    a bucket of level L spans slots**L ticks. A timer goes into the coarsest
+    level needed for its distance and drops a level each time the wheel
+    below wraps, so scheduling, canceling and advancing by one tick are
+    O(1) regardless of how many timers are pending.
+
+    Timers are keyed; scheduling a key again moves it and `cancel` drops it.
+    Buckets are not searched on either: stale entries stay where they are
+    and are skipped when their bucket comes up.
+    """
+
+    def __init__(self, tick_seconds: float, now: float, slots: int = 64, levels: int = 4):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self.current = int(now // tick_seconds)  # Last tick processed
+        self._wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._overflow: list[tuple[int, Hashable]] = []  # Beyond the top level
+        self._due: dict[Hashable, int] = {}  # Live timers: key -> due tick
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._due
+
+    def keys(self):
+        return self._due.keys()
+
+    def _place(self, due_tick: int, key: Hashable):
+        delta = due_tick - self.current
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.slots:
+                self._wheels[level][(due_tick // span) % self.slots].append((due_tick, key))
+                return
+            span *= self.slots
+        self._overflow.append((due_tick, key))
+
+    def schedule(self, key: Hashable, due: float):
+        """Fire `key` at the first tick at or after `due` (epoch seconds); past times fire next tick."""
+        due_tick = max(math.ceil(due / self.tick_seconds), self.current + 1)
+        if self._due.get(key) == due_tick:
+            return
+        self._due[key] = due_tick
+        self._place(due_tick, key)
+
+    def cancel(self, key: Hashable) -> bool:
+        return self._due.pop(key, None) is not None
+
+    def _cascade(self, level: int, tick: int):
+        span = self.slots ** level
+        bucket = self._wheels[level][(tick // span) % self.slots]
+        self._wheels[level][(tick // span) % self.slots] = []
+        for due_tick, key in bucket:
+            if self._due.get(key) == due_tick:
+                self._place(due_tick, key)
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Move the wheel up to `now` and return the keys whose timers fired, in due order."""
+        fired = []
+        target = int(now // self.tick_seconds)
+        while self.current < target:
+            self.current += 1
+            tick = self.current
+            # Refill the lower levels from the coarser bucket this tick enters
+            span = self.slots
+            for level in range(1, self.levels):
+                if tick % span:
+                    break
+                self._cascade(level, tick)
+                span *= self.slots
+            else:
+                if self._overflow:
+                    overflow, self._overflow = self._overflow, []
+                    for due_tick, key in overflow:
+                        if self._due.get(key) == due_tick:
+                            self._place(due_tick, key)
+
+            bucket = self._wheels[0][tick % self.slots]
+            self._wheels[0][tick % self.slots] = []
+            for due_tick, key in bucket:
+                if self._due.get(key) != due_tick:
+                    continue  # Canceled or rescheduled
+                if due_tick <= tick:
+                    del self._due[key]
+                    fired.append(key)
+                else:
+                    self._place(due_tick, key)
+        return fired
@@ -0,0 +1,10 @@
+# app/utils/timezones.py
+
+from datetime import datetime
+
+
+def to_local_naive(value: datetime | None) -> datetime | None:
+    """Times with an offset as naive local time, the way they are stored and compared."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
@@ -0,0 +1,106 @@
+# app/utils/waitlist.py
+
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.models import Booking, Space, User, WaitlistEntry
+from .logging_config import logger
+from .job_queue import job_queue
+from .cache_bus import invalidation_bus
+from .helpers import lock_space_for_booking, find_conflicting_booking
+from .pricing import price_interval
+from .booking_notifications import notify_booking_event
+from .audit import audit_trail
+
+# Job kind offering a freed interval of a space to its waitlist
+PROMOTE_WAITLIST_JOB = "promote_waitlist"
+
+
+def waiting_entries(db: Session, space_id: UUID, intervals: list[tuple[datetime, datetime]]):
+    """
+    Query of the waiting entries of a space overlapping any of `intervals`
+    that have not started yet. Served by a range scan of the (space_id,
+    start_time) index between now and the latest end.
+    """
+    return db.query(WaitlistEntry).filter(
+        WaitlistEntry.space_id == space_id,
+        WaitlistEntry.start_time > datetime.now(),
+        WaitlistEntry.start_time < max(end_time for _, end_time in intervals),
+        WaitlistEntry.status == "waiting",
+        or_(*(
+            and_(WaitlistEntry.start_time < end_time, WaitlistEntry.end_time > start_time)
+            for start_time, end_time in intervals
+        )),
+    )
+
+
+def queue_waitlist_promotion(db: Session, space_id: UUID, start_time: datetime, end_time: datetime):
+    """
+    Have [start_time, end_time) of the space offered to its waitlist once
+    the caller's transaction commits, if anyone is waiting for it. Call
+    when a booking is deleted, canceled or moved away from the interval.
+    """
+    if waiting_entries(db, space_id, [(start_time, end_time)]).with_entities(WaitlistEntry.id).first():
+        job_queue.enqueue(db, PROMOTE_WAITLIST_JOB, {
+            "space_id": str(space_id),
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+        })
+
+
+def promote_waitlist(db: Session, payloads: list[dict]):
+    """
+    Turn waiting entries into pending bookings, first come first served,
+    for every freed interval in `payloads`. An entry is promoted only if
+    its whole interval is now free; its owner is emailed and has until the
+    pending booking expires to pay. Returns a callback publishing the
+    availability changes. Does not commit.
+    """
+    freed = defaultdict(list)
+    for payload in payloads:
+        freed[UUID(payload["space_id"])].append(
+            (datetime.fromisoformat(payload["start_time"]), datetime.fromisoformat(payload["end_time"]))
+        )
+
+    promoted_spaces, promoted = set(), []
+    for space_id, intervals in freed.items():
+        # Same lock as booking requests, so a promotion cannot race a new booking
+        lock_space_for_booking(db, space_id)
+        space = db.query(Space).filter(Space.id == space_id).first()
+        if space is None:
+            continue
+        entries = waiting_entries(db, space_id, intervals).join(User, User.id == WaitlistEntry.user_id).filter(
+            User.is_active.is_(True), User.is_deleted.is_(False)
+        ).order_by(WaitlistEntry.created_at).all()
+        for entry in entries:
+            if find_conflicting_booking(db, space_id, entry.start_time, entry.end_time):
+                continue
+            booking = Booking(
+                user_id=entry.user_id,
+                space=space,
+                start_time=entry.start_time,
+                end_time=entry.end_time,
+                purpose=entry.purpose,
+                total_cost=price_interval(space.hourly_rate, entry.start_time, entry.end_time).total_cost,
+            )
+            db.add(booking)
+            db.flush()  # Later entries are checked against it
+            entry.status = "promoted"
+            entry.booking_id = booking.id
+            entry.promoted_at = datetime.now()
+            notify_booking_event(db, booking, "promoted")
+            promoted_spaces.add(space_id)
+            promoted.append((booking.id, entry.id))
+            logger.info(f"Promoted waitlist entry {entry.id} to booking {booking.id}.")
+
+    def publish():
+        for space_id in promoted_spaces:
+            invalidation_bus.publish(f"availability:{space_id}")
+        for booking_id, entry_id in promoted:
+            audit_trail.record(None, "booking.promote", "booking", booking_id, {
+                "status": [None, "pending"], "waitlist_entry_id": [None, str(entry_id)],
+            })
+
+    return publish
@@ -0,0 +1,33 @@
+# benchmarks/_env.py
+
+import os
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmarks/bench.db"
+
+# Settings the app requires; only used when they are not already configured
+BENCH_DEFAULTS = {
+    "JWT_SECRET_KEY": "benchmark-jwt-secret-key",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ADMIN_PASSWORD": "Admin123",
+    "ADMIN_PHONE": "+23490123456789",
+    "ADMIN_NAME": "Admin",
+    # Every client logs in from one IP; auth rate limits would turn setup into 429s
+    "RATE_LIMIT_ENABLED": "false",
+    # Scenarios run listings at full concurrency; shedding them would count as errors
+    "ADMISSION_CONTROL_ENABLED": "false",
+}
+
+
+def configure_environment(database_url: str | None = None) -> dict:
+    """
+    Point the app settings at the benchmark database.
+
+    Must run before anything from `app` is imported, since the settings are
+    read at import time. Returns the environment for spawned servers.
+    """
+    os.environ["DATABASE_URL"] = database_url or os.environ.get(
+        "BENCH_DATABASE_URL", DEFAULT_DATABASE_URL
+    )
+    for key, value in BENCH_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    return dict(os.environ)
@@ -0,0 +1,125 @@
+# benchmarks/availability_stream.py
+"""
+Fan-out of booking changes to live availability streams within one worker.
+
+    python -m benchmarks.availability_stream --clients 5000 --spaces 100 --events 10000
+
+Opens `--clients` streams, each following `--follow` random spaces out of
+`--spaces`, and consumes them in asyncio tasks as the HTTP responses would.
+A share of the clients (`--slow`) never read past the snapshot. Changes are
+then published on the invalidation bus as booking commits publish them,
+one per space at a time. The report gives the publish rate, deliveries per
+second, publish-to-receive latency and how many slow clients were dropped
+instead of buffering without bound.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+from ._env import configure_environment
+
+
+async def consume(stream, latencies: list[float], ready: list[int], slow: bool):
+    """Read a stream to its end, recording the latency of every change."""
+    async for frame in stream:
+        if frame.startswith(b"event: snapshot"):
+            ready[0] += 1
+            if slow:
+                await asyncio.sleep(3600)  # Never reads again
+        if frame.startswith(b"event: changes"):
+            data = json.loads(frame.split(b"data: ", 1)[1])
+            latencies.append(time.perf_counter() - data["slots"][0]["published"])
+
+
+async def drained(latencies: list[float]) -> float:
+    """Wait until no change has arrived for a while; returns when the last one did."""
+    count, last = -1, time.perf_counter()
+    while len(latencies) != count:
+        if count >= 0:
+            last = time.perf_counter()
+        count = len(latencies)
+        await asyncio.sleep(0.2)
+    return last
+
+
+async def run(args) -> dict:
+    from app.utils.availability_stream import AvailabilityBroadcaster, CHANGES_PREFIX
+    from app.utils import invalidation_bus
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)  # Models are registered by the imports above
+    broadcaster = AvailabilityBroadcaster()
+    broadcaster.start(asyncio.get_running_loop())
+    rng = random.Random(args.seed)
+    spaces = [f"00000000-0000-0000-0000-{i:012d}" for i in range(args.spaces)]
+    latencies: list[float] = []
+    ready = [0]
+    consumers = [
+        asyncio.create_task(consume(
+            broadcaster.stream(rng.sample(spaces, args.follow)), latencies, ready, rng.random() < args.slow
+        ))
+        for _ in range(args.clients)
+    ]
+    # Let every stream subscribe and send its snapshots
+    while ready[0] < args.clients:
+        await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    for i in range(args.events):
+        space_id = spaces[i % args.spaces]
+        slot = {"booking_id": f"{i:032x}", "state": "busy", "published": time.perf_counter()}
+        invalidation_bus.publish(f"{CHANGES_PREFIX}{space_id}", payload={"changes": [slot]})
+        if i % args.batch == args.batch - 1:
+            await asyncio.sleep(0)  # Commits arrive between event loop turns
+    published = time.perf_counter() - started
+    elapsed = await drained(latencies) - started
+
+    stats = broadcaster.stats()
+
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    latencies.sort()
+    return {
+        "clients": args.clients,
+        "spaces": args.spaces,
+        "events": args.events,
+        "events_per_s": round(args.events / published),
+        "deliveries_per_s": round(len(latencies) / elapsed),
+        "latency_ms": {
+            "p50": round(1000 * statistics.median(latencies), 2) if latencies else None,
+            "p99": round(1000 * latencies[int(len(latencies) * 0.99)], 2) if latencies else None,
+        },
+        "stream": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--spaces", type=int, default=100)
+    parser.add_argument("--follow", type=int, default=3, help="Spaces per client")
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=10, help="Changes published per event loop turn")
+    parser.add_argument("--slow", type=float, default=0.01, help="Share of clients that stop reading")
+    parser.add_argument("--queue-size", type=int, default=64, help="AVAILABILITY_STREAM_QUEUE_SIZE")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    configure_environment()
+    os.environ.update(
+        AVAILABILITY_STREAM_QUEUE_SIZE=str(args.queue_size),
+        AVAILABILITY_STREAM_MAX_CLIENTS=str(args.clients),
+        AVAILABILITY_STREAM_HEARTBEAT_SECONDS="3600",
+        AVAILABILITY_STREAM_MAX_SECONDS="3600",
+    )
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/booking_race.py
+"""
+Stress concurrent overlapping bookings of one space and check for double-booking.
+
+    python -m benchmarks.booking_race --strategies row advisory exclusion none --workers 4
+
+For each BOOKING_LOCK_STRATEGY a multi-worker server is started, thousands of
+overlapping create and update requests are fired at a single space, and the
+database is then checked for overlapping non-canceled bookings. The report
+gives throughput and latency per strategy; the run fails if any strategy
+other than "none" let an overlap through.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+from ._env import configure_environment
+from .load_test import login, start_server, summarize
+from .seed import seed
+
+OVERLAP_QUERY = """
+SELECT COUNT(*) FROM bookings a
+JOIN bookings b
+  ON a.space_id = b.space_id
+ AND a.id < b.id
+ AND a.start_time < b.end_time
+ AND a.end_time > b.start_time
+WHERE a.status <> 'canceled' AND b.status <> 'canceled'
+"""
+
+
+async def fire_requests(base_url: str, args) -> dict:
+    from app.utils.helpers.synthetic_data import SYNTHETIC_PASSWORD, synthetic_email
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        headers = [
+            await login(client, synthetic_email(i), SYNTHETIC_PASSWORD)
+            for i in range(args.concurrency)
+        ]
+        space_id = (await client.get("/spaces/")).json()[0]["id"]
+        rng = random.Random(args.seed)
+        base = datetime(2100, 1, 1, 8)
+
+        def random_interval() -> tuple[str, str]:
+            start = base + timedelta(minutes=30 * rng.randrange(args.window_hours * 2))
+            end = start + timedelta(minutes=30 * rng.randint(1, 6))
+            return start.isoformat(), end.isoformat()
+
+        latencies: list[float] = []
+        statuses: Counter = Counter()
+        operations: Counter = Counter()
+        errors = 0
+        remaining = iter(range(args.requests))
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            owned: list[str] = []
+            for _ in remaining:
+                start, end = random_interval()
+                started = time.perf_counter()
+                try:
+                    if owned and rng.random() < args.update_ratio:
+                        operation = "update"
+                        response = await client.put(
+                            f"/bookings/{rng.choice(owned)}",
+                            json={"start_time": start, "end_time": end},
+                            headers=headers[worker_id],
+                        )
+                    else:
+                        operation = "create"
+                        response = await client.post(
+                            "/bookings/",
+                            json={"space_id": space_id, "start_time": start, "end_time": end, "purpose": "Race"},
+                            headers=headers[worker_id],
+                        )
+                        if response.status_code == 201:
+                            owned.append(response.json()["id"])
+                    statuses[response.status_code] += 1
+                    operations[f"{operation}_{response.status_code}"] += 1
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, statuses, errors, elapsed)
+    result["operations"] = dict(sorted(operations.items()))
+    writes = operations["create_201"] + operations["update_200"]
+    result["successful_writes_per_s"] = round(writes / elapsed, 2)
+    return result
+
+
+def count_overlaps() -> int:
+    from sqlalchemy import text
+    from app.database import engine
+
+    with engine.connect() as conn:
+        return conn.execute(text(OVERLAP_QUERY)).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--strategies", nargs="+", default=["row", "advisory", "exclusion"],
+                        choices=["row", "advisory", "exclusion", "none"])
+    parser.add_argument("--workers", type=int, default=4, help="Server processes; races need more than one")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--update-ratio", type=float, default=0.2, help="Share of requests that move an owned booking")
+    parser.add_argument("--window-hours", type=int, default=48, help="Time window all requests compete for")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    env = configure_environment(args.database_url)
+    report = {"meta": {"workers": args.workers, "concurrency": args.concurrency, "requests": args.requests}, "strategies": {}}
+
+    for strategy in args.strategies:
+        print(f"Strategy {strategy}: seeding and starting {args.workers} workers...", file=sys.stderr)
+        seed(args.concurrency, 1, 0, args.seed)
+        server, base_url = start_server({**env, "BOOKING_LOCK_STRATEGY": strategy}, args.workers, f"benchmarks/race_{strategy}.log")
+        try:
+            result = asyncio.run(fire_requests(base_url, args))
+        finally:
+            server.terminate()
+            server.wait()
+        result["overlaps"] = count_overlaps()
+        report["strategies"][strategy] = result
+        print(
+            f"Strategy {strategy}: {result['successful_writes_per_s']} writes/s, "
+            f"p95 {result['latency_ms']['p95']}ms, {result['overlaps']} overlaps",
+            file=sys.stderr,
+        )
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    unsafe = [name for name, result in report["strategies"].items() if name != "none" and result["overlaps"]]
+    if unsafe:
+        print(f"Double-booking detected with: {', '.join(unsafe)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
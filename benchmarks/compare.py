@@ -0,0 +1,62 @@
+# benchmarks/compare.py
+"""
+Compare two load test reports and flag latency or throughput regressions.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/head.json
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = [
+    ("p50", lambda s: s["latency_ms"]["p50"], False),
+    ("p95", lambda s: s["latency_ms"]["p95"], False),
+    ("p99", lambda s: s["latency_ms"]["p99"], False),
+    ("rps", lambda s: s["throughput_rps"], True),
+]
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument(
+        "--fail-threshold", type=float, default=None,
+        help="Exit with status 1 if any metric regresses by more than this percentage",
+    )
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base: {base['meta'].get('commit')}  head: {head['meta'].get('commit')}")
+    print(f"{'scenario':<16}" + "".join(f"{name:>24}" for name, _, _ in METRICS))
+
+    worst_regression = 0.0
+    for scenario, head_stats in head["scenarios"].items():
+        base_stats = base["scenarios"].get(scenario)
+        if base_stats is None:
+            continue
+        row = f"{scenario:<16}"
+        for name, metric, higher_is_better in METRICS:
+            before, after = metric(base_stats), metric(head_stats)
+            delta = change(before, after)
+            regression = -delta if higher_is_better else delta
+            worst_regression = max(worst_regression, regression)
+            row += f"{before:>9.1f} -> {after:>7.1f} {delta:+5.0f}%"
+        print(row)
+
+    if args.fail_threshold is not None and worst_regression > args.fail_threshold:
+        print(f"Regression of {worst_regression:.1f}% exceeds {args.fail_threshold}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
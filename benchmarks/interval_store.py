@@ -0,0 +1,112 @@
+# benchmarks/interval_store.py
+"""
+Memory and query latency of busy slots as an IntervalStore versus Booking ORM objects.
+
+    python -m benchmarks.interval_store --intervals 1000000 --queries 2000
+
+Both sides hold the same non-overlapping intervals of one space. The ORM
+side answers an overlap query the way code holding loaded bookings would,
+by scanning them; the store bisects. Memory is measured with tracemalloc
+while each representation is built.
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+
+from ._env import configure_environment
+
+
+def make_pairs(count: int, seed: int) -> list[tuple[int, int]]:
+    """Back-to-back bookings of 1-4 hours with random gaps, in epoch seconds."""
+    rng = random.Random(seed)
+    pairs, cursor = [], int(datetime(2025, 1, 1).timestamp())
+    for _ in range(count):
+        start = cursor + 3600 * rng.randint(0, 3)
+        end = start + 3600 * rng.randint(1, 4)
+        pairs.append((start, end))
+        cursor = end
+    return pairs
+
+
+def measure(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, {"build_s": round(elapsed, 2), "memory_mb": round(size / 2**20, 1)}
+
+
+def time_queries(query, windows) -> dict:
+    started = time.perf_counter()
+    found = sum(len(query(start, end)) for start, end in windows)
+    elapsed = time.perf_counter() - started
+    return {"query_us": round(elapsed / len(windows) * 1e6, 2), "found": found}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intervals", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--orm-queries", type=int, default=20, help="Linear scans are slow; fewer are enough")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    configure_environment()
+    from app.models import Booking
+    from app.utils import IntervalStore
+
+    pairs = make_pairs(args.intervals, args.seed)
+    rng = random.Random(args.seed)
+    first, last = pairs[0][0], pairs[-1][1]
+    windows = []
+    for _ in range(args.queries):
+        start = rng.randrange(first, last)
+        windows.append((start, start + 3600 * rng.randint(1, 8)))
+
+    store, store_result = measure(lambda: IntervalStore.from_pairs(pairs))
+    store_result.update(time_queries(store.overlapping, windows))
+
+    space_id, user_id = uuid4(), uuid4()
+
+    def build_orm():
+        return [
+            Booking(
+                id=uuid4(),
+                user_id=user_id,
+                space_id=space_id,
+                start_time=datetime.fromtimestamp(start),
+                end_time=datetime.fromtimestamp(end),
+                status="confirmed",
+                total_cost=0.0,
+            )
+            for start, end in pairs
+        ]
+
+    bookings, orm_result = measure(build_orm)
+
+    def orm_overlapping(start, end):
+        start_time, end_time = datetime.fromtimestamp(start), datetime.fromtimestamp(end)
+        return [b for b in bookings if b.start_time < end_time and b.end_time > start_time]
+
+    orm_windows = windows[: args.orm_queries]
+    orm_result.update(time_queries(orm_overlapping, orm_windows))
+    assert orm_result["found"] == sum(len(store.overlapping(s, e)) for s, e in orm_windows), "Both must agree"
+
+    print(json.dumps({
+        "intervals": args.intervals,
+        "interval_store": store_result,
+        "orm_objects": orm_result,
+        "memory_ratio": round(orm_result["memory_mb"] / max(store_result["memory_mb"], 0.1), 1),
+        "query_speedup": round(orm_result["query_us"] / max(store_result["query_us"], 0.01), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# benchmarks/load_test.py
+"""
+Drive the real API with concurrent clients and report latency percentiles.
+
+    python -m benchmarks.load_test --concurrency 32 --output benchmarks/results/head.json
+
+By default the database is reseeded and a uvicorn server is started on a
+free port; pass --url to benchmark an already running server instead.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+from ._env import configure_environment
+from .seed import seed
+
+SCENARIOS = ["login", "list_bookings", "create_booking", "taken_slots", "admin_listing", "search"]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: list[float], statuses: Counter, errors: int, elapsed: float) -> dict:
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ms, 50), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "mean": round(sum(ms) / len(ms), 2) if ms else 0.0,
+            "max": round(ms[-1], 2) if ms else 0.0,
+        },
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    """Issue `total` requests from `concurrency` concurrent workers."""
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, worker_id, i)
+                statuses[response.status_code] += 1
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - started)
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post("/auth/user/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_benchmark(base_url: str, args, volumes: dict) -> dict:
+    from app.utils.helpers.synthetic_data import SYNTHETIC_PASSWORD, synthetic_email
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        admin_headers = await login(client, os.environ["ADMIN_EMAIL"], os.environ["ADMIN_PASSWORD"])
+        user_count = max(volumes["users"], 1)
+        # Log in one user per worker so reads are spread over several accounts
+        user_headers = [
+            await login(client, synthetic_email(i % user_count), SYNTHETIC_PASSWORD)
+            for i in range(min(args.concurrency, user_count))
+        ]
+        spaces = (await client.get("/spaces/")).json()
+        space_ids = [space["id"] for space in spaces]
+        rng = random.Random(args.seed)
+
+        # Future slots that every run contends for; the base day is unique per run
+        contended_space = space_ids[0] if space_ids else None
+        base_day = datetime(2100, 1, 1) + timedelta(days=int(time.time()) % 100000)
+
+        def headers_for(worker_id: int) -> dict:
+            return user_headers[worker_id % len(user_headers)]
+
+        async def do_login(c, w, i):
+            return await c.post(
+                "/auth/user/login",
+                json={"email": synthetic_email(i % user_count), "password": SYNTHETIC_PASSWORD},
+            )
+
+        async def do_list_bookings(c, w, i):
+            return await c.get("/bookings/", params={"skip": 0, "limit": 100}, headers=headers_for(w))
+
+        async def do_create_booking(c, w, i):
+            start = base_day + timedelta(hours=rng.randrange(args.contended_slots))
+            return await c.post(
+                "/bookings/",
+                json={
+                    "space_id": contended_space,
+                    "start_time": start.isoformat(),
+                    "end_time": (start + timedelta(hours=1)).isoformat(),
+                    "purpose": "Load test",
+                },
+                headers=headers_for(w),
+            )
+
+        async def do_taken_slots(c, w, i):
+            return await c.get(f"/bookings/taken/{rng.choice(space_ids)}")
+
+        async def do_admin_listing(c, w, i):
+            return await c.get("/bookings/admin/all", params={"skip": rng.randrange(0, 1000), "limit": 100}, headers=admin_headers)
+
+        async def do_search(c, w, i):
+            return await c.get("/bookings/search", params={"query": rng.choice(["meet", "Space 1", "Workshop"])}, headers=headers_for(w))
+
+        handlers = {
+            "login": do_login,
+            "list_bookings": do_list_bookings,
+            "create_booking": do_create_booking,
+            "taken_slots": do_taken_slots,
+            "admin_listing": do_admin_listing,
+            "search": do_search,
+        }
+
+        results = {}
+        for name in args.scenarios:
+            total = args.login_requests if name == "login" else args.requests
+            print(f"Running {name} ({total} requests, concurrency {args.concurrency})...", file=sys.stderr)
+            results[name] = await run_scenario(client, handlers[name], total, args.concurrency)
+        return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env: dict, workers: int, log_path: str) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited early, see {log_path}")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"Server did not start, see {log_path}")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one")
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--spaces", type=int, default=50)
+    parser.add_argument("--bookings-per-space", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="Requests for the bcrypt-bound login scenario")
+    parser.add_argument("--contended-slots", type=int, default=10, help="Distinct slots create_booking competes for")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting the server")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    env = configure_environment(args.database_url)
+    volumes = {"users": args.users, "spaces": args.spaces, "bookings_per_space": args.bookings_per_space}
+    if not args.skip_seed and not args.url:
+        volumes.update(seed(args.users, args.spaces, args.bookings_per_space, args.seed))
+        print(f"Seeded {volumes}", file=sys.stderr)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server, base_url = start_server(env, args.workers, "benchmarks/server.log")
+    try:
+        results = asyncio.run(run_benchmark(base_url, args, volumes))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "workers": args.workers if not args.url else None,
+            "volumes": volumes,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# benchmarks/payment_reconciliation.py
+"""
+Reconcile pending bookings against a local stand-in for the provider's verify API.
+
+    python -m benchmarks.payment_reconciliation --bookings 2000 --concurrency 8 --latency-ms 150
+
+Pending bookings with tx_refs, old enough to be released, are inserted and
+a fake provider is started that answers `verify_by_reference` after
+`--latency-ms`: most bookings were paid, some for too little, some payments
+failed or never happened, some are still processing and a few requests fail
+with 503. A reconciliation run is then worked through the job queue in this
+process, page by page, exactly as the scheduled job does. The report gives
+the run's throughput, the peak number of verify requests in flight, the
+connections the provider saw, and checks that every booking ended up in
+the state its payment calls for.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ._env import configure_environment
+from .payment_webhooks import insert_pending_bookings
+from .seed import seed
+
+PROVIDER_KEY = "benchmark-provider-key"
+# Share of bookings per provider answer
+OUTCOMES = {"paid": 0.55, "short": 0.05, "failed": 0.1, "missing": 0.15, "processing": 0.1, "error": 0.05}
+
+
+class FakeProvider(ThreadingHTTPServer):
+    """Flutterwave's verify_by_reference, answering from a tx_ref -> (outcome, booking) table."""
+
+    daemon_threads = True
+
+    def __init__(self, answers: dict, latency: float):
+        super().__init__(("127.0.0.1", 0), VerifyHandler)
+        self.answers = answers
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+
+class VerifyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so pooled connections are reused
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            url = urlparse(self.path)
+            tx_ref = parse_qs(url.query).get("tx_ref", [""])[0]
+            if url.path != "/transactions/verify_by_reference" or self.headers["Authorization"] != f"Bearer {PROVIDER_KEY}":
+                return self.respond(401, {"status": "error", "message": "Invalid authorization key"})
+            outcome, booking = server.answers.get(tx_ref, ("missing", None))
+            if outcome == "missing":
+                return self.respond(400, {"status": "error", "message": "No transaction was found for this id", "data": None})
+            if outcome == "error":
+                return self.respond(503, {"status": "error", "message": "Service unavailable"})
+            amount = booking["total_cost"] - 500 if outcome == "short" else booking["total_cost"]
+            status = {"failed": "failed", "processing": "pending"}.get(outcome, "successful")
+            self.respond(200, {"status": "success", "message": "Transaction fetched successfully", "data": {
+                "id": booking["transaction_id"],
+                "tx_ref": tx_ref,
+                "amount": amount,
+                "currency": "NGN",
+                "status": status,
+            }})
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+
+def expected_outcomes(bookings: list[dict], seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    answers = {}
+    for i, booking in enumerate(bookings):
+        booking["transaction_id"] = 2_000_000 + i
+        outcome = rng.choices(list(OUTCOMES), weights=list(OUTCOMES.values()))[0]
+        answers[booking["tx_ref"]] = (outcome, booking)
+    return answers
+
+
+def run_reconciliation() -> dict:
+    """Start a run and work the job queue until it has finished; returns the run's totals."""
+    from app.background_tasks import jobs  # noqa: F401  Registers the job handlers
+    from app.database import SessionLocal
+    from app.models import Job
+    from app.utils import job_queue, new_reconciliation_run, RECONCILE_JOB
+    from app.utils.payments import last_reconciliation
+
+    db = SessionLocal()
+    try:
+        job_queue.enqueue(db, RECONCILE_JOB, new_reconciliation_run())
+        db.commit()
+        while db.query(Job.id).filter(Job.kind == RECONCILE_JOB, Job.status.in_(("queued", "running"))).first():
+            db.rollback()  # Fresh snapshot on the next check
+            if not job_queue.run_once():
+                time.sleep(0.05)
+    finally:
+        db.close()
+    return dict(last_reconciliation)
+
+
+def check(answers: dict) -> dict:
+    from app.database import SessionLocal
+    from app.models import Booking
+
+    db = SessionLocal()
+    try:
+        rows = {
+            tx_ref: (booking_status, transaction_id)
+            for tx_ref, booking_status, transaction_id in db.query(
+                Booking.tx_ref, Booking.status, Booking.transaction_id
+            ).filter(Booking.tx_ref.in_(answers))
+        }
+    finally:
+        db.close()
+    wrong = Counter()
+    for tx_ref, (outcome, booking) in answers.items():
+        row = rows.get(tx_ref)
+        if outcome == "paid":
+            ok = row == ("confirmed", booking["transaction_id"])
+        elif outcome in ("failed", "missing"):
+            ok = row is None  # Released
+        else:
+            ok = row is not None and row[0] == "pending"
+        if not ok:
+            wrong[outcome] += 1
+    return {"expected": dict(Counter(outcome for outcome, _ in answers.values())), "wrong": dict(wrong)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8, help="PAYMENT_RECONCILE_CONCURRENCY")
+    parser.add_argument("--page-size", type=int, default=100, help="PAYMENT_RECONCILE_PAGE_SIZE")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Provider response time")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    answers = {}
+    provider = FakeProvider(answers, args.latency_ms / 1000)
+    configure_environment(args.database_url)
+    os.environ.update(
+        PAYMENT_PROVIDER_URL=f"http://127.0.0.1:{provider.server_address[1]}",
+        PAYMENT_PROVIDER_SECRET_KEY=PROVIDER_KEY,
+        PAYMENT_RECONCILE_CONCURRENCY=str(args.concurrency),
+        PAYMENT_RECONCILE_PAGE_SIZE=str(args.page_size),
+        NOTIFIER_OUTBOX_PATH="benchmarks/notifications.outbox",
+    )
+    threading.Thread(target=provider.serve_forever, daemon=True).start()
+
+    seed(100, 10, 0, args.seed)
+    bookings = insert_pending_bookings(args.bookings, args.seed, age=timedelta(days=2))
+    answers.update(expected_outcomes(bookings, args.seed))
+
+    print(f"Reconciling {len(bookings)} pending bookings...", file=sys.stderr)
+    totals = run_reconciliation()
+    provider.shutdown()
+
+    report = {
+        "bookings": len(bookings),
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "run": totals,
+        "provider": {
+            "requests": provider.requests,
+            "peak_in_flight": provider.peak_in_flight,
+            "connections": provider.connections,
+        },
+        "check": check(answers),
+    }
+    print(json.dumps(report, indent=2))
+    if report["check"]["wrong"]:
+        print("Some bookings did not end up in the state their payment calls for", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# benchmarks/payment_webhooks.py
+"""
+Fake payment provider: fire signed webhooks at the API and time their processing.
+
+    python -m benchmarks.payment_webhooks --bookings 2000 --duplicate-ratio 0.3 --workers 2
+
+Pending bookings with tx_refs are inserted, a server is started, and one
+Flutterwave-style "charge.completed" webhook per booking is posted with
+`--concurrency` clients. A share of them is delivered twice, as providers
+do on retries, and `--invalid` deliveries carry a wrong signature. The
+report gives the acknowledgement latency and how long the job queue took
+until every booking was confirmed, and checks that each booking was
+confirmed exactly once with its own transaction id. Pass `--url` and
+`--skip-seed` to drive an already running server set up the same way.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import httpx
+
+from ._env import configure_environment
+from .load_test import start_server, summarize
+from .seed import seed
+
+WEBHOOK_SECRET = "benchmark-webhook-secret"
+
+
+def insert_pending_bookings(count: int, seed_value: int, age: timedelta = timedelta(0)) -> list[dict]:
+    """Pending bookings with tx_refs, created `age` ago, spread over the seeded users and spaces."""
+    from app.database import SessionLocal
+    from app.models import Booking, Space, User
+    from app.utils import create_random_key
+
+    rng = random.Random(seed_value)
+    db = SessionLocal()
+    try:
+        user_ids = [user_id for (user_id,) in db.query(User.id).filter(User.is_admin.is_(False))]
+        space_ids = [space_id for (space_id,) in db.query(Space.id)]
+        base = datetime(2100, 1, 1, 8)
+        rows = []
+        for i in range(count):
+            start = base + timedelta(hours=2 * i)
+            rows.append({
+                "id": uuid4(),
+                "user_id": rng.choice(user_ids),
+                "space_id": rng.choice(space_ids),
+                "start_time": start,
+                "end_time": start + timedelta(hours=1),
+                "status": "pending",
+                "total_cost": float(rng.randint(1, 20) * 1000),
+                "purpose": "Webhook benchmark",
+                "tx_ref": create_random_key(),
+                "created_at": datetime.now() - age,
+            })
+        db.bulk_insert_mappings(Booking, rows)
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+
+def webhook_body(booking: dict, transaction_id: int) -> bytes:
+    return json.dumps({
+        "event": "charge.completed",
+        "data": {
+            "id": transaction_id,
+            "tx_ref": booking["tx_ref"],
+            "flw_ref": f"FLW-MOCK-{transaction_id}",
+            "amount": booking["total_cost"],
+            "currency": "NGN",
+            "charged_amount": booking["total_cost"],
+            "status": "successful",
+            "payment_type": "card",
+            "created_at": datetime.now().isoformat(),
+        },
+    }).encode()
+
+
+def sign(body: bytes, secret: str) -> str:
+    return base64.b64encode(hmac.new(secret.encode(), body, hashlib.sha256).digest()).decode()
+
+
+async def deliver(base_url: str, bookings: list[dict], args) -> dict:
+    rng = random.Random(args.seed)
+    deliveries = []
+    for i, booking in enumerate(bookings):
+        body = webhook_body(booking, 1_000_000 + i)
+        deliveries.append((body, {"flutterwave-signature": sign(body, WEBHOOK_SECRET)}))
+        if rng.random() < args.duplicate_ratio:
+            # Retried delivery, with the legacy verif-hash header this time
+            deliveries.append((body, {"verif-hash": WEBHOOK_SECRET}))
+    for i in range(args.invalid):
+        body = webhook_body(bookings[i % len(bookings)], 9_000_000 + i)
+        deliveries.append((body, {"flutterwave-signature": sign(body, "wrong-secret")}))
+    rng.shuffle(deliveries)
+
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = iter(deliveries)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for body, headers in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/payments/webhook", content=body, headers={"Content-Type": "application/json", **headers}
+                    )
+                    statuses[response.status_code] += 1
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, statuses, errors, elapsed)
+
+
+def wait_until_processed(bookings: list[dict], timeout: float) -> tuple[float, dict]:
+    from sqlalchemy import func
+    from app.database import SessionLocal
+    from app.models import Booking
+
+    tx_refs = [booking["tx_ref"] for booking in bookings]
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        while True:
+            confirmed = db.query(func.count(Booking.id)).filter(
+                Booking.tx_ref.in_(tx_refs), Booking.status == "confirmed"
+            ).scalar()
+            db.rollback()  # Fresh snapshot on the next poll
+            if confirmed == len(bookings) or time.perf_counter() - started > timeout:
+                break
+            time.sleep(0.1)
+        elapsed = time.perf_counter() - started
+        expected = {booking["tx_ref"]: 1_000_000 + i for i, booking in enumerate(bookings)}
+        rows = db.query(Booking.tx_ref, Booking.status, Booking.transaction_id).filter(Booking.tx_ref.in_(tx_refs)).all()
+        check = {
+            "confirmed": sum(1 for _, booking_status, _ in rows if booking_status == "confirmed"),
+            "wrong_transaction_id": sum(
+                1 for tx_ref, booking_status, transaction_id in rows
+                if booking_status == "confirmed" and transaction_id != expected[tx_ref]
+            ),
+        }
+    finally:
+        db.close()
+    return elapsed, check
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--url", help="Use a running server instead of starting one")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--invalid", type=int, default=20, help="Deliveries with a wrong signature")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for processing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    env = configure_environment(args.database_url)
+    env.setdefault("PAYMENT_WEBHOOK_SECRET_HASH", WEBHOOK_SECRET)
+    env.setdefault("NOTIFIER_OUTBOX_PATH", "benchmarks/notifications.outbox")
+
+    if not args.skip_seed:
+        seed(100, 10, 0, args.seed)
+    bookings = insert_pending_bookings(args.bookings, args.seed)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server, base_url = start_server(env, args.workers, "benchmarks/payment_webhooks.log")
+    try:
+        print(f"Delivering webhooks for {len(bookings)} bookings...", file=sys.stderr)
+        ingest = asyncio.run(deliver(base_url, bookings, args))
+        processing_s, check = wait_until_processed(bookings, args.timeout)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "bookings": len(bookings),
+        "ingest": ingest,
+        "processing": {
+            "seconds_after_last_ack": round(processing_s, 2),
+            "bookings_per_s": round(len(bookings) / max(processing_s + 1e-9, 0.001), 1),
+        },
+        "check": check,
+    }
+    print(json.dumps(report, indent=2))
+    if check["confirmed"] != len(bookings) or check["wrong_transaction_id"]:
+        print("Not every booking was confirmed exactly once with its transaction", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
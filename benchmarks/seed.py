@@ -0,0 +1,51 @@
+# benchmarks/seed.py
+"""
+Reset the benchmark database and fill it with synthetic data.
+
+    python -m benchmarks.seed --users 1000 --spaces 50 --bookings-per-space 200
+
+Data comes from `app.utils.helpers.synthetic_data`, so user `i` logs in as
+`synthetic_email(i)` with `SYNTHETIC_PASSWORD`.
+"""
+
+import argparse
+
+from ._env import configure_environment
+
+
+def seed(users: int, spaces: int, bookings_per_space: int, seed_value: int = 42) -> dict:
+    """
+    Drop and recreate all tables, then bulk insert the requested volumes.
+    Returns the inserted volumes and the seeding time.
+    """
+    from app.config import settings
+    from app.database import engine, Base
+    from app.utils import seed_admin
+    from app.utils.helpers.synthetic_data import seed_synthetic_data
+
+    if settings.ENVIRONMENT == "production":
+        raise SystemExit("Refusing to reseed a production database.")
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Synthetic users first, so their indexes start at 0
+    result = seed_synthetic_data(users, spaces, bookings_per_space, seed=seed_value)
+    seed_admin()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--spaces", type=int, default=50)
+    parser.add_argument("--bookings-per-space", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    print(seed(args.users, args.spaces, args.bookings_per_space, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/token_cache.py
+"""
+Cost of verifying access tokens with python-jose versus the verified-token cache.
+
+    python -m benchmarks.token_cache --tokens 10000 --requests 200000
+
+Simulates `--tokens` active sessions each presenting its access token many
+times, in random order, as `--requests` authenticated requests would.
+"decode" runs `jwt.decode` on every request (the previous behavior);
+"cached" goes through `verify_access_token`, which decodes each token once
+and then serves it from the cache. The cache is sized with `--cache-size`;
+a size below `--tokens` shows the effect of evictions.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from ._env import configure_environment
+
+
+def run(verify, tokens: list[str], order: list[int]) -> dict:
+    started = time.perf_counter()
+    for i in order:
+        verify(tokens[i])
+    elapsed = time.perf_counter() - started
+    return {
+        "requests_per_s": round(len(order) / elapsed),
+        "us_per_request": round(elapsed / len(order) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--cache-size", type=int, default=None, help="Defaults to TOKEN_CACHE_MAX_ENTRIES")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    configure_environment()
+    from jose import jwt
+    from app.utils.security import ALGORITHM, SECRET_KEY, create_access_token, token_cache, verify_access_token
+
+    if args.cache_size is not None:
+        token_cache.max_entries = args.cache_size
+    tokens = [create_access_token({"sub": f"user{i}", "sid": f"{i:032x}"}) for i in range(args.tokens)]
+    rng = random.Random(args.seed)
+    order = [rng.randrange(args.tokens) for _ in range(args.requests)]
+
+    decode = run(lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), tokens, order)
+    token_cache.clear()
+    token_cache.hits = token_cache.misses = 0
+    cached = run(verify_access_token, tokens, order)
+    cached.update(token_cache.stats())
+    cached["hit_ratio"] = round(token_cache.hits / args.requests, 3)
+
+    print(json.dumps({
+        "tokens": args.tokens,
+        "requests": args.requests,
+        "cache_size": token_cache.max_entries,
+        "decode": decode,
+        "cached": cached,
+        "speedup": round(decode["us_per_request"] / max(cached["us_per_request"], 0.01), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# tests/conftest.py
+
+import os
+import tempfile
+import time
+from uuid import uuid4
+
+import pytest
+
+# Settings are read when `app` is imported, so configure the environment first
+_workdir = tempfile.mkdtemp(prefix="reserveme-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_workdir}/test.db",
+    JWT_SECRET_KEY="test-jwt-secret-key",
+    ADMIN_EMAIL="admin@example.com",
+    ADMIN_PASSWORD="Admin123",
+    ADMIN_PHONE="+2340000000000",
+    ADMIN_NAME="Admin",
+    RATE_LIMIT_ENABLED="false",
+    ADMISSION_CONTROL_ENABLED="false",
+    BUS_FILE_PATH=f"{_workdir}/cache_bus.log",
+    SHARED_CATALOG_PATH=f"{_workdir}/catalog.snapshot",
+    RECEIPT_DIR=f"{_workdir}/receipts",
+    REMINDER_LOCK_PATH=f"{_workdir}/reminders.lock",
+    NOTIFIER_OUTBOX_PATH=f"{_workdir}/notifications.outbox",
+    PROFILE_DIR=f"{_workdir}/profiles",
+)
+# A zone with an offset, so times sent in UTC differ from local time
+os.environ["TZ"] = "Europe/Paris"
+time.tzset()
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    # The request logging middleware needs a client address
+    with TestClient(app, headers={"X-Real-IP": "127.0.0.1"}) as test_client:
+        yield test_client
+
+
+def login(client: TestClient, email: str, password: str) -> dict:
+    response = client.post("/auth/user/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return login(client, "admin@example.com", "Admin123")
+
+
+@pytest.fixture
+def user_headers(client):
+    """Log in a newly registered user; call again for another user."""
+
+    def register() -> dict:
+        name = f"user{uuid4().hex[:8]}"
+        response = client.post("/auth/register", json={
+            "email": f"{name}@example.com", "username": name, "phone_number": "1", "password": "Passw0rd!",
+        })
+        assert response.status_code == 200, response.text
+        return login(client, f"{name}@example.com", "Passw0rd!")
+
+    return register
+
+
+@pytest.fixture
+def space_id(client, admin_headers):
+    response = client.post("/spaces/", json={
+        "name": f"Room {uuid4().hex[:8]}", "capacity": 4, "location": "Floor 1", "hourly_rate": 100,
+    }, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
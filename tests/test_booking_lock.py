@@ -0,0 +1,55 @@
+# tests/test_booking_lock.py
+"""
+Concurrent requests for the same slot: the space lock must let exactly one
+of them book it.
+"""
+
+import threading
+from datetime import datetime
+from uuid import UUID
+
+from app.database import SessionLocal
+from app.models import Booking, User
+from app.utils import lock_space_for_booking, find_conflicting_booking
+
+ATTEMPTS = 16
+
+
+def book(space_id: UUID, user_id: UUID, barrier: threading.Barrier, booked: list):
+    start_time, end_time = datetime(2031, 3, 1, 10), datetime(2031, 3, 1, 12)
+    db = SessionLocal()
+    try:
+        barrier.wait()
+        lock_space_for_booking(db, space_id)
+        if find_conflicting_booking(db, space_id, start_time, end_time):
+            db.rollback()
+            return
+        db.add(Booking(
+            user_id=user_id, space_id=space_id, start_time=start_time, end_time=end_time,
+            purpose="Race", total_cost=200,
+        ))
+        db.commit()
+        booked.append(True)
+    finally:
+        db.close()
+
+
+def test_concurrent_bookings_of_one_slot(client, space_id):
+    db = SessionLocal()
+    user_id = db.query(User.id).first()[0]
+    db.close()
+    barrier, booked = threading.Barrier(ATTEMPTS), []
+    threads = [
+        threading.Thread(target=book, args=(UUID(space_id), user_id, barrier, booked)) for _ in range(ATTEMPTS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = SessionLocal()
+    try:
+        assert db.query(Booking).filter(Booking.space_id == UUID(space_id)).count() == 1
+    finally:
+        db.close()
+    assert len(booked) == 1
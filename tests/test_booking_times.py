@@ -0,0 +1,65 @@
+# tests/test_booking_times.py
+"""
+Booking times sent with an offset are stored and compared as naive local
+time (the tests run in Europe/Paris, one hour ahead of UTC in winter).
+"""
+
+
+def slot(space_id: str, start: str, end: str) -> dict:
+    return {"space_id": space_id, "start_time": start, "end_time": end, "purpose": "Team meeting"}
+
+
+def test_create_booking_with_offset_times(client, user_headers, space_id):
+    response = client.post(
+        "/bookings/", json=slot(space_id, "2030-01-07T10:00:00Z", "2030-01-07T12:00:00Z"), headers=user_headers()
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["start_time"] == "2030-01-07T11:00:00"
+    assert response.json()["end_time"] == "2030-01-07T13:00:00"
+
+
+def test_offset_times_conflict_with_the_same_local_slot(client, user_headers, space_id):
+    client.post("/bookings/", json=slot(space_id, "2030-01-07T11:00:00", "2030-01-07T13:00:00"), headers=user_headers())
+    response = client.post(
+        "/bookings/", json=slot(space_id, "2030-01-07T10:30:00Z", "2030-01-07T11:30:00Z"), headers=user_headers()
+    )
+    assert response.status_code == 400
+
+
+def test_update_booking_with_one_offset_time(client, user_headers, space_id):
+    headers = user_headers()
+    booking = client.post(
+        "/bookings/", json=slot(space_id, "2030-01-08T11:00:00", "2030-01-08T13:00:00"), headers=headers
+    ).json()
+
+    response = client.put(f"/bookings/{booking['id']}", json={"end_time": "2030-01-08T09:00:00Z"}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.put(f"/bookings/{booking['id']}", json={"end_time": "2030-01-08T13:00:00Z"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["end_time"] == "2030-01-08T14:00:00"
+
+
+def test_waitlist_with_offset_times(client, user_headers, space_id):
+    client.post("/bookings/", json=slot(space_id, "2030-01-09T11:00:00", "2030-01-09T13:00:00"), headers=user_headers())
+    headers = user_headers()
+
+    response = client.post(
+        "/bookings/waitlist", json=slot(space_id, "2030-01-09T10:00:00Z", "2030-01-09T12:00:00Z"), headers=headers
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["start_time"] == "2030-01-09T11:00:00"
+
+    response = client.post(
+        "/bookings/waitlist", json=slot(space_id, "2020-01-09T10:00:00Z", "2020-01-09T12:00:00Z"), headers=headers
+    )
+    assert response.status_code == 400
+
+
+def test_quote_prices_the_booked_interval(client, user_headers, space_id):
+    times = {"start_time": "2030-01-10T10:00:00+05:00", "end_time": "2030-01-10T12:00:00+05:00"}
+    quote = client.post("/spaces/quote", json={"candidates": [{"space_id": space_id, **times}]}).json()[0]
+    booking = client.post("/bookings/", json={"space_id": space_id, **times, "purpose": "Team meeting"},
+                          headers=user_headers()).json()
+    assert booking["start_time"] == "2030-01-10T06:00:00"
+    assert quote["total_cost"] == booking["total_cost"]